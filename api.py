@@ -6,17 +6,23 @@ API REST para Modelo de Predição de Churn
 Esta API permite consumir o modelo de predição de churn via HTTP requests.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import uvicorn
+import asyncio
+import codecs
+import csv
+import io
 import json
-import pickle
 import os
+import hashlib
+import tempfile
 from datetime import datetime
 
-from churn_model import ChurnPredictor
+from churn_inference import ChurnModel, DEFAULT_MODEL_PATH
+from serving import ServingConfig, InferenceExecutor, MicroBatcher, PredictionCache, ExecutorSaturatedError
 
 # Inicializar FastAPI
 app = FastAPI(
@@ -38,6 +44,29 @@ app.add_middleware(
 
 # Modelo global
 predictor = None
+inference_executor = None
+micro_batcher = None
+prediction_cache = None
+model_reload_lock = None
+
+# Configuração de serving
+# CHURN_API_MODE: "serve" (apenas carrega o artefato), "train" (retreina e salva)
+# ou "auto" (carrega o artefato se existir, senão treina e salva)
+MODEL_PATH = os.getenv("CHURN_MODEL_PATH", DEFAULT_MODEL_PATH)
+DATA_PATH = os.getenv("CHURN_DATA_PATH", "churn_dataset.csv")
+API_MODE = os.getenv("CHURN_API_MODE", "auto")
+# Política para categorias não vistas no treino: "error" (422) ou "most_frequent"
+UNKNOWN_CATEGORY = os.getenv("CHURN_UNKNOWN_CATEGORY", "error")
+serving_config = ServingConfig.from_env()
+# Predição em streaming: clientes por lote e bytes do upload mantidos em memória
+STREAM_CHUNK_SIZE = int(os.getenv("CHURN_STREAM_CHUNK_SIZE", "1000"))
+STREAM_SPOOL_MAX_BYTES = int(os.getenv("CHURN_STREAM_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+# Bytes acumulados antes de cada escrita do spool (feita em thread, fora do event loop)
+STREAM_SPOOL_WRITE_BYTES = 1024 * 1024
+
+# Respostas de importância das features pré-calculadas: método -> (etag, payload)
+feature_importance_cache = {}
+permutation_job = {"status": "idle", "error": None}
 
 # Modelos Pydantic para validação de dados
 class CustomerData(BaseModel):
@@ -171,22 +200,164 @@ def get_recommendations(probability: float, customer_data: dict) -> List[str]:
 
     return recommendations
 
+def train_and_save_model() -> ChurnModel:
+    """Treina o modelo a partir do CSV e salva o artefato para os próximos workers"""
+    # Import tardio: o pipeline de treino (pandas, scikit-learn) só é carregado neste modo
+    from churn_model import ChurnPredictor
+
+    trained = ChurnPredictor(unknown_category=UNKNOWN_CATEGORY)
+    trained.load_data(DATA_PATH)
+    trained.preprocess_data()
+    trained.train_models()
+    trained.evaluate_models()
+    trained.save(MODEL_PATH)
+    return trained.inference
+
+def build_feature_importance_response(items: List[dict], method: str, model_version: str) -> tuple[str, dict]:
+    """Monta o payload de importância das features e seu ETag"""
+    payload = {
+        "method": method,
+        "top_features": items[:10],
+        "total_features": len(items),
+        "model_version": model_version
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f'"{digest}"', payload
+
+def refresh_feature_importance_cache():
+    """Recalcula as respostas em memória a partir do modelo carregado"""
+    feature_importance_cache.clear()
+    if predictor.feature_importance:
+        feature_importance_cache["impurity"] = build_feature_importance_response(
+            predictor.feature_importance, "impurity", predictor.model_version
+        )
+    if predictor.permutation_feature_importance:
+        feature_importance_cache["permutation"] = build_feature_importance_response(
+            predictor.permutation_feature_importance, "permutation", predictor.model_version
+        )
+        permutation_job.update(status="done", error=None)
+
+def run_permutation_importance_job(job_predictor: ChurnModel):
+    """Job em background que calcula a importância por permutação do modelo em que foi iniciado
+
+    Se /model/reload trocar o modelo durante o cálculo, o resultado é descartado: ele
+    não vale para o modelo novo, e o estado do job já foi reiniciado pelo reload.
+    """
+    try:
+        items = job_predictor.compute_permutation_importance()
+    except Exception as e:
+        if job_predictor is predictor:
+            permutation_job.update(status="error", error=str(e))
+        return
+    if job_predictor is not predictor:
+        return
+    feature_importance_cache["permutation"] = build_feature_importance_response(
+        items, "permutation", job_predictor.model_version
+    )
+    permutation_job.update(status="done", error=None)
+
+def saturated_error() -> HTTPException:
+    """Resposta 503 com Retry-After para quando a inferência está saturada"""
+    return HTTPException(
+        status_code=503,
+        detail="Servidor sobrecarregado, tente novamente em instantes",
+        headers={"Retry-After": str(serving_config.retry_after_seconds)}
+    )
+
+async def run_inference(method: str, *args):
+    """Executa a inferência no pool; responde 503 com Retry-After se estiver saturado"""
+    try:
+        return await inference_executor.run(method, *args)
+    except ExecutorSaturatedError:
+        raise saturated_error()
+
+async def score_customer(customer_data: dict) -> float:
+    """Probabilidade de um cliente, via micro-batcher quando habilitado"""
+    if micro_batcher is None:
+        return await run_inference("predict_churn_probability", customer_data)
+    try:
+        return await micro_batcher.submit(customer_data)
+    except ExecutorSaturatedError:
+        raise saturated_error()
+
+async def predict_probability(customer_data: dict) -> float:
+    """Probabilidade de um cliente, consultando o cache de predições quando habilitado"""
+    if prediction_cache is None:
+        return await score_customer(customer_data)
+
+    key = PredictionCache.key(customer_data, predictor.model_version)
+    probability = prediction_cache.get(key)
+    if probability is None:
+        probability = await score_customer(customer_data)
+        prediction_cache.put(key, probability)
+    return probability
+
+async def predict_probabilities(customers_data: List[dict]) -> List[float]:
+    """Probabilidades de vários clientes; só os ausentes do cache vão para o modelo"""
+    if prediction_cache is None:
+        return (await run_inference("predict_proba_batch", customers_data)).tolist()
+
+    keys = [PredictionCache.key(customer_data, predictor.model_version) for customer_data in customers_data]
+    probabilities = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, probability in enumerate(probabilities) if probability is None]
+    if missing:
+        # Pontuar apenas os ausentes, em uma única chamada vetorizada
+        scored = await run_inference("predict_proba_batch", [customers_data[i] for i in missing])
+        for i, probability in zip(missing, scored.tolist()):
+            probabilities[i] = probability
+            prediction_cache.put(keys[i], probability)
+    return probabilities
+
+def activate_model(new_predictor: ChurnModel):
+    """Passa a servir new_predictor: recalcula respostas derivadas e, em uma troca de modelo, invalida o cache"""
+    global predictor
+    reloading = predictor is not None
+    predictor = new_predictor
+    permutation_job.update(status="idle", error=None)
+    refresh_feature_importance_cache()
+    # Na startup o cache acabou de ser criado vazio: nada a invalidar
+    if reloading and prediction_cache is not None:
+        prediction_cache.invalidate()
+
 @app.on_event("startup")
 async def startup_event():
     """Inicializa o modelo na startup da API"""
-    global predictor
+    global inference_executor, micro_batcher, prediction_cache, model_reload_lock
     try:
-        print("🔄 Carregando modelo de predição de churn...")
-        predictor = ChurnPredictor()
-        predictor.load_data('churn_dataset.csv')
-        predictor.preprocess_data()
-        predictor.train_models()
-        predictor.evaluate_models()
-        print("✅ Modelo carregado com sucesso!")
+        model_reload_lock = asyncio.Lock()
+        if API_MODE not in ("serve", "train", "auto"):
+            raise ValueError(f"CHURN_API_MODE inválido: {API_MODE}")
+
+        if API_MODE == "train" or (API_MODE == "auto" and not os.path.exists(MODEL_PATH)):
+            print("🔄 Treinando modelo de predição de churn...")
+            loaded = train_and_save_model()
+        else:
+            print(f"🔄 Carregando artefato do modelo: {MODEL_PATH}")
+            loaded = ChurnModel.load(MODEL_PATH, unknown_category=UNKNOWN_CATEGORY)
+        if serving_config.prediction_cache:
+            prediction_cache = PredictionCache(serving_config.cache_max_entries, serving_config.cache_ttl_seconds)
+        activate_model(loaded)
+        inference_executor = InferenceExecutor(
+            predictor, serving_config, model_path=MODEL_PATH, unknown_category=UNKNOWN_CATEGORY
+        )
+        if serving_config.batching:
+            micro_batcher = MicroBatcher(
+                inference_executor, serving_config.batch_max_size, serving_config.batch_max_wait_ms
+            )
+            micro_batcher.start()
+        print(f"✅ Modelo carregado com sucesso! (versão {predictor.model_version})")
     except Exception as e:
         print(f"❌ Erro ao carregar modelo: {e}")
         raise e
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Encerra o micro-batcher e o pool de inferência"""
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if inference_executor is not None:
+        inference_executor.shutdown()
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Endpoint raiz da API"""
@@ -217,8 +388,8 @@ async def predict_churn(customer: CustomerData):
         # Converter para dict
         customer_data = customer.dict()
 
-        # Fazer predição
-        probability = predictor.predict_churn_probability(customer_data)
+        # Fazer predição fora do event loop
+        probability = await predict_probability(customer_data)
 
         # Determinar nível de risco
         risk_level, risk_description = get_risk_level(probability)
@@ -226,23 +397,19 @@ async def predict_churn(customer: CustomerData):
         # Gerar recomendações
         recommendations = get_recommendations(probability, customer_data)
 
-        # Informações do modelo
-        model_info = {
-            "model_type": "Random Forest",
-            "accuracy": 0.705,
-            "auc": 0.7467,
-            "features_used": len(predictor.feature_columns)
-        }
-
         return PredictionResponse(
             churn_probability=probability,
             risk_level=risk_level,
             risk_description=risk_description,
             recommendations=recommendations,
             timestamp=datetime.now().isoformat(),
-            model_info=model_info
+            model_info=predictor.model_info()
         )
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Dados inválidos: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
 
@@ -252,14 +419,21 @@ async def predict_churn_batch(request: BatchPredictionRequest):
     if predictor is None:
         raise HTTPException(status_code=503, detail="Modelo não carregado")
 
+    if len(request.customers) == 0:
+        raise HTTPException(status_code=400, detail="Lista de clientes vazia")
+
     try:
+        customers_data = [customer.dict() for customer in request.customers]
+
+        # Pontuar o lote inteiro em uma única chamada vetorizada (ausentes do cache)
+        probabilities = await predict_probabilities(customers_data)
+
         predictions = []
-        total_probability = 0
         risk_distribution = {"🟢 BAIXO RISCO": 0, "🟡 RISCO MÉDIO": 0, "🔴 ALTO RISCO": 0}
+        model_info = predictor.model_info()
+        timestamp = datetime.now().isoformat()
 
-        for i, customer in enumerate(request.customers):
-            customer_data = customer.dict()
-            probability = predictor.predict_churn_probability(customer_data)
+        for i, (customer_data, probability) in enumerate(zip(customers_data, probabilities)):
             risk_level, risk_description = get_risk_level(probability)
             recommendations = get_recommendations(probability, customer_data)
 
@@ -269,19 +443,14 @@ async def predict_churn_batch(request: BatchPredictionRequest):
                 risk_level=risk_level,
                 risk_description=risk_description,
                 recommendations=recommendations,
-                timestamp=datetime.now().isoformat(),
-                model_info={
-                    "model_type": "Random Forest",
-                    "accuracy": 0.705,
-                    "auc": 0.7467
-                }
+                timestamp=timestamp,
+                model_info=model_info
             )
 
             predictions.append(prediction)
-            total_probability += probability
             risk_distribution[risk_level] += 1
 
-        average_probability = total_probability / len(request.customers)
+        average_probability = sum(probabilities) / len(probabilities)
 
         return BatchPredictionResponse(
             predictions=predictions,
@@ -290,54 +459,245 @@ async def predict_churn_batch(request: BatchPredictionRequest):
             risk_distribution=risk_distribution
         )
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Dados inválidos: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na predição em lote: {str(e)}")
 
+class InvalidLine:
+    """Linha do upload que não pôde ser lida; vira uma linha de erro no resultado"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+def iter_records(file, input_format: str):
+    """Clientes NDJSON ou CSV do arquivo, um por linha; linhas ilegíveis viram InvalidLine"""
+    if input_format == "csv":
+        records = csv.DictReader(codecs.getreader("utf-8")(file))
+        while True:
+            try:
+                yield next(records)
+            except StopIteration:
+                return
+            except (ValueError, csv.Error) as e:
+                yield InvalidLine(f"Entrada inválida: {str(e)}")
+    else:
+        # Cada linha é decodificada separadamente: uma linha inválida não interrompe as seguintes
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield InvalidLine(f"Entrada inválida: {str(e)}")
+
+def iter_record_chunks(file, input_format: str, chunk_size: int):
+    """Lê clientes NDJSON ou CSV de um arquivo em lotes de até chunk_size"""
+    chunk = []
+    for record in iter_records(file, input_format):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def run_waiting(method: str, *args):
+    """inference_executor.run aguardando, em vez de falhar, enquanto o pool estiver saturado"""
+    while True:
+        try:
+            return await inference_executor.run(method, *args)
+        except ExecutorSaturatedError:
+            await asyncio.sleep(serving_config.retry_after_seconds)
+
+def stream_error(row: int, error: str) -> str:
+    """Linha NDJSON de erro de um registro do upload"""
+    return json.dumps({"row": row, "error": error}, ensure_ascii=False) + "\n"
+
+async def score_stream(upload, input_format: str, output_format: str):
+    """Pontua o upload lote a lote, emitindo os resultados à medida que ficam prontos"""
+    chunks = iter_record_chunks(upload, input_format, STREAM_CHUNK_SIZE)
+    row = 0
+    try:
+        if output_format == "csv":
+            yield "row,customer_id,churn_probability,risk_level\n"
+
+        while True:
+            try:
+                chunk = await asyncio.to_thread(next, chunks, None)
+            except (ValueError, csv.Error) as e:
+                # Erro de leitura do próprio arquivo (ex.: CSV com UTF-8 inválido)
+                yield stream_error(row, f"Entrada inválida: {str(e)}")
+                return
+            if chunk is None:
+                return
+
+            # Linhas ilegíveis ou que não são objetos JSON viram uma linha de erro cada
+            errors, records, record_rows = {}, [], []
+            for i, record in enumerate(chunk):
+                if isinstance(record, InvalidLine):
+                    errors[row + i] = record.error
+                elif not isinstance(record, dict):
+                    errors[row + i] = "Registro inválido: esperado um objeto JSON"
+                else:
+                    records.append(record)
+                    record_rows.append(row + i)
+
+            # Pontuar o lote inteiro de uma vez; se algum cliente for inválido, pontuar um a um
+            # (como MicroBatcher._score_individually) e reportar só as linhas inválidas
+            probabilities = []
+            if records:
+                try:
+                    probabilities = (await run_waiting("predict_proba_batch", records)).tolist()
+                except (TypeError, ValueError):
+                    probabilities = []
+                    for record_row, record in zip(record_rows, records):
+                        try:
+                            probabilities.append(await run_waiting("predict_churn_probability", record))
+                        except (TypeError, ValueError) as e:
+                            errors[record_row] = f"Dados inválidos: {str(e)}"
+                            probabilities.append(None)
+
+            # Resultados e erros na ordem das linhas do upload
+            output = io.StringIO()
+            writer = csv.writer(output, lineterminator="\n")
+            scored = {record_row: (record, probability)
+                      for record_row, record, probability in zip(record_rows, records, probabilities)}
+            for record_row in range(row, row + len(chunk)):
+                if record_row in errors:
+                    output.write(stream_error(record_row, errors[record_row]))
+                    continue
+                record, probability = scored[record_row]
+                customer_id = record.get("customer_id", record_row)
+                risk_level, _ = get_risk_level(probability)
+                if output_format == "csv":
+                    writer.writerow([record_row, customer_id, f"{probability:.6f}", risk_level])
+                else:
+                    output.write(json.dumps({
+                        "row": record_row,
+                        "customer_id": customer_id,
+                        "churn_probability": probability,
+                        "risk_level": risk_level
+                    }, ensure_ascii=False) + "\n")
+            yield output.getvalue()
+
+            row += len(chunk)
+    finally:
+        upload.close()
+
+@app.post("/predict/stream")
+async def predict_churn_stream(request: Request, input_format: Optional[str] = None,
+                               output_format: str = "ndjson"):
+    """Pontua um upload NDJSON ou CSV em lotes e devolve os resultados em streaming"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Modelo não carregado")
+
+    if input_format is None:
+        content_type = request.headers.get("content-type", "")
+        input_format = "csv" if "csv" in content_type else "ndjson"
+    if input_format not in ("ndjson", "csv") or output_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Formatos suportados: ndjson e csv")
+
+    # O corpo precisa ser lido antes da resposta começar: o StreamingResponse escuta desconexões
+    # no mesmo canal de recebimento (ASGI < 2.4). Os pedaços são acumulados e gravados no
+    # arquivo temporário fora do event loop (o spool passa para o disco acima do limite)
+    upload = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX_BYTES)
+    pending = bytearray()
+    async for data in request.stream():
+        pending += data
+        if len(pending) >= STREAM_SPOOL_WRITE_BYTES:
+            await asyncio.to_thread(upload.write, bytes(pending))
+            pending.clear()
+    await asyncio.to_thread(upload.write, bytes(pending))
+    await asyncio.to_thread(upload.seek, 0)
+
+    media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(score_stream(upload, input_format, output_format), media_type=media_type)
+
 @app.get("/model/info")
 async def get_model_info():
     """Retorna informações sobre o modelo"""
     if predictor is None:
         raise HTTPException(status_code=503, detail="Modelo não carregado")
 
+    model_info = predictor.model_info()
+
     return {
-        "model_type": "Random Forest",
-        "accuracy": 0.705,
-        "auc": 0.7467,
+        "model_type": model_info["model_type"],
+        "accuracy": model_info["accuracy"],
+        "auc": model_info["auc"],
+        "model_version": model_info["model_version"],
+        "engine": model_info["engine"],
         "features_count": len(predictor.feature_columns),
         "features": predictor.feature_columns[:10],  # Primeiras 10 features
         "dataset_size": 1000,
         "churn_rate": 0.645
     }
 
+@app.post("/model/reload")
+async def reload_model():
+    """Recarrega o artefato do disco (ex.: após retreino) e invalida o cache de predições"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Modelo não carregado")
+
+    async with model_reload_lock:
+        previous_version = predictor.model_version
+        try:
+            loaded = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: ChurnModel.load(MODEL_PATH, unknown_category=UNKNOWN_CATEGORY)
+            )
+        except (OSError, ValueError) as e:
+            raise HTTPException(status_code=500, detail=f"Erro ao recarregar o modelo: {str(e)}")
+
+        inference_executor.reload(loaded, model_path=MODEL_PATH, unknown_category=UNKNOWN_CATEGORY)
+        activate_model(loaded)
+
+    return {
+        "previous_version": previous_version,
+        "model_version": predictor.model_version,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None
+    }
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Contadores do cache de predições (hits, misses, remoções, invalidações)"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "model_version": predictor.model_version if predictor else None,
+            **prediction_cache.stats()}
+
 @app.get("/features/importance")
-async def get_feature_importance():
-    """Retorna a importância das features"""
+async def get_feature_importance(request: Request, background_tasks: BackgroundTasks,
+                                 method: str = "impurity"):
+    """Retorna a importância das features (pré-calculada no treino)"""
     if predictor is None:
         raise HTTPException(status_code=503, detail="Modelo não carregado")
 
-    try:
-        # Usar Random Forest para análise de importância
-        from sklearn.ensemble import RandomForestClassifier
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
-        rf.fit(predictor.X_train, predictor.y_train)
-
-        feature_importance = []
-        for feature, importance in zip(predictor.feature_columns, rf.feature_importances_):
-            feature_importance.append({
-                "feature": feature,
-                "importance": float(importance)
-            })
-
-        # Ordenar por importância
-        feature_importance.sort(key=lambda x: x["importance"], reverse=True)
-
-        return {
-            "top_features": feature_importance[:10],
-            "total_features": len(feature_importance)
-        }
+    if method not in ("impurity", "permutation"):
+        raise HTTPException(status_code=400, detail=f"Método inválido: {method}")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao obter importância das features: {str(e)}")
+    cached = feature_importance_cache.get(method)
+    if cached is None:
+        if method == "impurity":
+            raise HTTPException(status_code=404, detail="Importância das features não disponível no artefato")
+
+        # Importância por permutação é calculada sob demanda em background
+        if permutation_job["status"] != "running":
+            permutation_job.update(status="running", error=None)
+            background_tasks.add_task(run_permutation_importance_job, predictor)
+
+        return JSONResponse(status_code=202, content={"method": method, **permutation_job})
+
+    etag, payload = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=payload, headers=headers)
 
 @app.post("/sample/customer")
 async def get_sample_customer():
@@ -398,4 +758,6 @@ async def get_sample_customer():
     return sample_customer
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
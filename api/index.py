@@ -4,278 +4,359 @@ API REST para Modelo de Predição de Churn - Vercel
 ===================================================
 
 Este arquivo é o entry point para o Vercel em /api/
-Versão HTTP handler básico que funciona no Vercel.
+Versão HTTP handler básico que funciona no Vercel. Pontua com o modelo
+portátil (api/churn_model_portable.json, gerado por export_portable.py),
+em Python puro, sem carregar scikit-learn no cold start.
+
+Tudo que não depende da requisição é montado uma vez, no import: o modelo e
+as respostas estáticas já serializadas em bytes. Invocações "quentes" da
+mesma instância só pontuam o cliente e serializam a resposta da predição
+(/api/ e /api/health só acrescentam o timestamp atual).
 """
 
 from http.server import BaseHTTPRequestHandler
 import json
+import os
+import sys
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from portable_model import load_portable_model
+
+PORTABLE_MODEL_PATH = os.getenv(
+    'CHURN_PORTABLE_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'churn_model_portable.json')
+)
+UNKNOWN_CATEGORY = os.getenv('CHURN_UNKNOWN_CATEGORY', 'error')
+# Limite do corpo de /api/predict (um cliente ocupa ~2 KB em JSON)
+MAX_BODY_BYTES = int(os.getenv('CHURN_MAX_BODY_BYTES', '65536'))
+
+# Modelo carregado uma vez por instância (no import) e reaproveitado entre invocações
+try:
+    portable_model = load_portable_model(PORTABLE_MODEL_PATH, unknown_category=UNKNOWN_CATEGORY)
+    model_load_error = None
+except (OSError, ValueError, KeyError) as e:
+    portable_model = None
+    model_load_error = f"Modelo portátil indisponível ({PORTABLE_MODEL_PATH}): {e}"
+
+AVAILABLE_ENDPOINTS = [
+    "/api/",
+    "/api/health",
+    "/api/model/info",
+    "/api/features/importance",
+    "/api/sample/customer",
+    "/api/predict"
+]
+
+SAMPLE_CUSTOMER = {
+    "age": 35,
+    "gender": "M",
+    "subscription_length_months": 12,
+    "monthly_charge": 45.20,
+    "total_charges": 542.40,
+    "contract_type": "One year",
+    "payment_method": "Bank transfer",
+    "paperless_billing": "Yes",
+    "tech_support": "No",
+    "online_security": "No",
+    "online_backup": "No",
+    "device_protection": "No",
+    "premium_tech_support": "No",
+    "streaming_tv": "No",
+    "streaming_movies": "No",
+    "streaming_music": "No",
+    "unlimited_data": "No",
+    "internet_service_type": "DSL",
+    "phone_service": "Yes",
+    "multiple_lines": "No",
+    "internet_service": "Yes",
+    "avg_monthly_gb_download": 12.5,
+    "avg_monthly_gb_download_6_months": 15.2,
+    "avg_monthly_gb_download_12_months": 13.8,
+    "monthly_usage_gb": 200,
+    "overage_fees": 0,
+    "roaming_charges": 0,
+    "international_plan": "No",
+    "voice_mail_plan": "No",
+    "number_vmail_messages": 0,
+    "number_customer_service_calls": 5,
+    "number_calls_placed": 12,
+    "number_calls_received": 8,
+    "total_minutes_used": 300,
+    "total_data_used_gb": 5.2,
+    "avg_call_duration_minutes": 4.8,
+    "avg_call_duration_6_months": 5.5,
+    "avg_call_duration_12_months": 3,
+    "payment_delay_days": 1,
+    "late_payment_count": 0,
+    "missed_payment_count": 0,
+    "contract_renewal_days": 365,
+    "days_since_last_upgrade": 90,
+    "days_since_last_downgrade": 0,
+    "days_since_last_complaint": 30,
+    "complaint_count": 2,
+    "positive_feedback_count": 1,
+    "negative_feedback_count": 0,
+    "social_media_mentions": 0,
+    "satisfaction_score": 5
+}
+
+# (limite superior exclusivo, nível, descrição), do menor para o maior risco:
+# 0.4 já é risco médio e 0.7 já é risco alto
+RISK_LEVELS = [
+    (0.4, "🟢 BAIXO RISCO", "Cliente estável"),
+    (0.7, "🟡 RISCO MÉDIO", "Monitoramento recomendado"),
+    (float('inf'), "🔴 ALTO RISCO", "Ação imediata necessária")
+]
+
+# (limite inferior exclusivo, recomendações base), do maior para o menor risco:
+# as recomendações de cada faixa só começam acima do limite (0.7 ainda recebe as de risco médio)
+BASE_RECOMMENDATIONS = [
+    (0.7, (
+        "🚨 Contato imediato com o cliente",
+        "💎 Proposta de desconto especial",
+        "📞 Ligação direta do gerente",
+        "🎁 Programa de fidelidade premium"
+    )),
+    (0.4, (
+        "📧 Envio de material educativo sobre serviços",
+        "🎯 Campanha de retenção personalizada",
+        "📊 Monitoramento semanal do comportamento",
+        "💬 Proposta de upgrade de plano"
+    )),
+    (float('-inf'), (
+        "✅ Manter estratégia atual",
+        "📱 Comunicação regular sobre novos recursos",
+        "🎉 Programa de recompensas",
+        "📈 Análise de oportunidades de upsell"
+    ))
+]
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type')
+]
+
+
+def json_bytes(response):
+    """Serializa uma resposta em JSON UTF-8 compacto"""
+    return json.dumps(response, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def build_static_responses():
+    """Respostas que não dependem da requisição, já serializadas: {caminho: (status, bytes)}"""
+    responses = {
+        '/api/sample/customer': (200, json_bytes(SAMPLE_CUSTOMER))
+    }
+
+    if portable_model is None:
+        unavailable = (503, json_bytes({"error": model_load_error}))
+        responses['/api/model/info'] = unavailable
+        responses['/api/features/importance'] = unavailable
+        return responses
+
+    model_info = portable_model.model_info()
+    responses['/api/model/info'] = (200, json_bytes({
+        "model_type": model_info["model_type"],
+        "accuracy": model_info["accuracy"],
+        "auc": model_info["auc"],
+        "model_version": model_info["model_version"],
+        "engine": model_info["engine"],
+        "features_count": len(portable_model.feature_columns),
+        "features": portable_model.feature_columns[:10],
+        "dataset_size": 1000,
+        "churn_rate": 0.645
+    }))
+    responses['/api/features/importance'] = (200, json_bytes({
+        "top_features": portable_model.feature_importance[:5],
+        "total_features": len(portable_model.feature_columns),
+        "method": "impurity"
+    }))
+    return responses
+
+
+def root_response():
+    return 200, json_bytes({
+        "message": "Churn Prediction API",
+        "version": "1.0.0",
+        "timestamp": datetime.now().isoformat(),
+        "note": "Modelo portátil em Python puro (export_portable.py)"
+    })
+
+
+def health_response():
+    return 200, json_bytes({
+        "status": "healthy",
+        "model_loaded": portable_model is not None,
+        "timestamp": datetime.now().isoformat(),
+        "version": "1.0.0"
+    })
+
+
+STATIC_RESPONSES = build_static_responses()
+# Respostas com o horário da requisição: montadas a cada chamada
+LIVE_RESPONSES = {
+    '/api/': root_response,
+    '/api/health': health_response
+}
+MODEL_INFO = portable_model.model_info() if portable_model is not None else None
+
+
+class RequestError(Exception):
+    """Erro de requisição com status HTTP (corpo ausente, grande demais ou JSON inválido)"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def number(customer_data, key, default):
+    """Valor numérico de um campo para as regras de recomendação (default se ausente/inválido)"""
+    try:
+        return float(customer_data.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_risk_level(probability):
+    """Nível e descrição do risco para a probabilidade"""
+    for upper, level, description in RISK_LEVELS:
+        if probability < upper:
+            return level, description
+    return RISK_LEVELS[-1][1:]
+
+
+def get_base_recommendations(probability):
+    """Recomendações base da faixa de risco da probabilidade"""
+    for lower, recommendations in BASE_RECOMMENDATIONS:
+        if probability > lower:
+            return recommendations
+    return BASE_RECOMMENDATIONS[-1][1]
+
+
+def get_recommendations(base, customer_data):
+    """Recomendações base do nível de risco + específicas dos dados do cliente"""
+    recommendations = list(base)
+
+    if customer_data.get('contract_type') == 'Month-to-month':
+        recommendations.append("📋 Proposta de contrato anual com desconto")
+
+    if number(customer_data, 'number_customer_service_calls', 0) > 5:
+        recommendations.append("🔧 Melhoria no suporte técnico")
+
+    if number(customer_data, 'satisfaction_score', 10) < 5:
+        recommendations.append("📞 Contato para entender insatisfação")
+
+    if number(customer_data, 'late_payment_count', 0) > 0:
+        recommendations.append("💳 Revisão das opções de pagamento")
+
+    return recommendations
+
+
+def predict_response(customer_data):
+    """Resposta serializada de /api/predict para um cliente"""
+    probability = portable_model.predict_churn_probability(customer_data)
+    risk_level, risk_description = get_risk_level(probability)
+    base_recommendations = get_base_recommendations(probability)
+
+    return json_bytes({
+        "customer_id": customer_data.get("customer_id"),
+        "churn_probability": probability,
+        "risk_level": risk_level,
+        "risk_description": risk_description,
+        "recommendations": get_recommendations(base_recommendations, customer_data),
+        "timestamp": datetime.now().isoformat(),
+        "model_info": MODEL_INFO
+    })
+
+
+def not_found(path):
+    return 404, json_bytes({
+        "error": "Not found",
+        "path": path,
+        "available_endpoints": AVAILABLE_ENDPOINTS
+    })
+
+
+def error_response(status, message):
+    return status, json_bytes({
+        "error": message,
+        "timestamp": datetime.now().isoformat()
+    })
+
 
 class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in CORS_HEADERS:
+            self.send_header(name, value)
         self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        """Caminho sem query string nem barra final extra (exceto a raiz /api/)"""
+        path = urlparse(self.path).path
+        if path != '/api/' and path.endswith('/'):
+            path = path.rstrip('/')
+        return path
+
+    def read_json_body(self):
+        """Lê e valida o corpo JSON (objeto) da requisição"""
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise RequestError(411, "Content-Length obrigatório")
+        try:
+            length = int(length)
+        except ValueError:
+            raise RequestError(400, "Content-Length inválido") from None
+        if length < 0:
+            raise RequestError(400, "Content-Length inválido")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Corpo maior que {MAX_BODY_BYTES} bytes")
+
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise RequestError(400, f"JSON inválido: {e}") from None
+        if not isinstance(payload, dict):
+            raise RequestError(400, "O corpo deve ser um objeto JSON com os dados do cliente")
+        return payload
 
-        if self.path == '/api/':
-            response = {
-                "message": "Churn Prediction API",
-                "version": "1.0.0",
-                "timestamp": datetime.now().isoformat(),
-                "note": "Usando modelo mock para compatibilidade com Vercel"
-            }
-        elif self.path == '/api/health':
-            response = {
-                "status": "healthy",
-                "model_loaded": False,
-                "timestamp": datetime.now().isoformat(),
-                "version": "1.0.0"
-            }
-        elif self.path == '/api/model/info':
-            response = {
-                "model_type": "Mock Algorithm",
-                "accuracy": 0.705,
-                "auc": 0.7467,
-                "features_count": 50,
-                "features": ["age", "subscription_length_months", "monthly_charge", "satisfaction_score"],
-                "dataset_size": 1000,
-                "churn_rate": 0.645,
-                "note": "Algoritmo mock para demonstração - compatível com Vercel"
-            }
-        elif self.path == '/api/features/importance':
-            response = {
-                "top_features": [
-                    {"feature": "contract_type", "importance": 0.058787},
-                    {"feature": "satisfaction_score", "importance": 0.050098},
-                    {"feature": "monthly_charge", "importance": 0.047574},
-                    {"feature": "number_customer_service_calls", "importance": 0.045123},
-                    {"feature": "late_payment_count", "importance": 0.042891}
-                ],
-                "total_features": 50,
-                "note": "Importância baseada em algoritmo mock"
-            }
-        else:
-            response = {
-                "error": "Not found",
-                "path": self.path,
-                "available_endpoints": [
-                    "/api/",
-                    "/api/health",
-                    "/api/model/info",
-                    "/api/features/importance",
-                    "/api/sample/customer",
-                    "/api/predict"
-                ]
-            }
-
-        self.wfile.write(json.dumps(response).encode())
+    def do_GET(self):
+        path = self.route()
+        if path in LIVE_RESPONSES:
+            return self.send_body(*LIVE_RESPONSES[path]())
+        self.send_body(*STATIC_RESPONSES.get(path) or not_found(path))
 
     def do_POST(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-
-        if self.path == '/api/sample/customer':
-            response = {
-                "age": 35,
-                "gender": "M",
-                "subscription_length_months": 12,
-                "monthly_charge": 45.20,
-                "total_charges": 542.40,
-                "contract_type": "One year",
-                "payment_method": "Bank transfer",
-                "paperless_billing": "Yes",
-                "tech_support": "No",
-                "online_security": "No",
-                "online_backup": "No",
-                "device_protection": "No",
-                "premium_tech_support": "No",
-                "streaming_tv": "No",
-                "streaming_movies": "No",
-                "streaming_music": "No",
-                "unlimited_data": "No",
-                "internet_service_type": "DSL",
-                "phone_service": "Yes",
-                "multiple_lines": "No",
-                "internet_service": "Yes",
-                "avg_monthly_gb_download": 12.5,
-                "avg_monthly_gb_download_6_months": 15.2,
-                "avg_monthly_gb_download_12_months": 13.8,
-                "monthly_usage_gb": 200,
-                "overage_fees": 0,
-                "roaming_charges": 0,
-                "international_plan": "No",
-                "voice_mail_plan": "No",
-                "number_vmail_messages": 0,
-                "number_customer_service_calls": 5,
-                "number_calls_placed": 12,
-                "number_calls_received": 8,
-                "total_minutes_used": 300,
-                "total_data_used_gb": 5.2,
-                "avg_call_duration_minutes": 4.8,
-                "avg_call_duration_6_months": 5.5,
-                "avg_call_duration_12_months": 3,
-                "payment_delay_days": 1,
-                "late_payment_count": 0,
-                "missed_payment_count": 0,
-                "contract_renewal_days": 365,
-                "days_since_last_upgrade": 90,
-                "days_since_last_downgrade": 0,
-                "days_since_last_complaint": 30,
-                "complaint_count": 2,
-                "positive_feedback_count": 1,
-                "negative_feedback_count": 0,
-                "social_media_mentions": 0,
-                "satisfaction_score": 5
-            }
-        elif self.path == '/api/predict':
-            # Ler o corpo da requisição
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-
-            try:
-                customer_data = json.loads(post_data.decode('utf-8'))
-
-                # Algoritmo mock de predição
-                probability = self.predict_churn_mock(customer_data)
-                risk_level, risk_description = self.get_risk_level(probability)
-                recommendations = self.get_recommendations(probability, customer_data)
-
-                response = {
-                    "customer_id": None,
-                    "churn_probability": probability,
-                    "risk_level": risk_level,
-                    "risk_description": risk_description,
-                    "recommendations": recommendations,
-                    "timestamp": datetime.now().isoformat(),
-                    "model_info": {
-                        "model_type": "Mock Algorithm",
-                        "accuracy": 0.705,
-                        "auc": 0.7467,
-                        "features_used": 50,
-                        "note": "Algoritmo mock para demonstração"
-                    }
-                }
-            except Exception as e:
-                response = {
-                    "error": f"Erro na predição: {str(e)}",
-                    "timestamp": datetime.now().isoformat()
-                }
-        else:
-            response = {
-                "error": "Not found",
-                "path": self.path,
-                "available_endpoints": [
-                    "/api/",
-                    "/api/health",
-                    "/api/model/info",
-                    "/api/features/importance",
-                    "/api/sample/customer",
-                    "/api/predict"
-                ]
-            }
-
-        self.wfile.write(json.dumps(response).encode())
+        path = self.route()
+
+        if path == '/api/sample/customer':
+            return self.send_body(*STATIC_RESPONSES[path])
+        if path != '/api/predict':
+            return self.send_body(*not_found(path))
+        if portable_model is None:
+            return self.send_body(*STATIC_RESPONSES['/api/model/info'])
+
+        try:
+            customer_data = self.read_json_body()
+            self.send_body(200, predict_response(customer_data))
+        except RequestError as e:
+            self.send_body(*error_response(e.status, str(e)))
+        except ValueError as e:
+            self.send_body(*error_response(422, f"Dados inválidos: {e}"))
+        except Exception as e:
+            self.send_body(*error_response(500, f"Erro na predição: {e}"))
 
     def do_OPTIONS(self):
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        for name, value in CORS_HEADERS:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
         self.end_headers()
-
-    def predict_churn_mock(self, customer_data: dict) -> float:
-        """Prediz churn usando algoritmo mock baseado nos dados do cliente"""
-        probability = 0.3  # Base probability
-
-        # Fatores que aumentam a probabilidade de churn
-        if customer_data.get('contract_type') == 'Month-to-month':
-            probability += 0.2
-
-        if customer_data.get('satisfaction_score', 10) < 5:
-            probability += 0.25
-
-        if customer_data.get('number_customer_service_calls', 0) > 5:
-            probability += 0.15
-
-        if customer_data.get('late_payment_count', 0) > 0:
-            probability += 0.1
-
-        if customer_data.get('monthly_charge', 0) > 80:
-            probability += 0.1
-
-        if customer_data.get('age', 0) < 30:
-            probability += 0.05
-
-        # Fatores que diminuem a probabilidade de churn
-        if customer_data.get('contract_type') == 'Two year':
-            probability -= 0.15
-
-        if customer_data.get('satisfaction_score', 0) >= 8:
-            probability -= 0.2
-
-        if customer_data.get('tech_support') == 'Yes':
-            probability -= 0.1
-
-        if customer_data.get('paperless_billing') == 'Yes':
-            probability -= 0.05
-
-        # Garantir que a probabilidade esteja entre 0 e 1
-        return max(0.1, min(0.9, probability))
-
-    def get_risk_level(self, probability: float) -> tuple[str, str]:
-        """Determina o nível de risco baseado na probabilidade"""
-        if probability < 0.4:
-            return "🟢 BAIXO RISCO", "Cliente estável"
-        elif probability < 0.7:
-            return "🟡 RISCO MÉDIO", "Monitoramento recomendado"
-        else:
-            return "🔴 ALTO RISCO", "Ação imediata necessária"
-
-    def get_recommendations(self, probability: float, customer_data: dict) -> list[str]:
-        """Gera recomendações baseadas na probabilidade de churn"""
-        recommendations = []
-
-        if probability > 0.7:
-            recommendations.extend([
-                "🚨 Contato imediato com o cliente",
-                "💎 Proposta de desconto especial",
-                "📞 Ligação direta do gerente",
-                "🎁 Programa de fidelidade premium"
-            ])
-        elif probability > 0.4:
-            recommendations.extend([
-                "📧 Envio de material educativo sobre serviços",
-                "🎯 Campanha de retenção personalizada",
-                "📊 Monitoramento semanal do comportamento",
-                "💬 Proposta de upgrade de plano"
-            ])
-        else:
-            recommendations.extend([
-                "✅ Manter estratégia atual",
-                "📱 Comunicação regular sobre novos recursos",
-                "🎉 Programa de recompensas",
-                "📈 Análise de oportunidades de upsell"
-            ])
-
-        # Recomendações específicas baseadas nos dados do cliente
-        if customer_data.get('contract_type') == 'Month-to-month':
-            recommendations.append("📋 Proposta de contrato anual com desconto")
-
-        if customer_data.get('number_customer_service_calls', 0) > 5:
-            recommendations.append("🔧 Melhoria no suporte técnico")
-
-        if customer_data.get('satisfaction_score', 10) < 5:
-            recommendations.append("📞 Contato para entender insatisfação")
-
-        if customer_data.get('late_payment_count', 0) > 0:
-            recommendations.append("💳 Revisão das opções de pagamento")
-
-        return recommendations
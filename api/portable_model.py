@@ -0,0 +1,213 @@
+"""
+Modelo Portátil de Churn
+========================
+
+Scorer em Python puro (sem NumPy nem scikit-learn) para o handler serverless.
+Lê o JSON gerado por export_portable.py, em que os códigos do LabelEncoder (e,
+nas árvores, o StandardScaler) já foram incorporados aos pesos:
+
+- Logistic Regression: z = intercepto + Σ peso * (valor - média) / escala + Σ peso[categoria],
+  probabilidade = 1 / (1 + e^-z).
+- Random Forest / Gradient Boosting: árvores em listas planas (feature, limiar,
+  filhos, valor) com os limiares já convertidos para a escala original; as
+  categorias viram o código do LabelEncoder antes de percorrer as árvores.
+
+Os valores numéricos são arredondados para float32 e normalizados com aritmética
+float32, como a matriz de treino (ChurnPredictor.preprocess_data) e o ChurnModel:
+as probabilidades batem com as do modelo original.
+"""
+
+import json
+import math
+import struct
+
+# Versão do formato do JSON gerado por export_portable.py
+PORTABLE_FORMAT_VERSION = 2
+
+_FLOAT32 = struct.Struct('<f')
+
+UNKNOWN_CATEGORY_POLICIES = ('error', 'most_frequent')
+
+
+def _sigmoid(z):
+    """Logística numericamente estável"""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    exp_z = math.exp(z)
+    return exp_z / (1.0 + exp_z)
+
+
+def _float32(value):
+    """Arredonda um float para o float32 mais próximo (OverflowError se não couber)"""
+    return _FLOAT32.unpack(_FLOAT32.pack(value))[0]
+
+
+def _number(col, value):
+    """Valor numérico de um campo em float32; ValueError se não for número (ex.: null, lista)"""
+    try:
+        return _float32(float(value))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Valor numérico inválido na coluna '{col}': {value!r}") from None
+
+
+def _lookup(table, col, value):
+    """Entrada da categoria na tabela (None se desconhecida); ValueError se não for hashable"""
+    try:
+        return table.get(value)
+    except TypeError:
+        raise ValueError(f"Categoria inválida na coluna '{col}': {value!r}") from None
+
+
+class _PortableModel:
+    """Metadados comuns a todos os modelos portáteis"""
+
+    def __init__(self, spec, unknown_category='error'):
+        if unknown_category not in UNKNOWN_CATEGORY_POLICIES:
+            raise ValueError(f"Política de categoria desconhecida inválida: {unknown_category}")
+
+        self.model_name = spec['model_name']
+        self.model_version = spec['model_version']
+        self.feature_columns = spec['feature_columns']
+        self.metrics = spec['metrics']
+        self.feature_importance = spec['feature_importance']
+        self.unknown_category = unknown_category
+
+    def model_info(self):
+        """Resumo do modelo servido (mesmas chaves de ChurnModel.model_info)"""
+        return {
+            'model_type': self.model_name,
+            'accuracy': self.metrics.get('accuracy'),
+            'auc': self.metrics.get('auc'),
+            'features_used': len(self.feature_columns),
+            'model_version': self.model_version,
+            'engine': 'portable'
+        }
+
+
+class PortableLogisticModel(_PortableModel):
+    """Regressão logística com normalização e codificação categórica dobradas nos pesos"""
+
+    def __init__(self, spec, unknown_category='error'):
+        super().__init__(spec, unknown_category=unknown_category)
+        self.intercept = spec['intercept']
+        # (coluna, peso, média, escala); média e escala já em float32
+        self.numeric_scaling = [(col, weight, mean, scale)
+                                for col, (weight, mean, scale) in spec['numeric_scaling'].items()]
+        # (coluna, {categoria: peso}, peso da categoria mais frequente)
+        self.categorical_weights = [
+            (col, weights, weights[spec['category_modes'][col]])
+            for col, weights in spec['categorical_weights'].items()
+        ]
+
+    def decision_function(self, record):
+        """Logit (z) de um cliente"""
+        try:
+            z = self.intercept
+            for col, weight, mean, scale in self.numeric_scaling:
+                # Operações de float32 feitas em float64 e arredondadas: mesmo resultado do float32
+                z += weight * _float32(_float32(_number(col, record[col]) - mean) / scale)
+            for col, weights, mode_weight in self.categorical_weights:
+                value = record[col]
+                weight = _lookup(weights, col, value)
+                if weight is None:
+                    if self.unknown_category != 'most_frequent':
+                        raise ValueError(f"Categoria desconhecida '{value}' na coluna '{col}'")
+                    weight = mode_weight
+                z += weight
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+        return z
+
+    def predict_churn_probability(self, record):
+        """Probabilidade de churn de um cliente (dict)"""
+        return _sigmoid(self.decision_function(record))
+
+
+class _PortableTreeModel(_PortableModel):
+    """Base dos ensembles de árvores: codificação do cliente e percurso das árvores"""
+
+    def __init__(self, spec, unknown_category='error'):
+        super().__init__(spec, unknown_category=unknown_category)
+        # (coluna, {categoria: código}, código da categoria mais frequente) ou (coluna, None, None)
+        self.slots = []
+        for col in self.feature_columns:
+            if col in spec['categories']:
+                table = {category: code for code, category in enumerate(spec['categories'][col])}
+                self.slots.append((col, table, table[spec['category_modes'][col]]))
+            else:
+                self.slots.append((col, None, None))
+        self.trees = [(tree['feature'], tree['threshold'], tree['left'], tree['right'], tree['value'])
+                      for tree in spec['trees']]
+
+    def encode(self, record):
+        """Valores do cliente na ordem de feature_columns (categorias viram códigos)"""
+        x = []
+        try:
+            for col, table, mode_code in self.slots:
+                value = record[col]
+                if table is None:
+                    x.append(_number(col, value))
+                    continue
+                code = _lookup(table, col, value)
+                if code is None:
+                    if self.unknown_category != 'most_frequent':
+                        raise ValueError(f"Categoria desconhecida '{value}' na coluna '{col}'")
+                    code = mode_code
+                x.append(code)
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+        return x
+
+    def leaf_values(self, record):
+        """Valor da folha alcançada em cada árvore"""
+        x = self.encode(record)
+        values = []
+        for feature, threshold, left, right, value in self.trees:
+            node = 0
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            values.append(value[node])
+        return values
+
+
+class PortableForestModel(_PortableTreeModel):
+    """Random Forest: média da probabilidade de churn das folhas"""
+
+    def predict_churn_probability(self, record):
+        values = self.leaf_values(record)
+        return sum(values) / len(values)
+
+
+class PortableBoostingModel(_PortableTreeModel):
+    """Gradient Boosting: logit inicial + soma das folhas (já multiplicadas pelo learning rate)"""
+
+    def __init__(self, spec, unknown_category='error'):
+        super().__init__(spec, unknown_category=unknown_category)
+        self.init_raw = spec['init_raw']
+
+    def predict_churn_probability(self, record):
+        return _sigmoid(self.init_raw + sum(self.leaf_values(record)))
+
+
+# Tipos de modelo portátil conhecidos (campo 'kind' do JSON)
+PORTABLE_MODELS = {
+    'logistic': PortableLogisticModel,
+    'forest': PortableForestModel,
+    'boosting': PortableBoostingModel
+}
+
+
+def load_portable_model(path, unknown_category='error'):
+    """Carrega o JSON gerado por export_portable.py"""
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+
+    if spec.get('format_version') != PORTABLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Formato de modelo portátil incompatível: {spec.get('format_version')} "
+            f"(esperado {PORTABLE_FORMAT_VERSION})"
+        )
+    if spec.get('kind') not in PORTABLE_MODELS:
+        raise ValueError(f"Tipo de modelo portátil desconhecido: {spec.get('kind')}")
+
+    return PORTABLE_MODELS[spec['kind']](spec, unknown_category=unknown_category)
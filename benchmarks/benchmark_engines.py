@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark das Engines de Modelo
+===============================
+
+Compara Random Forest, Gradient Boosting (exato), Hist Gradient Boosting e
+Logistic Regression em datasets sintéticos maiores, gerados por
+generate_dataset.py (clientes independentes, sem linhas repetidas entre
+treino e teste) e carregados com o schema tipado (ChurnPredictor.load_data).
+Para cada tamanho e modelo mede tempo de ajuste, latência de predição (lote
+e uma linha) e AUC.
+
+Uso:
+    CHURN_BENCH_SIZES=10000,100000 python benchmarks/benchmark_engines.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from churn_model import ChurnPredictor  # noqa: E402
+from generate_dataset import generate_dataset  # noqa: E402
+
+# Tamanhos dos datasets sintéticos e repetições da predição de uma linha
+SIZES = [int(size) for size in os.getenv("CHURN_BENCH_SIZES", "10000,100000").split(",")]
+SINGLE_ROW_REPEATS = int(os.getenv("CHURN_BENCH_SINGLE_ROW_REPEATS", "200"))
+SEED = int(os.getenv("CHURN_BENCH_SEED", "42"))
+
+
+def synthetic_dataset(n_rows, directory, seed=SEED):
+    """Gera n_rows clientes com generate_dataset e devolve o caminho do CSV"""
+    path = os.path.join(directory, f"churn_{n_rows}.csv")
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_dataset(path, n_records=n_rows, seed=seed)
+    return path
+
+
+def benchmark_model(name, model, predictor):
+    """Ajusta um modelo e mede ajuste, predição e AUC"""
+    X_train, X_test = predictor.model_inputs(name)
+    y_train = np.asarray(predictor.y_train)
+    y_test = np.asarray(predictor.y_test)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    batch_seconds = time.perf_counter() - start
+
+    timings = []
+    for i in range(min(SINGLE_ROW_REPEATS, len(X_test))):
+        row = X_test[i:i + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'fit_s': fit_seconds,
+        'batch_us_per_row': batch_seconds / len(X_test) * 1e6,
+        'single_row_ms': float(np.median(timings)) * 1000,
+        'auc': roc_auc_score(y_test, y_pred_proba)
+    }
+
+
+def main():
+    """Executa o benchmark para cada tamanho de dataset"""
+    print("⏱️  BENCHMARK DAS ENGINES DE MODELO")
+    print("=" * 50)
+
+    for n_rows in SIZES:
+        print(f"\n📊 Dataset sintético com {n_rows} linhas")
+        predictor = ChurnPredictor(boosting_engine='both')
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            predictor.load_data(synthetic_dataset(n_rows, tmp))
+            predictor.preprocess_data()
+        print(f"   {len(predictor.feature_columns)} features, treino {predictor.X_train.shape[0]}, "
+              f"teste {predictor.X_test.shape[0]}")
+
+        rows = []
+        for name, model in predictor.candidate_models().items():
+            result = benchmark_model(name, clone(model), predictor)
+            rows.append({'Modelo': name, **result})
+            print(f"   🤖 {name}: ajuste {result['fit_s']:.2f}s, lote {result['batch_us_per_row']:.1f} µs/linha, "
+                  f"uma linha {result['single_row_ms']:.2f} ms, AUC {result['auc']:.4f}")
+
+        print(pd.DataFrame(rows).sort_values('fit_s').to_string(index=False))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
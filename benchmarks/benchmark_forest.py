@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Floresta Compilada
+===============================
+
+Compara o predict_proba do Random Forest do scikit-learn com CompiledForest
+(tabelas planas de nós) no holdout salvo em churn_model.pkl: confere a
+paridade das probabilidades e mede a latência de uma linha e de lotes. O
+resultado define CompiledForest.MAX_BATCH_ROWS: lotes acima dele são servidos
+pelo scikit-learn. Falha (código de saída 1) se as probabilidades divergirem.
+
+Uso:
+    python benchmarks/benchmark_forest.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from churn_inference import ChurnModel, CompiledForest, is_compilable_forest  # noqa: E402
+
+MODEL_PATH = os.getenv("CHURN_MODEL_PATH", str(PROJECT_ROOT / "churn_model.pkl"))
+SINGLE_ROW_REPEATS = int(os.getenv("CHURN_BENCH_SINGLE_ROW_REPEATS", "200"))
+BATCH_SIZES = [int(size) for size in
+               os.getenv("CHURN_BENCH_BATCH_SIZES", "16,64,256,512,1024,16384").split(",")]
+
+
+def median_seconds(fn, repeats):
+    """Mediana do tempo de fn() em repeats execuções"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    """Executa o benchmark e retorna o código de saída"""
+    print("⏱️  BENCHMARK DA FLORESTA COMPILADA")
+    print("=" * 50)
+
+    churn_model = ChurnModel.load(MODEL_PATH)
+    model = churn_model.model
+    if not is_compilable_forest(model):
+        print(f"⚠️  Modelo salvo é {churn_model.model_name}, não uma floresta; nada a comparar")
+        return 0
+
+    forest = churn_model.compiled_forest or CompiledForest.from_sklearn(model)
+    X_holdout, _ = churn_model.holdout
+    X_holdout = np.asarray(X_holdout, dtype=np.float64)
+
+    try:
+        max_error = forest.check_parity(model, X_holdout)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Paridade com predict_proba em {len(X_holdout)} linhas (erro máximo {max_error:.1e})")
+    print(f"🌲 {len(forest.roots)} árvores, {len(forest.feature)} nós, profundidade máxima {forest.max_depth}")
+
+    row = X_holdout[:1]
+    sklearn_ms = median_seconds(lambda: model.predict_proba(row), SINGLE_ROW_REPEATS) * 1000
+    compiled_ms = median_seconds(lambda: forest.predict_proba(row), SINGLE_ROW_REPEATS) * 1000
+    print(f"\n📊 Uma linha: scikit-learn {sklearn_ms:.3f} ms, compilada {compiled_ms:.3f} ms "
+          f"({sklearn_ms / compiled_ms:.1f}x)")
+
+    for batch_size in BATCH_SIZES:
+        idx = np.arange(batch_size) % len(X_holdout)
+        batch = X_holdout[idx]
+        repeats = max(3, 2000 // batch_size)
+        sklearn_us = median_seconds(lambda: model.predict_proba(batch), repeats) / batch_size * 1e6
+        compiled_us = median_seconds(lambda: forest.predict_proba(batch), repeats) / batch_size * 1e6
+        served_by = "compilada" if batch_size <= forest.MAX_BATCH_ROWS else "scikit-learn"
+        print(f"📦 Lote de {batch_size}: scikit-learn {sklearn_us:.2f} µs/linha, "
+              f"compilada {compiled_us:.2f} µs/linha ({sklearn_us / compiled_us:.1f}x) → servido por {served_by}")
+
+    print(f"\nℹ️  ChurnModel usa a floresta compilada em lotes de até {forest.MAX_BATCH_ROWS} linhas "
+          f"(CompiledForest.MAX_BATCH_ROWS)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
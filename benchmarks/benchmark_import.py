@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Tempo de Import do Caminho de Serving
+==================================================
+
+Mede o import a frio (processo Python novo) de churn_inference e da API e
+falha (código de saída 1) se:
+
+- o import de churn_inference passar do orçamento (CHURN_IMPORT_BUDGET_MS);
+- o import de api.py passar do orçamento (CHURN_API_IMPORT_BUDGET_MS), que
+  inclui o FastAPI (~350 ms por si só);
+- o caminho de serving importar dependências pesadas de treino/relatórios.
+
+Uso:
+    python benchmarks/benchmark_import.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Orçamento para o import a frio do módulo de inferência (NumPy incluso)
+IMPORT_BUDGET_MS = float(os.getenv("CHURN_IMPORT_BUDGET_MS", "250"))
+# Orçamento para o import a frio de api.py (FastAPI + churn_inference + serving)
+API_IMPORT_BUDGET_MS = float(os.getenv("CHURN_API_IMPORT_BUDGET_MS", "750"))
+REPEATS = int(os.getenv("CHURN_IMPORT_REPEATS", "5"))
+
+# Módulos que o caminho de serving não pode carregar
+FORBIDDEN_MODULES = ["pandas", "matplotlib", "seaborn", "sklearn", "churn_model", "churn_reports"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"elapsed_ms": elapsed_ms, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure_import(module):
+    """Tempo (mínimo entre repetições) e módulos carregados ao importar module a frio"""
+    timings = []
+    modules = []
+    for _ in range(REPEATS):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["elapsed_ms"])
+        modules = result["modules"]
+    return min(timings), modules
+
+
+def heavy_modules(modules):
+    """Dependências proibidas presentes em sys.modules"""
+    return [name for name in FORBIDDEN_MODULES if name in modules]
+
+
+def main():
+    """Executa o benchmark e retorna o código de saída"""
+    print("⏱️  BENCHMARK DE IMPORT DO CAMINHO DE SERVING")
+    print("=" * 50)
+
+    failures = []
+
+    for module, budget_ms in (("churn_inference", IMPORT_BUDGET_MS), ("api", API_IMPORT_BUDGET_MS)):
+        try:
+            elapsed_ms, modules = measure_import(module)
+        except subprocess.CalledProcessError as e:
+            failures.append(f"não foi possível importar {module}: {e.stderr.strip().splitlines()[-1]}")
+            continue
+
+        print(f"📦 {module}: {elapsed_ms:.1f} ms (orçamento {budget_ms:.0f} ms)")
+        if elapsed_ms > budget_ms:
+            failures.append(f"import de {module} levou {elapsed_ms:.1f} ms (> {budget_ms:.0f} ms)")
+        loaded = heavy_modules(modules)
+        if loaded:
+            failures.append(f"{module} importou dependências pesadas: {loaded}")
+
+    if failures:
+        print("\n❌ Regressão no import do caminho de serving:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+
+    print("\n✅ Import do caminho de serving dentro do orçamento")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Carga Tipada do Dataset
+====================================
+
+Compara a leitura padrão do pandas (int64/float64 e strings como objetos) com
+a leitura pelo schema declarado em churn_schema.py (int8/int16/float32 e
+category): memória por registro, tempo de leitura e tempo de preprocess_data.
+Com `pyarrow` instalado, compara também a leitura tipada do mesmo dataset em
+CSV, Parquet e Arrow IPC, só com as colunas usadas no treino.
+
+Uso:
+    python benchmarks/benchmark_load.py
+    CHURN_DATA_PATH=dados/churn.csv python benchmarks/benchmark_load.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from churn_dataset import DatasetWriter, iter_dataset, read_dataset  # noqa: E402
+from churn_model import ChurnPredictor  # noqa: E402
+from churn_schema import memory_report  # noqa: E402
+
+DATA_PATH = os.getenv("CHURN_DATA_PATH", str(PROJECT_ROOT / "churn_dataset.csv"))
+
+
+def measure(typed):
+    """Leitura + pré-processamento com ou sem o schema; devolve (dados, s de leitura, s de preprocess)"""
+    predictor = ChurnPredictor()
+    # Silencia os prints do pipeline para a saída mostrar só a comparação
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        data = predictor.load_data(DATA_PATH, typed=typed)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predictor.preprocess_data()
+        preprocess_seconds = time.perf_counter() - start
+    return data, load_seconds, preprocess_seconds
+
+
+def compare_formats(columns, repeats=3):
+    """Leitura tipada, com projeção de colunas, do dataset em CSV, Parquet e Arrow IPC (mediana em s)"""
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {'csv': DATA_PATH}
+        for fmt, extension in (('parquet', '.parquet'), ('arrow', '.arrow')):
+            paths[fmt] = os.path.join(tmp, f"churn{extension}")
+            writer = DatasetWriter(paths[fmt])
+            for chunk in iter_dataset(DATA_PATH, typed=True):
+                writer.write(chunk)
+            writer.close()
+
+        for fmt, path in paths.items():
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                read_dataset(path, columns=columns, typed=True)
+                runs.append(time.perf_counter() - start)
+            timings[fmt] = sorted(runs)[len(runs) // 2]
+    return timings
+
+
+def main():
+    """Executa o benchmark e retorna o código de saída"""
+    print("⏱️  BENCHMARK DA CARGA TIPADA")
+    print("=" * 50)
+
+    if not os.path.exists(DATA_PATH):
+        print(f"❌ Dataset não encontrado: {DATA_PATH} (execute generate_dataset.py)")
+        return 1
+
+    default_data, default_load, default_preprocess = measure(typed=False)
+    typed_data, typed_load, typed_preprocess = measure(typed=True)
+    report = memory_report(default_data, typed_data)
+
+    print(f"📊 {report['rows']} registros de {DATA_PATH}")
+    print(f"{'':<12} {'MB':>10} {'bytes/reg':>10} {'leitura s':>10} {'preproc s':>10}")
+    print(f"{'padrão':<12} {report['before_mb']:>10.2f} {report['before_bytes_per_row']:>10.0f} "
+          f"{default_load:>10.3f} {default_preprocess:>10.3f}")
+    print(f"{'tipado':<12} {report['after_mb']:>10.2f} {report['after_bytes_per_row']:>10.0f} "
+          f"{typed_load:>10.3f} {typed_preprocess:>10.3f}")
+    print(f"💾 Redução de memória: {report['reduction']:.1f}x")
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("ℹ️  pyarrow não instalado: comparação CSV/Parquet/Arrow ignorada")
+        return 0
+
+    columns = [col for col in typed_data.columns if col != 'customer_id']
+    timings = compare_formats(columns)
+    print(f"\n📂 Leitura tipada de {len(columns)} colunas por formato:")
+    for fmt, seconds in timings.items():
+        print(f"   {fmt:<8} {seconds:.3f}s ({timings['csv'] / seconds:.1f}x vs CSV)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
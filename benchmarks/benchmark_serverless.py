@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Handler Serverless (api/index.py)
+==============================================
+
+Mede localmente, sem servidor HTTP, a latência de invocação do handler:
+
+- fria: processo Python novo que importa api/index.py (carrega o modelo
+  portátil e monta as respostas estáticas) e atende uma predição;
+- quente: invocações seguintes na mesma instância, por endpoint.
+
+Requer o modelo portátil (python export_portable.py) ou CHURN_PORTABLE_MODEL_PATH.
+
+Uso:
+    python benchmarks/benchmark_serverless.py
+"""
+
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+API_DIR = PROJECT_ROOT / "api"
+
+COLD_REPEATS = int(os.getenv("CHURN_BENCH_COLD_REPEATS", "5"))
+WARM_REPEATS = int(os.getenv("CHURN_BENCH_WARM_REPEATS", "1000"))
+MODEL_PATH = os.getenv("CHURN_PORTABLE_MODEL_PATH", str(API_DIR / "churn_model_portable.json"))
+
+
+class FakeSocket:
+    """Socket em memória: o handler lê a requisição crua e escreve a resposta em um buffer"""
+
+    def __init__(self, raw_request):
+        self.raw_request = raw_request
+        self.response = io.BytesIO()
+
+    def makefile(self, mode, *args, **kwargs):
+        return io.BytesIO(self.raw_request)
+
+    def sendall(self, data):
+        self.response.write(data)
+
+
+def raw_request(method, path, body=b''):
+    """Requisição HTTP/1.1 crua"""
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+    if method == 'POST':
+        head += f"Content-Length: {len(body)}\r\n"
+    return head.encode('ascii') + b"\r\n" + body
+
+
+def invoke(handler_class, request):
+    """Atende uma requisição com o handler e devolve a resposta crua"""
+    sock = FakeSocket(request)
+    handler_class.log_message = lambda *args: None
+    handler_class(sock, ('127.0.0.1', 0), None)
+    return sock.response.getvalue()
+
+
+COLD_PROBE = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {api_dir!r})
+sys.path.insert(0, {bench_dir!r})
+import index
+from benchmark_serverless import invoke
+response = invoke(index.handler, {request!r})
+elapsed_ms = (time.perf_counter() - start) * 1000
+assert response.startswith(b"HTTP/1.0 200") or response.startswith(b"HTTP/1.1 200"), response[:80]
+print(elapsed_ms)
+"""
+
+
+def measure_cold(request):
+    """Import do handler + primeira predição em um processo novo (mediana em ms)"""
+    probe = COLD_PROBE.format(api_dir=str(API_DIR), bench_dir=str(Path(__file__).resolve().parent),
+                              request=request)
+    env = dict(os.environ, CHURN_PORTABLE_MODEL_PATH=MODEL_PATH)
+    timings = []
+    for _ in range(COLD_REPEATS):
+        completed = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT, env=env,
+                                   capture_output=True, text=True, check=True)
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def measure_warm(handler_class, request):
+    """Invocações na instância já carregada (mediana em µs)"""
+    timings = []
+    for _ in range(WARM_REPEATS):
+        start = time.perf_counter()
+        invoke(handler_class, request)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    """Executa o benchmark e retorna o código de saída"""
+    print("⏱️  BENCHMARK DO HANDLER SERVERLESS")
+    print("=" * 50)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"❌ Modelo portátil não encontrado: {MODEL_PATH} (execute export_portable.py)")
+        return 1
+    os.environ["CHURN_PORTABLE_MODEL_PATH"] = MODEL_PATH
+    sys.path.insert(0, str(API_DIR))
+    import index
+
+    sample = json.dumps(index.SAMPLE_CUSTOMER).encode('utf-8')
+    predict = raw_request('POST', '/api/predict', sample)
+
+    print(f"🧊 Fria (import + 1ª predição): {measure_cold(predict):.1f} ms "
+          f"(mediana de {COLD_REPEATS} processos)")
+
+    requests = [
+        ('GET /api/health', raw_request('GET', '/api/health')),
+        ('GET /api/model/info', raw_request('GET', '/api/model/info')),
+        ('GET /api/features/importance', raw_request('GET', '/api/features/importance')),
+        ('POST /api/sample/customer', raw_request('POST', '/api/sample/customer')),
+        ('POST /api/predict', predict)
+    ]
+    for name, request in requests:
+        print(f"🔥 Quente {name}: {measure_warm(index.handler, request):.1f} µs")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
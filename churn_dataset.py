@@ -0,0 +1,178 @@
+"""
+Leitura e Escrita do Dataset de Churn
+=====================================
+
+Formatos aceitos, pela extensão do arquivo:
+
+- CSV (.csv): lido em blocos com os inteiros em int64 e reduzido aos tipos de
+  churn_schema após conferir o intervalo de cada coluna;
+- Parquet (.parquet): lido por row group, só com as colunas pedidas;
+- Arrow IPC (.arrow, .feather, .ipc): arquivo mapeado em memória e lido por
+  record batch, também só com as colunas pedidas.
+
+Parquet e Arrow requerem `pyarrow`. Nos dois, os tipos do schema são aplicados
+no Arrow, com cast seguro. Em todos os formatos, um valor que não cabe no tipo
+declarado gera ValueError em vez de ser truncado.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from churn_schema import CSV_READ_DTYPES, DATASET_DTYPES, apply_schema
+
+DATASET_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow'
+}
+
+# Registros por bloco na leitura em streaming
+DEFAULT_BATCH_SIZE = 100_000
+
+
+def dataset_format(path):
+    """Formato do arquivo pela extensão ('csv', 'parquet' ou 'arrow')"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DATASET_FORMATS:
+        raise ValueError(f"Formato de dataset não suportado: {path} (extensões: {', '.join(DATASET_FORMATS)})")
+    return DATASET_FORMATS[extension]
+
+
+def _typed_table(table):
+    """Aplica o schema a uma tabela Arrow: inteiros pequenos/float32 e strings como dicionário"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for i, name in enumerate(table.column_names):
+        dtype = DATASET_DTYPES.get(name)
+        if dtype is None:
+            continue
+        column = table.column(i)
+        if dtype == 'category':
+            if not pa.types.is_dictionary(column.type):
+                column = pc.dictionary_encode(column)
+        else:
+            column = column.cast(pa.from_numpy_dtype(dtype))
+        table = table.set_column(i, name, column)
+    return table
+
+
+def _plain_values(table):
+    """Troca as colunas dicionário (category do pandas) pelos valores simples"""
+    import pyarrow as pa
+
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+
+def _arrow_batches(path, fmt, columns, batch_size):
+    """Record batches de um arquivo Parquet ou Arrow IPC, só com as colunas pedidas"""
+    import pyarrow as pa
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        names = parquet_file.schema_arrow.names
+        selected = names if columns is None else [c for c in names if c in set(columns)]
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=selected)
+        return
+
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    names = reader.schema.names
+    selected = names if columns is None else [c for c in names if c in set(columns)]
+    for i in range(reader.num_record_batches):
+        yield reader.get_batch(i).select(selected)
+
+
+def iter_dataset(path, columns=None, typed=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Lê o dataset em blocos de DataFrame, só com `columns` (todas se None)"""
+    fmt = dataset_format(path)
+
+    if fmt == 'csv':
+        usecols = None if columns is None else (lambda c, wanted=set(columns): c in wanted)
+        chunks = pd.read_csv(path, usecols=usecols, dtype=CSV_READ_DTYPES if typed else None,
+                             chunksize=batch_size)
+        for chunk in chunks:
+            yield apply_schema(chunk) if typed else chunk
+        return
+
+    import pyarrow as pa
+
+    for batch in _arrow_batches(path, fmt, columns, batch_size):
+        table = pa.Table.from_batches([batch])
+        if typed:
+            table = _typed_table(table)
+        yield table.to_pandas()
+
+
+def concat_frames(frames):
+    """Concatena blocos preservando as colunas category (união das categorias de cada bloco)"""
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = {}
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            columns[col] = pd.api.types.union_categoricals([frame[col] for frame in frames])
+        else:
+            columns[col] = np.concatenate([frame[col].to_numpy() for frame in frames])
+    return pd.DataFrame(columns)
+
+
+def read_dataset(path, columns=None, typed=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Lê o dataset inteiro, só com `columns` (todas se None)"""
+    if dataset_format(path) == 'csv' and not typed:
+        usecols = None if columns is None else (lambda c, wanted=set(columns): c in wanted)
+        return pd.read_csv(path, usecols=usecols)
+    # Tipado: em blocos, para os inteiros só existirem em int64 um bloco por vez
+    return concat_frames(iter_dataset(path, columns=columns, typed=typed, batch_size=batch_size))
+
+
+class DatasetWriter:
+    """Grava blocos de DataFrame incrementalmente em CSV, Parquet ou Arrow IPC"""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = dataset_format(path)
+        self._writer = None
+        self._schema = None
+        self._first = True
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+            self._first = False
+            return
+
+        import pyarrow as pa
+
+        # Categorias gravadas como strings simples: cada bloco tem o próprio dicionário e o
+        # Arrow IPC só aceita um por coluna no arquivo; iter_dataset volta a codificar na leitura
+        table = _plain_values(pa.Table.from_pandas(df, preserve_index=False))
+        if self._writer is None:
+            # O schema do primeiro bloco vale para o arquivo inteiro
+            self._schema = table.schema
+            if self.format == 'parquet':
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, self._schema)
+        else:
+            table = table.cast(self._schema)
+        self._writer.write_table(table)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
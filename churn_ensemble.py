@@ -0,0 +1,47 @@
+"""
+Ensemble de Folds do Modelo de Churn
+====================================
+
+Modelo final opcional de ChurnPredictor(fold_ensemble=True): a média das
+probabilidades dos modelos já ajustados na validação cruzada, sem o ajuste
+extra no treino completo. Fica em um módulo próprio para que o pickle do
+artefato só o importe quando o modelo servido for um ensemble.
+"""
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+
+class FoldEnsemble(ClassifierMixin, BaseEstimator):
+    """Média do predict_proba dos modelos dos folds (todos com as mesmas classes)"""
+
+    def __init__(self, estimators):
+        self.estimators = estimators
+
+    def fit(self, X, y):
+        raise NotImplementedError("FoldEnsemble é montado com os modelos já ajustados nos folds")
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    @property
+    def classes_(self):
+        return self.estimators[0].classes_
+
+    @property
+    def n_features_in_(self):
+        return self.estimators[0].n_features_in_
+
+    @property
+    def feature_importances_(self):
+        """Importância média dos folds (só para modelos de árvores)"""
+        return np.mean([estimator.feature_importances_ for estimator in self.estimators], axis=0)
+
+    def predict_proba(self, X):
+        proba = self.estimators[0].predict_proba(X)
+        for estimator in self.estimators[1:]:
+            proba = proba + estimator.predict_proba(X)
+        return proba / len(self.estimators)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,427 @@
+"""
+Inferência do Modelo de Churn
+=============================
+
+Módulo enxuto usado pela API, pelos workers e pela pontuação em lote. Só
+importa NumPy ao ser carregado: pandas, matplotlib e o pipeline de treino do
+scikit-learn ficam em churn_model.py. Ao carregar o artefato, o pickle
+importa apenas o módulo do estimador servido (ex.: sklearn.ensemble).
+"""
+
+import hashlib
+import json
+import pickle
+
+import numpy as np
+
+# Versão do formato do artefato salvo por ChurnPredictor.save
+ARTIFACT_FORMAT_VERSION = 8
+DEFAULT_MODEL_PATH = 'churn_model.pkl'
+# Campos gravados depois do cabeçalho do artefato (o estimador e as matrizes): quem só
+# precisa do schema (ex.: score.py) lê o cabeçalho sem importar o módulo do estimador
+ARTIFACT_PAYLOAD_KEYS = ('model', 'compiled_forest', 'holdout')
+
+# Políticas para categorias não vistas no treino
+UNKNOWN_CATEGORY_POLICIES = ('error', 'most_frequent')
+
+# dtype da matriz de features do treino (ChurnPredictor.preprocess_data): a inferência
+# arredonda as entradas para ele antes de normalizar, como o treino fez
+FEATURE_DTYPE = np.float32
+
+
+def scale_features(X, mean, scale):
+    """Normaliza X in-place no dtype de X (mesma aritmética de StandardScaler.transform)"""
+    X -= np.asarray(mean, dtype=X.dtype)
+    X /= np.asarray(scale, dtype=X.dtype)
+    return X
+
+
+def compute_schema_hash(feature_columns, categories):
+    """Hash do schema de entrada (features e categorias conhecidas)"""
+    schema = {
+        'feature_columns': list(feature_columns),
+        'categories': {col: [str(c) for c in classes] for col, classes in sorted(categories.items())}
+    }
+    payload = json.dumps(schema, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def write_artifact(artifact, f):
+    """Grava o artefato em dois pickles: cabeçalho (schema e metadados) e ARTIFACT_PAYLOAD_KEYS"""
+    header = {key: value for key, value in artifact.items() if key not in ARTIFACT_PAYLOAD_KEYS}
+    payload = {key: artifact[key] for key in ARTIFACT_PAYLOAD_KEYS}
+    pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_header(f, path):
+    """Lê e valida o cabeçalho (formato e schema) de um artefato aberto"""
+    header = pickle.load(f)
+
+    if header.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Formato de artefato incompatível: {header.get('format_version')} "
+            f"(esperado {ARTIFACT_FORMAT_VERSION})"
+        )
+
+    if compute_schema_hash(header['feature_columns'], header['categories']) != header['schema_hash']:
+        raise ValueError(f"Schema do artefato {path} não confere com o hash salvo")
+
+    return header
+
+
+def read_artifact_header(path=DEFAULT_MODEL_PATH):
+    """Só o cabeçalho do artefato (features, categorias, métricas), sem carregar o estimador"""
+    with open(path, 'rb') as f:
+        return _read_header(f, path)
+
+
+def read_artifact(path=DEFAULT_MODEL_PATH):
+    """Lê um artefato salvo por ChurnPredictor.save e valida formato e schema"""
+    with open(path, 'rb') as f:
+        artifact = _read_header(f, path)
+        artifact.update(pickle.load(f))
+    return artifact
+
+
+class CategoricalEncoder:
+    """Codificador compilado: tabela {coluna: {categoria: código}} escrita direto em linhas float64"""
+
+    def __init__(self, feature_columns, categories, category_modes=None, unknown='error'):
+        if unknown not in UNKNOWN_CATEGORY_POLICIES:
+            raise ValueError(f"Política de categoria desconhecida inválida: {unknown}")
+
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        self.unknown = unknown
+        self.category_modes = dict(category_modes or {})
+        self.tables = {
+            col: {category: code for code, category in enumerate(classes)}
+            for col, classes in categories.items()
+            if col in self.feature_columns
+        }
+
+        # Posições fixas de cada coluna na linha de saída
+        self.numeric_slots = [(j, col) for j, col in enumerate(self.feature_columns)
+                              if col not in self.tables]
+        self.categorical_slots = [(j, col, self.tables[col]) for j, col in enumerate(self.feature_columns)
+                                  if col in self.tables]
+
+        if unknown == 'most_frequent':
+            missing = [col for col in self.tables if col not in self.category_modes]
+            if missing:
+                raise ValueError(f"Categoria mais frequente não disponível para: {missing}")
+
+    def _unknown_code(self, col, value):
+        """Código usado para uma categoria não vista no treino"""
+        if self.unknown == 'most_frequent':
+            return self.category_modes[col]
+        raise ValueError(f"Categoria desconhecida '{value}' na coluna '{col}'")
+
+    def encode(self, record, out=None):
+        """Codifica um cliente (dict) em uma linha float64 na ordem de feature_columns"""
+        if out is None:
+            out = np.empty(self.n_features, dtype=np.float64)
+
+        try:
+            for j, col in self.numeric_slots:
+                out[j] = record[col]
+            for j, col, table in self.categorical_slots:
+                value = record[col]
+                code = table.get(value)
+                out[j] = self._unknown_code(col, value) if code is None else code
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+
+        return out
+
+    def encode_batch(self, records, out=None):
+        """Codifica uma lista de clientes coluna a coluna em uma matriz float64"""
+        if out is None:
+            out = np.empty((len(records), self.n_features), dtype=np.float64)
+
+        try:
+            for j, col in self.numeric_slots:
+                out[:, j] = np.asarray([record[col] for record in records], dtype=np.float64)
+            for j, col, table in self.categorical_slots:
+                values = [record[col] for record in records]
+                codes = np.fromiter((table.get(value, -1) for value in values),
+                                    dtype=np.float64, count=len(values))
+                for i in np.flatnonzero(codes < 0):
+                    codes[i] = self._unknown_code(col, values[i])
+                out[:, j] = codes
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+
+        return out
+
+    def encode_columns(self, columns, out=None):
+        """Codifica dados colunares (DataFrame ou dict de arrays) em uma matriz float64"""
+        n_rows = len(columns[self.feature_columns[0]]) if self.feature_columns else 0
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+
+        try:
+            for j, col in self.numeric_slots:
+                out[:, j] = np.asarray(columns[col], dtype=np.float64)
+            for j, col, table in self.categorical_slots:
+                # Consultar a tabela uma vez por valor distinto, não por linha
+                # (valores ausentes viram 'nan' e seguem a política de categoria desconhecida)
+                values = np.asarray(columns[col], dtype=object).astype(str)
+                uniques, inverse = np.unique(values, return_inverse=True)
+                codes = np.array([table.get(value, -1) for value in uniques.tolist()], dtype=np.float64)
+                for k in np.flatnonzero(codes < 0):
+                    codes[k] = self._unknown_code(col, uniques[k])
+                out[:, j] = codes[inverse.reshape(-1)]
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}") from None
+
+        return out
+
+
+class CompiledForest:
+    """Floresta de árvores exportada para tabelas planas de nós (feature, limiar, filhos, valor)
+
+    Todas as árvores ficam em arrays NumPy contíguos; a predição percorre todas as
+    árvores de todas as linhas ao mesmo tempo, um nível por iteração, sem despacho
+    Python por árvore. As folhas apontam para si mesmas, então linhas que chegam
+    cedo a uma folha simplesmente permanecem nela até a profundidade máxima.
+    """
+
+    # Linhas por bloco na avaliação (limita a matriz de nós linhas x árvores)
+    CHUNK_ROWS = 4096
+
+    # Maior lote servido pela floresta compilada. Ela elimina o custo fixo por chamada
+    # do scikit-learn (~40x mais rápida em 1 linha, ~4x em 64), mas percorre todos os
+    # níveis até a profundidade máxima em todas as árvores; a partir de ~300 linhas o
+    # predict_proba do scikit-learn fica mais rápido (0.6x em 512, 0.1x em 4096; ver
+    # benchmarks/benchmark_forest.py). Lotes maiores vão para o estimador original.
+    MAX_BATCH_ROWS = 256
+
+    def __init__(self, feature, threshold, left, right, leaf_value, roots, max_depth):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exporta um RandomForestClassifier/ExtraTreesClassifier binário já treinado"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            nodes = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Folhas apontam para si mesmas; índices deslocados para o array global
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+            # Probabilidade da classe positiva em cada nó (como DecisionTreeClassifier.predict_proba)
+            counts = tree.value[:, 0, :]
+            values.append(counts[:, 1] / counts.sum(axis=1))
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(values), roots, max_depth)
+
+    def predict_proba(self, X):
+        """Probabilidades (n, 2) no mesmo formato de predict_proba do scikit-learn"""
+        # Mesma comparação das árvores do scikit-learn: X em float32 contra limiar float64
+        X = np.asarray(X, dtype=np.float32)
+        positive = np.empty(len(X), dtype=np.float64)
+
+        for start in range(0, len(X), self.CHUNK_ROWS):
+            block = X[start:start + self.CHUNK_ROWS]
+            rows = np.arange(len(block))[:, None]
+            nodes = np.broadcast_to(self.roots, (len(block), len(self.roots)))
+            for _ in range(self.max_depth):
+                go_left = block[rows, self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            positive[start:start + len(block)] = self.leaf_value[nodes].mean(axis=1)
+
+        return np.column_stack((1.0 - positive, positive))
+
+    def to_arrays(self):
+        """Tabelas de nós como dict de arrays (formato salvo no artefato)"""
+        return {
+            'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+            'right': self.right, 'leaf_value': self.leaf_value, 'roots': self.roots,
+            'max_depth': self.max_depth
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Recria a floresta a partir de to_arrays()"""
+        return cls(**arrays)
+
+    def check_parity(self, model, X, atol=1e-9):
+        """Confere as probabilidades com model.predict_proba em X; levanta ValueError se divergirem"""
+        expected = model.predict_proba(X)[:, 1]
+        actual = self.predict_proba(X)[:, 1]
+        max_error = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+        if max_error > atol:
+            raise ValueError(f"Floresta compilada diverge do modelo original (erro máximo {max_error:.2e})")
+        return max_error
+
+
+def is_compilable_forest(model):
+    """Floresta binária de árvores de classificação que CompiledForest sabe exportar"""
+    return (type(model).__name__ in ('RandomForestClassifier', 'ExtraTreesClassifier')
+            and len(getattr(model, 'classes_', ())) == 2)
+
+
+class ChurnModel:
+    """Modelo de churn pronto para inferência: codificação, normalização e predição"""
+
+    def __init__(self, model, model_name, feature_columns, categories, scaler_mean, scaler_scale,
+                 category_modes=None, unknown_category='error', metrics=None, model_version=None,
+                 feature_importance=None, permutation_feature_importance=None, holdout=None,
+                 scaled_input=True, compiled_forest=None):
+        self.model = model
+        self.model_name = model_name
+        self.feature_columns = list(feature_columns)
+        self.categories = {col: list(classes) for col, classes in categories.items()}
+        self.category_modes = dict(category_modes or {})
+        self.metrics = metrics or {}
+        self.model_version = model_version
+        self.feature_importance = feature_importance or []
+        self.permutation_feature_importance = permutation_feature_importance
+        self.holdout = holdout
+        # Motor de inferência compacto (CompiledForest) usado no lugar de model.predict_proba
+        self.compiled_forest = compiled_forest
+
+        self.encoder = CategoricalEncoder(
+            self.feature_columns, self.categories,
+            category_modes=self.category_modes, unknown=unknown_category
+        )
+
+        # Parâmetros do StandardScaler aplicados diretamente, sem DataFrame
+        # (scaled_input=False: o modelo usa os códigos categóricos crus, ex.: Hist Gradient Boosting)
+        self.scaled_input = scaled_input
+        self.scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+        self._scaler_mean = self.scaler_mean.astype(FEATURE_DTYPE)
+        self._scaler_scale = self.scaler_scale.astype(FEATURE_DTYPE)
+
+    @classmethod
+    def from_artifact(cls, artifact, unknown_category='error'):
+        """Cria o modelo a partir de um artefato já lido"""
+        return cls(
+            model=artifact['model'],
+            model_name=artifact['model_name'],
+            feature_columns=artifact['feature_columns'],
+            categories=artifact['categories'],
+            scaler_mean=artifact['scaler']['mean'],
+            scaler_scale=artifact['scaler']['scale'],
+            category_modes=artifact['category_modes'],
+            unknown_category=unknown_category,
+            metrics=artifact['metrics'],
+            model_version=artifact['model_version'],
+            feature_importance=artifact['feature_importance'],
+            permutation_feature_importance=artifact['permutation_feature_importance'],
+            holdout=artifact['holdout'],
+            scaled_input=artifact['scaled_input'],
+            compiled_forest=(CompiledForest.from_arrays(artifact['compiled_forest'])
+                             if artifact['compiled_forest'] is not None else None)
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH, unknown_category='error'):
+        """Carrega um artefato salvo por ChurnPredictor.save, sem retreinar"""
+        return cls.from_artifact(read_artifact(path), unknown_category=unknown_category)
+
+    def schema_hash(self):
+        """Hash do schema de entrada (features e categorias conhecidas)"""
+        return compute_schema_hash(self.feature_columns, self.categories)
+
+    def _scale(self, X):
+        """Converte X para FEATURE_DTYPE e normaliza, se o modelo foi treinado com dados normalizados
+
+        Mesma sequência de arredondamentos do treino (valores em float32, média e escala em
+        float32), para as probabilidades servidas baterem com as avaliadas.
+        """
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
+        if self.scaled_input:
+            scale_features(X, self._scaler_mean, self._scaler_scale)
+        return X
+
+    def preprocess_batch(self, records):
+        """Preprocessa uma lista de clientes em uma matriz NumPy pronta para o modelo"""
+        return self._scale(self.encoder.encode_batch(records))
+
+    def preprocess_single_customer(self, customer_data):
+        """Preprocessa dados de um único cliente em um vetor (1, n_features)"""
+        return self._scale(self.encoder.encode(customer_data)).reshape(1, -1)
+
+    def _predict_proba(self, X):
+        """predict_proba pelo motor compilado (lotes pequenos), quando disponível, ou pelo estimador"""
+        if self.compiled_forest is not None and len(X) <= self.compiled_forest.MAX_BATCH_ROWS:
+            return self.compiled_forest.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def predict_churn_probability(self, customer_data):
+        """Prediz a probabilidade de churn para um cliente"""
+        processed_data = self.preprocess_single_customer(customer_data)
+        return float(self._predict_proba(processed_data)[0, 1])
+
+    def predict_proba_batch(self, records):
+        """Prediz a probabilidade de churn para vários clientes em uma única chamada"""
+        if len(records) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self._predict_proba(self.preprocess_batch(records))[:, 1]
+
+    def predict_proba_columns(self, columns):
+        """Prediz a probabilidade de churn para dados colunares (ex.: um DataFrame)"""
+        X = self.encoder.encode_columns(columns)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self._predict_proba(self._scale(X))[:, 1]
+
+    def compute_permutation_importance(self, n_repeats=5, random_state=42):
+        """Importância por permutação no holdout salvo com o modelo (AUC)"""
+        if self.holdout is None:
+            raise ValueError("Artefato sem amostra de holdout para importância por permutação")
+
+        from sklearn.inspection import permutation_importance
+
+        X_holdout, y_holdout = self.holdout
+        result = permutation_importance(
+            self.model, X_holdout, y_holdout,
+            scoring='roc_auc', n_repeats=n_repeats, random_state=random_state
+        )
+
+        importances = [
+            {'feature': feature, 'importance': float(mean), 'std': float(std)}
+            for feature, mean, std in zip(self.feature_columns,
+                                          result.importances_mean,
+                                          result.importances_std)
+        ]
+        importances.sort(key=lambda x: x['importance'], reverse=True)
+
+        self.permutation_feature_importance = importances
+        return importances
+
+    def model_info(self):
+        """Resumo do modelo servido (nome, métricas e versão)"""
+        metrics = self.metrics.get(self.model_name, {})
+        return {
+            'model_type': self.model_name,
+            'accuracy': metrics.get('accuracy'),
+            'auc': metrics.get('auc'),
+            'features_used': len(self.feature_columns),
+            'model_version': self.model_version,
+            'engine': 'compiled_forest' if self.compiled_forest is not None else 'sklearn'
+        }
@@ -1,39 +1,182 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
+from sklearn.base import clone
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, accuracy_score
 from sklearn.feature_selection import SelectKBest, f_classif
+from joblib import Parallel, delayed
+import joblib
+import os
+import time
+import pickle
+import hashlib
+import shutil
+import tracemalloc
+from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuração para exibir gráficos
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+from churn_inference import (ARTIFACT_FORMAT_VERSION, DEFAULT_MODEL_PATH, ChurnModel, CompiledForest,
+                             compute_schema_hash, is_compilable_forest, read_artifact, scale_features,
+                             write_artifact)
+from churn_dataset import dataset_format, read_dataset
+from churn_ensemble import FoldEnsemble
+from churn_schema import memory_usage_mb
+
+# Número de folds da validação cruzada em train_models
+N_CV_FOLDS = 5
+
+# Máximo de linhas do holdout salvo no artefato (amostra estratificada do conjunto de teste)
+HOLDOUT_SAMPLE_SIZE = 2000
+
+# Engines de gradient boosting: 'exact' (GradientBoostingClassifier),
+# 'hist' (HistGradientBoostingClassifier) ou 'both' (compara os dois)
+BOOSTING_ENGINES = ('exact', 'hist', 'both')
+
+# Modelos treinados sobre os códigos categóricos sem normalização
+UNSCALED_MODELS = ('Hist Gradient Boosting',)
+
+# Versão do cache de features (cache_dir/features); incrementar ao mudar preprocess_data
+FEATURE_CACHE_VERSION = 4
+# Matrizes (ordem treino + teste) salvas como .npy e reabertas com memmap; X_raw é opcional
+FEATURE_CACHE_ARRAYS = ('X_scaled', 'X_raw', 'y')
+
+def _fit_full_model(name, model, X_train, y_train, X_test, y_test):
+    """Treina um modelo no treino completo e avalia no teste (executado em um worker)"""
+    start = time.time()
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    return {
+        'name': name,
+        'kind': 'full',
+        'model': model,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'auc': roc_auc_score(y_test, y_pred_proba),
+        'y_pred': y_pred,
+        'y_pred_proba': y_pred_proba,
+        'start': start,
+        'end': time.time()
+    }
+
+def _fit_cv_fold(name, fold, model, X, y, train_idx, val_idx, keep_model=False):
+    """Treina e avalia um fold da validação cruzada (executado em um worker)
+
+    keep_model=True devolve também o modelo ajustado (membro do ensemble de folds).
+    """
+    start = time.time()
+    model.fit(X[train_idx], y[train_idx])
+    oof_proba = model.predict_proba(X[val_idx])[:, 1]
+    return {
+        'name': name,
+        'kind': 'fold',
+        'fold': fold,
+        'model': model if keep_model else None,
+        'score': model.score(X[val_idx], y[val_idx]),
+        'oof_proba': oof_proba,
+        'start': start,
+        'end': time.time()
+    }
+
+def _evaluate_fold_ensemble(name, fold_outputs, X_test, y_test):
+    """Monta o ensemble dos modelos dos folds e o avalia no teste (sem ajuste no treino completo)"""
+    start = time.time()
+    model = FoldEnsemble([output['model'] for output in fold_outputs])
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = model.classes_[(y_pred_proba > 0.5).astype(int)]
+    return {
+        'name': name,
+        'kind': 'full',
+        'model': model,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'auc': roc_auc_score(y_test, y_pred_proba),
+        'y_pred': y_pred,
+        'y_pred_proba': y_pred_proba,
+        'start': start,
+        'end': time.time()
+    }
 
 class ChurnPredictor:
-    def __init__(self):
+    def __init__(self, unknown_category='error', n_jobs=-1, cache_dir=None, render_plots=False,
+                 boosting_engine='exact', fold_ensemble=False):
+        if boosting_engine not in BOOSTING_ENGINES:
+            raise ValueError(f"Engine de boosting inválida: {boosting_engine} (opções: {BOOSTING_ENGINES})")
+
         self.model = None
+        self.data = None
+        # Arquivo de origem dos dados (caminho, colunas, leitura tipada), definido em load_data
+        self.data_source = None
+        self.boosting_engine = boosting_engine
+        # Modelo final = média dos modelos dos folds (sem o ajuste extra no treino completo)
+        self.fold_ensemble = fold_ensemble
+        # Gráficos são opcionais: API e pontuação em lote rodam sem matplotlib
+        self.render_plots = render_plots
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.best_model = None
+        self.best_model_name = None
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.feature_columns = []
+        # Máscara das features categóricas (suporte nativo do Hist Gradient Boosting)
+        self.categorical_mask = None
         self.target_column = 'churn'
+        self.results = {}
+        self.metrics = {}
+        self.model_version = None
+        self.feature_importance = []
+        self.permutation_feature_importance = None
+        self.category_modes = {}
+        self.unknown_category = unknown_category
+        # Melhores hiperparâmetros por modelo (churn_tuning), aplicados em candidate_models
+        self.tuned_params = {}
+        self.tuning_summary = None
+        # Modelo de inferência (churn_inference.ChurnModel) montado após evaluate_models
+        self.inference = None
+
+    def load_data(self, file_path, typed=True, columns=None):
+        """Carrega os dados (CSV, Parquet ou Arrow IPC), com os tipos de churn_schema se typed
+
+        Só as colunas em `columns` são lidas; se omitido e as features já forem conhecidas
+        (artefato carregado), lê apenas as features e o target. Com cache_dir, se a matriz de
+        features deste arquivo já estiver no cache, a leitura é adiada (self.data fica None)
+        e só acontece se alguém precisar do DataFrame (explore_data, cache ausente).
+        """
+        dataset_format(file_path)
+        if columns is None and self.feature_columns:
+            columns = self.feature_columns + [self.target_column]
+        self.data_source = (file_path, None if columns is None else list(columns), typed)
+        self.data = None
+        if self.cache_dir is not None and self._has_cached_features():
+            print(f"♻️  Matriz de features de {file_path} já está no cache; leitura dos dados adiada")
+            return None
+        return self._read_data()
 
-    def load_data(self, file_path):
-        """Carrega os dados do CSV"""
+    def _read_data(self):
+        """Lê o arquivo de self.data_source (tipado, com fallback para os tipos padrão)"""
+        file_path, columns, typed = self.data_source
         print("📊 Carregando dados...")
-        self.data = pd.read_csv(file_path)
+        if typed:
+            try:
+                self.data = read_dataset(file_path, columns=columns, typed=True)
+            except (ValueError, OverflowError) as e:
+                print(f"⚠️  Dados fora do schema declarado ({e}); usando os tipos padrão")
+        if self.data is None:
+            self.data = read_dataset(file_path, columns=columns, typed=False)
         print(f"✅ Dados carregados: {self.data.shape[0]} registros e {self.data.shape[1]} colunas")
+        memory_mb = memory_usage_mb(self.data)
+        print(f"💾 Memória: {memory_mb:.1f} MB ({memory_mb * 1024 ** 2 / max(len(self.data), 1):.0f} bytes/registro)")
         return self.data
 
     def explore_data(self):
         """Explora os dados e mostra estatísticas básicas"""
         print("\n🔍 EXPLORAÇÃO DOS DADOS")
         print("=" * 50)
+        if self.data is None:
+            self._read_data()
 
         # Informações básicas
         print(f"📈 Formato dos dados: {self.data.shape}")
@@ -60,136 +203,423 @@ class ChurnPredictor:
         print("\n🎯 Distribuição do target (churn):")
         print(self.data['churn'].value_counts())
 
-    def preprocess_data(self):
-        """Preprocessa os dados para o modelo"""
+    def preprocess_data(self, track_memory=False):
+        """Preprocessa os dados para o modelo
+
+        A matriz final (float32) é alocada uma única vez, já na ordem treino + teste:
+        cada coluna é codificada e gravada direto no buffer, e a normalização é feita
+        no próprio buffer. X_train/X_test são fatias (views) dessa matriz. Retorna
+        (X, y) nessa ordem. Com track_memory, mede o pico de memória com tracemalloc
+        (diagnóstico: o tracemalloc deixa o pré-processamento várias vezes mais lento).
+        """
         print("\n🔧 PRÉ-PROCESSAMENTO DOS DADOS")
         print("=" * 50)
 
-        # Criar cópia dos dados
-        df = self.data.copy()
+        # Códigos sem normalização só quando algum modelo de UNSCALED_MODELS for treinado
+        keep_raw = self.boosting_engine in ('hist', 'both')
+
+        # Mesmos dados e configuração: reabre as matrizes do cache sem reprocessar
+        feature_cache_key = self._feature_cache_key(keep_raw) if self.cache_dir is not None else None
+        if feature_cache_key is not None:
+            cached = self._load_cached_features(feature_cache_key)
+            if cached is not None:
+                self._set_splits(cached['X_scaled'], cached.get('X_raw'), cached['y'], cached['n_train'])
+                print(f"♻️  Matriz de features reaproveitada do cache ({feature_cache_key[:12]})")
+                print(f"   - Treino: {self.X_train.shape}")
+                print(f"   - Teste: {self.X_test.shape}")
+                return cached['X_scaled'], cached['y']
+
+        started_tracing = track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if track_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        if self.data is None:
+            self._read_data()
+        data = self.data
 
         # Converter target para binário
-        df['churn'] = df['churn'].map({'Yes': 1, 'No': 0})
-
-        # Separar features numéricas e categóricas
-        numeric_features = df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_features = df.select_dtypes(include=['object']).columns.tolist()
+        y = data[self.target_column].map({'Yes': 1, 'No': 0}).to_numpy(dtype=np.int8)
 
-        # Remover target das features
-        if 'churn' in numeric_features:
-            numeric_features.remove('churn')
-        if 'customer_id' in numeric_features:
-            numeric_features.remove('customer_id')
+        # Separar features numéricas e categóricas (sem copiar o DataFrame)
+        excluded = (self.target_column, 'customer_id')
+        numeric_features = [col for col, dtype in data.dtypes.items()
+                            if col not in excluded and pd.api.types.is_numeric_dtype(dtype)]
+        # Texto pode vir como object, str (padrão do pandas 3) ou category (leitura tipada)
+        categorical_features = [col for col, dtype in data.dtypes.items()
+                                if col not in excluded and (pd.api.types.is_string_dtype(dtype)
+                                                            or isinstance(dtype, pd.CategoricalDtype))]
 
         print(f"📊 Features numéricas: {len(numeric_features)}")
         print(f"📝 Features categóricas: {len(categorical_features)}")
 
-        # Codificar features categóricas
-        for col in categorical_features:
-            if col != 'customer_id':
-                le = LabelEncoder()
-                df[col] = le.fit_transform(df[col])
-                self.label_encoders[col] = le
-
         # Selecionar features para o modelo
-        self.feature_columns = numeric_features + [col for col in categorical_features if col != 'customer_id']
+        self.feature_columns = numeric_features + categorical_features
+        self.categorical_mask = np.array([col in categorical_features for col in self.feature_columns])
 
-        # Separar features e target
-        X = df[self.feature_columns]
-        y = df[self.target_column]
-
-        # Normalizar features numéricas
-        X_scaled = self.scaler.fit_transform(X)
-
-        # Dividir em treino e teste
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
-            X_scaled, y, test_size=0.2, random_state=42, stratify=y
+        # Dividir em treino e teste antes de montar a matriz: as linhas já entram na ordem final
+        train_idx, test_idx = train_test_split(
+            np.arange(len(data)), test_size=0.2, random_state=42, stratify=y
         )
+        order = np.concatenate([train_idx, test_idx])
+
+        # Matriz final alocada uma vez; cada coluna é codificada e escrita direto nela, e a
+        # média/variância do StandardScaler é calculada coluna a coluna (sem cópias da matriz)
+        n_features = len(self.feature_columns)
+        X = np.empty((len(data), n_features), dtype=np.float32)
+        mean = np.empty(n_features, dtype=np.float64)
+        var = np.empty(n_features, dtype=np.float64)
+        for j, col in enumerate(self.feature_columns):
+            column = data[col]
+            if col in numeric_features:
+                X[:, j] = column.to_numpy()[order]
+                mean[j], var[j] = X[:, j].mean(dtype=np.float64), X[:, j].var(dtype=np.float64)
+                continue
+
+            # Codificar feature categórica (um valor ausente viraria o código -1 do pandas,
+            # que indexaria a última categoria)
+            missing = int(column.isna().sum())
+            if missing:
+                raise ValueError(f"Coluna categórica '{col}' com {missing} valores ausentes; "
+                                 f"preencha ou remova esses registros antes do treino")
+            le = LabelEncoder()
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Colunas category: codifica só as categorias e reindexa pelos códigos do pandas
+                le.fit(column.cat.categories)
+                codes = le.transform(column.cat.categories).astype(np.int32)[column.cat.codes.to_numpy()]
+            else:
+                codes = le.fit_transform(column.to_numpy())
+            self.label_encoders[col] = le
+            self.category_modes[col] = int(np.bincount(codes).argmax())
+            X[:, j] = codes[order]
+            mean[j], var[j] = X[:, j].mean(dtype=np.float64), X[:, j].var(dtype=np.float64)
+
+        # Cópia sem normalização apenas para os modelos de UNSCALED_MODELS
+        X_raw = X.copy() if keep_raw else None
+
+        # Normalizar features no próprio buffer (StandardScaler.fit alocaria ~2x a matriz)
+        self._set_scaler(mean, var, len(X))
+        scale_features(X, self.scaler.mean_, self.scaler.scale_)
+
+        y = y[order]
+        self._set_splits(X, X_raw, y, len(train_idx))
 
         print(f"✅ Dados pré-processados:")
         print(f"   - Treino: {self.X_train.shape}")
         print(f"   - Teste: {self.X_test.shape}")
 
-        return X_scaled, y
+        if track_memory:
+            peak_mb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024 ** 2
+            if started_tracing:
+                tracemalloc.stop()
+            matrix_mb = (X.nbytes + (X_raw.nbytes if X_raw is not None else 0)) / 1024 ** 2
+            print(f"💾 Pico de memória do pré-processamento: {peak_mb:.1f} MB (matrizes finais: {matrix_mb:.1f} MB)")
+
+        if feature_cache_key is not None:
+            self._store_cached_features(feature_cache_key, {'X_scaled': X, 'X_raw': X_raw, 'y': y},
+                                        len(train_idx))
+
+        return X, y
+
+    def _set_scaler(self, mean, var, n_samples):
+        """Ajusta o StandardScaler com média e variância já calculadas por coluna"""
+        scale = np.sqrt(var)
+        # Variância (quase) zero: escala 1, como o StandardScaler
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+        self.scaler.mean_ = mean
+        self.scaler.var_ = var
+        self.scaler.scale_ = scale
+        self.scaler.n_samples_seen_ = n_samples
+        self.scaler.n_features_in_ = len(mean)
+
+    def _set_splits(self, X, X_raw, y, n_train):
+        """Treino e teste como fatias das matrizes na ordem treino + teste"""
+        self.X_train, self.X_test = X[:n_train], X[n_train:]
+        if X_raw is not None:
+            self.X_train_raw, self.X_test_raw = X_raw[:n_train], X_raw[n_train:]
+        else:
+            self.X_train_raw = self.X_test_raw = None
+        self.y_train, self.y_test = y[:n_train], y[n_train:]
+
+    def _feature_cache_key(self, keep_raw):
+        """Chave do cache de features: arquivo de origem + configuração do pré-processamento
+
+        O arquivo entra pelo caminho absoluto, tamanho e mtime (sem ler o conteúdo), então
+        um acerto no cache dispensa a leitura. Dados atribuídos direto a self.data, sem
+        load_data, entram pelo hash do DataFrame.
+        """
+        config = (FEATURE_CACHE_VERSION, self.target_column, 0.2, 42, keep_raw)
+        if self.data_source is None:
+            return joblib.hash((config, self.data))
+        file_path, columns, typed = self.data_source
+        stat = os.stat(file_path)
+        source = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, columns, typed)
+        return joblib.hash((config, source))
+
+    def _has_cached_features(self):
+        """Se a matriz de features dos dados de origem já está em cache_dir"""
+        key = self._feature_cache_key(self.boosting_engine in ('hist', 'both'))
+        return os.path.isdir(os.path.join(self.cache_dir, 'features', key))
+
+    def _load_cached_features(self, key):
+        """Reabre as matrizes (memmap, sem cópia) e o estado ajustado, ou None se não estiver no cache"""
+        cache_path = os.path.join(self.cache_dir, 'features', key)
+        if not os.path.isdir(cache_path):
+            return None
+        with open(os.path.join(cache_path, 'state.pkl'), 'rb') as f:
+            state = pickle.load(f)
+        self.feature_columns = state['feature_columns']
+        self.label_encoders = state['label_encoders']
+        self.category_modes = state['category_modes']
+        self.categorical_mask = state['categorical_mask']
+        self.scaler = state['scaler']
+        cached = {'n_train': state['n_train']}
+        for name in FEATURE_CACHE_ARRAYS:
+            array_path = os.path.join(cache_path, f"{name}.npy")
+            if os.path.exists(array_path):
+                cached[name] = np.load(array_path, mmap_mode='r')
+        return cached
+
+    def _store_cached_features(self, key, arrays, n_train):
+        """Grava as matrizes como .npy e o estado ajustado em cache_dir/features/<chave>"""
+        features_dir = os.path.join(self.cache_dir, 'features')
+        os.makedirs(features_dir, exist_ok=True)
+        cache_path = os.path.join(features_dir, key)
+        # Diretório temporário renomeado no fim: um cache incompleto nunca é lido
+        tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, array in arrays.items():
+            if array is not None:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, 'state.pkl'), 'wb') as f:
+            pickle.dump({
+                'feature_columns': self.feature_columns,
+                'label_encoders': self.label_encoders,
+                'category_modes': self.category_modes,
+                'categorical_mask': self.categorical_mask,
+                'scaler': self.scaler,
+                'n_train': n_train
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Outro processo gravou a mesma chave primeiro
+            shutil.rmtree(tmp_path, ignore_errors=True)
 
     def feature_importance_analysis(self):
         """Análise de importância das features"""
         print("\n🔍 ANÁLISE DE IMPORTÂNCIA DAS FEATURES")
         print("=" * 50)
 
-        # Usar Random Forest para análise de importância
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
-        rf.fit(self.X_train, self.y_train)
+        # Reaproveitar a importância calculada no treino, se disponível
+        if not self.feature_importance:
+            self.compute_feature_importance()
 
         # Criar DataFrame com importância das features
-        feature_importance = pd.DataFrame({
-            'feature': self.feature_columns,
-            'importance': rf.feature_importances_
-        }).sort_values('importance', ascending=False)
+        feature_importance = pd.DataFrame(self.feature_importance)
 
         print("🏆 Top 10 features mais importantes:")
         print(feature_importance.head(10))
 
         # Plotar importância das features
-        plt.figure(figsize=(12, 8))
-        top_features = feature_importance.head(15)
-        plt.barh(range(len(top_features)), top_features['importance'])
-        plt.yticks(range(len(top_features)), top_features['feature'])
-        plt.xlabel('Importância')
-        plt.title('Top 15 Features Mais Importantes para Prever Churn')
-        plt.gca().invert_yaxis()
-        plt.tight_layout()
-        plt.savefig('feature_importance.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if self.render_plots:
+            from churn_reports import plot_feature_importance
+            plot_feature_importance(feature_importance)
 
         return feature_importance
 
+    def compute_feature_importance(self):
+        """Calcula a importância das features uma única vez, a partir do Random Forest do treino"""
+        rf = self.results.get('Random Forest', {}).get('model')
+        if rf is None:
+            rf = RandomForestClassifier(n_estimators=100, random_state=42)
+            rf.fit(self.X_train, self.y_train)
+
+        feature_importance = [
+            {'feature': feature, 'importance': float(importance)}
+            for feature, importance in zip(self.feature_columns, rf.feature_importances_)
+        ]
+        feature_importance.sort(key=lambda x: x['importance'], reverse=True)
+
+        self.feature_importance = feature_importance
+        return feature_importance
+
+    def compute_permutation_importance(self, n_repeats=5, random_state=42):
+        """Importância por permutação do melhor modelo no conjunto de teste (AUC)"""
+        if self.inference is None:
+            raise ValueError("Modelo não foi treinado ainda!")
+
+        importances = self.inference.compute_permutation_importance(n_repeats, random_state)
+        self.permutation_feature_importance = importances
+        return importances
+
+    def candidate_models(self):
+        """Modelos candidatos avaliados em train_models (com os hiperparâmetros da busca, se houver)"""
+        models = {'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42)}
+        if self.boosting_engine in ('exact', 'both'):
+            models['Gradient Boosting'] = GradientBoostingClassifier(n_estimators=100, random_state=42)
+        if self.boosting_engine in ('hist', 'both'):
+            # Categorias nativas: dispensa LabelEncoder ordinal + StandardScaler
+            models['Hist Gradient Boosting'] = HistGradientBoostingClassifier(
+                categorical_features=self.categorical_mask, random_state=42
+            )
+        models['Logistic Regression'] = LogisticRegression(random_state=42, max_iter=1000)
+        for name, params in self.tuned_params.items():
+            if name in models:
+                models[name].set_params(**params)
+        return models
+
+    def tune_hyperparameters(self, n_candidates=27, eta=3, cv=3):
+        """Busca hiperparâmetros por successive halving (cache em cache_dir/tuning)"""
+        from churn_tuning import HyperparameterSearch
+
+        print("\n🔧 BUSCA DE HIPERPARÂMETROS")
+        print("=" * 50)
+
+        self.tuned_params = {}
+        search = HyperparameterSearch(
+            self.candidate_models(), n_candidates=n_candidates, eta=eta, cv=cv,
+            n_jobs=self.n_jobs, cache_dir=self.cache_dir
+        )
+        search.fit(self.X_train, self.y_train,
+                   inputs={name: self.X_train_raw for name in UNSCALED_MODELS})
+
+        self.tuned_params = search.best_params_
+        self.tuning_summary = search.summary()
+        return self.tuned_params
+
+    def model_inputs(self, name):
+        """Matrizes de treino e teste usadas por um modelo (normalizadas ou só codificadas)"""
+        if name in UNSCALED_MODELS:
+            return np.asarray(self.X_train_raw), np.asarray(self.X_test_raw)
+        return np.asarray(self.X_train), np.asarray(self.X_test)
+
     def train_models(self):
-        """Treina diferentes modelos de machine learning"""
+        """Treina diferentes modelos de machine learning
+
+        Cada modelo faz 1 + N_CV_FOLDS ajustes (treino completo e folds, estes com as
+        probabilidades out-of-fold). Com fold_ensemble=True são só os N_CV_FOLDS ajustes dos
+        folds, e o modelo final é a média deles (FoldEnsemble). O cache em cache_dir evita
+        repeti-los entre execuções.
+        """
         print("\n🤖 TREINAMENTO DOS MODELOS")
         print("=" * 50)
 
-        models = {
-            'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
-            'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=42),
-            'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000)
-        }
+        models = self.candidate_models()
 
-        self.results = {}
+        y_train = np.asarray(self.y_train)
+        y_test = np.asarray(self.y_test)
+        folds = list(StratifiedKFold(n_splits=N_CV_FOLDS).split(self.X_train, y_train))
 
+        # Todos os ajustes (treino completo + folds de cada modelo), cada um com sua chave de cache
+        specs = []
         for name, model in models.items():
-            print(f"\n🔄 Treinando {name}...")
+            X_train, X_test = self.model_inputs(name)
+            data_hash = joblib.hash((X_train, y_train, X_test, y_test))
+            config = (name, type(model).__name__, model.get_params())
+            if not self.fold_ensemble:
+                specs.append((self._fit_cache_key(config, data_hash, 'full'), delayed(_fit_full_model)(
+                    name, clone(model), X_train, y_train, X_test, y_test
+                )))
+            for fold, (train_idx, val_idx) in enumerate(folds):
+                # No modo ensemble o fold guarda o modelo, então a chave de cache é outra
+                part = (fold, 'model') if self.fold_ensemble else fold
+                specs.append((self._fit_cache_key(config, data_hash, part), delayed(_fit_cv_fold)(
+                    name, fold, clone(model), X_train, y_train, train_idx, val_idx, self.fold_ensemble
+                )))
+
+        fitted = {key: self._load_cached_fit(key) for key, _ in specs}
+        missing = [(key, task) for key, task in specs if fitted[key] is None]
+
+        print(f"🔄 Treinando {len(models)} modelos: {len(missing)} ajustes a executar, "
+              f"{len(specs) - len(missing)} reaproveitados do cache (n_jobs={self.n_jobs})...")
+        start = time.time()
+        if missing:
+            new_outputs = Parallel(n_jobs=self.n_jobs)(task for _, task in missing)
+            for (key, _), output in zip(missing, new_outputs):
+                self._store_cached_fit(key, output)
+                output['cached'] = False
+                fitted[key] = output
+        elapsed = time.time() - start
+
+        outputs = [fitted[key] for key, _ in specs]
 
-            # Treinar modelo
-            model.fit(self.X_train, self.y_train)
+        self.results = {}
 
-            # Fazer predições
-            y_pred = model.predict(self.X_test)
-            y_pred_proba = model.predict_proba(self.X_test)[:, 1]
+        for name in models:
+            model_outputs = [output for output in outputs if output['name'] == name]
+            fold_outputs = sorted((o for o in model_outputs if o['kind'] == 'fold'), key=lambda o: o['fold'])
+            if self.fold_ensemble:
+                full = _evaluate_fold_ensemble(name, fold_outputs, self.model_inputs(name)[1], y_test)
+            else:
+                full = next(output for output in model_outputs if output['kind'] == 'full')
+            cv_scores = np.array([output['score'] for output in fold_outputs])
 
-            # Calcular métricas
-            accuracy = model.score(self.X_test, self.y_test)
-            auc = roc_auc_score(self.y_test, y_pred_proba)
+            # Probabilidades out-of-fold alinhadas com X_train (úteis para calibração)
+            oof_proba = np.empty(len(y_train), dtype=np.float64)
+            for output in fold_outputs:
+                oof_proba[folds[output['fold']][1]] = output['oof_proba']
 
-            # Cross-validation
-            cv_scores = cross_val_score(model, self.X_train, self.y_train, cv=5, scoring='accuracy')
+            executed = [o for o in model_outputs if not o.get('cached', True)]
+            wall_time = (max(o['end'] for o in executed) - min(o['start'] for o in executed)) if executed else 0.0
 
             self.results[name] = {
-                'model': model,
-                'accuracy': accuracy,
-                'auc': auc,
+                'model': full['model'],
+                'accuracy': full['accuracy'],
+                'auc': full['auc'],
                 'cv_mean': cv_scores.mean(),
                 'cv_std': cv_scores.std(),
-                'y_pred': y_pred,
-                'y_pred_proba': y_pred_proba
+                'oof_proba': oof_proba,
+                'oof_auc': roc_auc_score(y_train, oof_proba),
+                'y_pred': full['y_pred'],
+                'y_pred_proba': full['y_pred_proba'],
+                # No modo ensemble o "ajuste" do modelo final são os próprios folds
+                'fit_time': (sum(o['end'] - o['start'] for o in fold_outputs) if self.fold_ensemble
+                             else full['end'] - full['start']),
+                'wall_time': wall_time
             }
 
-            print(f"   ✅ Acurácia: {accuracy:.4f}")
-            print(f"   📊 AUC: {auc:.4f}")
+            print(f"\n🤖 {name}")
+            print(f"   ✅ Acurácia: {full['accuracy']:.4f}")
+            print(f"   📊 AUC: {full['auc']:.4f} (out-of-fold: {self.results[name]['oof_auc']:.4f})")
             print(f"   🔄 CV Score: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+            print(f"   ⏱️  Tempo total: {wall_time:.2f}s ({len(executed)}/{len(model_outputs)} ajustes executados)")
+
+        print(f"\n⏱️  Treinamento concluído em {elapsed:.2f}s")
+
+        # Importância das features calculada uma única vez no treino
+        self.compute_feature_importance()
 
         return self.results
 
+    def _fit_cache_key(self, config, data_hash, part):
+        """Chave de cache de um ajuste: configuração do modelo + hash dos dados + fold"""
+        return joblib.hash((config, data_hash, part, N_CV_FOLDS))
+
+    def _load_cached_fit(self, key):
+        """Resultado de um ajuste já executado, ou None se não estiver no cache"""
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(self.cache_dir, 'fits', f"{key}.pkl")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _store_cached_fit(self, key, output):
+        """Guarda o resultado de um ajuste no cache em disco"""
+        if self.cache_dir is None:
+            return
+        fits_dir = os.path.join(self.cache_dir, 'fits')
+        os.makedirs(fits_dir, exist_ok=True)
+        path = os.path.join(fits_dir, f"{key}.pkl")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
     def evaluate_models(self):
         """Avalia e compara os modelos treinados"""
         print("\n📊 AVALIAÇÃO DOS MODELOS")
@@ -207,23 +637,25 @@ class ChurnPredictor:
         print(comparison.sort_values('AUC', ascending=False))
 
         # Plotar ROC curves
-        plt.figure(figsize=(10, 8))
-        for name, result in self.results.items():
-            fpr, tpr, _ = roc_curve(self.y_test, result['y_pred_proba'])
-            plt.plot(fpr, tpr, label=f'{name} (AUC = {result["auc"]:.3f})')
-
-        plt.plot([0, 1], [0, 1], 'k--', label='Random')
-        plt.xlabel('Taxa de Falsos Positivos')
-        plt.ylabel('Taxa de Verdadeiros Positivos')
-        plt.title('Curvas ROC dos Modelos')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig('roc_curves.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if self.render_plots:
+            from churn_reports import plot_roc_curves
+            plot_roc_curves(self.results, self.y_test)
 
         # Selecionar melhor modelo
         best_model_name = max(self.results.keys(), key=lambda x: self.results[x]['auc'])
         self.best_model = self.results[best_model_name]['model']
+        self.best_model_name = best_model_name
+        self.metrics = {
+            name: {
+                'accuracy': float(result['accuracy']),
+                'auc': float(result['auc']),
+                'cv_mean': float(result['cv_mean']),
+                'cv_std': float(result['cv_std']),
+                'oof_auc': float(result['oof_auc'])
+            }
+            for name, result in self.results.items()
+        }
+        self.build_inference_state()
 
         print(f"\n🏆 Melhor modelo: {best_model_name}")
         print(f"   📊 AUC: {self.results[best_model_name]['auc']:.4f}")
@@ -243,75 +675,206 @@ class ChurnPredictor:
 
         # Matriz de confusão
         cm = confusion_matrix(self.y_test, y_pred)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                    xticklabels=['Não Churn', 'Churn'],
-                    yticklabels=['Não Churn', 'Churn'])
-        plt.title(f'Matriz de Confusão - {model_name}')
-        plt.ylabel('Valor Real')
-        plt.xlabel('Valor Predito')
-        plt.savefig('confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        print("\n🧮 Matriz de Confusão:")
+        print(cm)
 
         # Relatório de classificação
         print("\n📋 Relatório de Classificação:")
         print(classification_report(self.y_test, y_pred,
                                   target_names=['Não Churn', 'Churn']))
 
-        # Análise de probabilidades
-        plt.figure(figsize=(12, 5))
-
-        # Histograma de probabilidades
-        plt.subplot(1, 2, 1)
-        plt.hist(y_pred_proba[self.y_test == 0], alpha=0.7, label='Não Churn', bins=20)
-        plt.hist(y_pred_proba[self.y_test == 1], alpha=0.7, label='Churn', bins=20)
-        plt.xlabel('Probabilidade de Churn')
-        plt.ylabel('Frequência')
-        plt.title('Distribuição das Probabilidades')
-        plt.legend()
-
-        # Box plot das probabilidades
-        plt.subplot(1, 2, 2)
-        data_to_plot = [y_pred_proba[self.y_test == 0], y_pred_proba[self.y_test == 1]]
-        plt.boxplot(data_to_plot, labels=['Não Churn', 'Churn'])
-        plt.ylabel('Probabilidade de Churn')
-        plt.title('Box Plot das Probabilidades')
-
-        plt.tight_layout()
-        plt.savefig('probability_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        # Gráficos da matriz de confusão e das probabilidades
+        if self.render_plots:
+            from churn_reports import plot_confusion_matrix, plot_probability_analysis
+            plot_confusion_matrix(cm, model_name)
+            plot_probability_analysis(y_pred_proba, self.y_test)
 
     def predict_churn_probability(self, customer_data):
         """Prediz a probabilidade de churn para um novo cliente"""
-        if self.best_model is None:
+        if self.inference is None:
             print("❌ Modelo não foi treinado ainda!")
             return None
 
-        # Preprocessar dados do cliente
-        processed_data = self.preprocess_single_customer(customer_data)
-
-        # Fazer predição
-        probability = self.best_model.predict_proba(processed_data)[0][1]
+        return self.inference.predict_churn_probability(customer_data)
+
+    def predict_proba_batch(self, records):
+        """Prediz a probabilidade de churn para vários clientes em uma única chamada"""
+        if self.inference is None:
+            raise ValueError("Modelo não foi treinado ainda!")
+        return self.inference.predict_proba_batch(records)
+
+    def predict_proba_columns(self, columns):
+        """Prediz a probabilidade de churn para dados colunares (ex.: um DataFrame)"""
+        if self.inference is None:
+            raise ValueError("Modelo não foi treinado ainda!")
+        return self.inference.predict_proba_columns(columns)
+
+    def categories(self):
+        """Categorias conhecidas de cada feature categórica, na ordem dos códigos"""
+        return {col: le.classes_.tolist() for col, le in self.label_encoders.items()}
+
+    def build_inference_state(self):
+        """Monta o ChurnModel de inferência a partir do melhor modelo e do pré-processamento"""
+        model_bytes = pickle.dumps(self.best_model, protocol=pickle.HIGHEST_PROTOCOL)
+        self.model_version = hashlib.sha256(model_bytes).hexdigest()[:12]
+
+        n_features = len(self.feature_columns)
+        _, X_test = self.model_inputs(self.best_model_name)
+        X_holdout, y_holdout = self.holdout_sample(X_test, self.y_test)
+        self.inference = ChurnModel(
+            model=self.best_model,
+            model_name=self.best_model_name,
+            feature_columns=self.feature_columns,
+            categories=self.categories(),
+            scaler_mean=self.scaler.mean_ if self.scaler.with_mean else np.zeros(n_features),
+            scaler_scale=self.scaler.scale_ if self.scaler.with_std else np.ones(n_features),
+            category_modes=self.category_modes,
+            unknown_category=self.unknown_category,
+            metrics=self.metrics,
+            model_version=self.model_version,
+            feature_importance=self.feature_importance,
+            permutation_feature_importance=self.permutation_feature_importance,
+            holdout=(X_holdout, y_holdout),
+            scaled_input=self.best_model_name not in UNSCALED_MODELS,
+            compiled_forest=self.compile_forest(X_holdout)
+        )
+        return self.inference
+
+    @staticmethod
+    def holdout_sample(X_test, y_test, max_rows=HOLDOUT_SAMPLE_SIZE, random_state=42):
+        """Amostra estratificada (semente fixa) de até max_rows linhas do teste, para o artefato"""
+        X_test = np.asarray(X_test)
+        y_test = np.asarray(y_test)
+        if len(y_test) <= max_rows:
+            return np.array(X_test), np.array(y_test)
+        idx, _ = train_test_split(np.arange(len(y_test)), train_size=max_rows,
+                                  random_state=random_state, stratify=y_test)
+        idx.sort()
+        return X_test[idx], y_test[idx]
+
+    def compile_forest(self, X_check):
+        """Exporta o melhor modelo para CompiledForest, se for uma floresta e bater com predict_proba"""
+        if isinstance(self.best_model, FoldEnsemble):
+            print("⚠️  Ensemble de folds: floresta compilada não suportada; usando o predict_proba do scikit-learn")
+            return None
+        if not is_compilable_forest(self.best_model):
+            return None
 
-        return probability
+        forest = CompiledForest.from_sklearn(self.best_model)
+        try:
+            max_error = forest.check_parity(self.best_model, X_check)
+        except ValueError as e:
+            print(f"⚠️  {e}; mantendo o predict_proba do scikit-learn")
+            return None
 
-    def preprocess_single_customer(self, customer_data):
-        """Preprocessa dados de um único cliente"""
-        # Converter para DataFrame
-        df = pd.DataFrame([customer_data])
+        print(f"🌲 Floresta compilada: {len(forest.roots)} árvores, {len(forest.feature)} nós "
+              f"(erro máximo no holdout {max_error:.1e})")
+        return forest
 
-        # Aplicar label encoding nas features categóricas
-        for col in self.label_encoders:
-            if col in df.columns:
-                df[col] = self.label_encoders[col].transform(df[col])
+    def preprocess_batch(self, records):
+        """Preprocessa uma lista de clientes em uma matriz NumPy normalizada"""
+        return self.inference.preprocess_batch(records)
 
-        # Selecionar apenas as features necessárias
-        df = df[self.feature_columns]
+    def preprocess_single_customer(self, customer_data):
+        """Preprocessa dados de um único cliente em um vetor (1, n_features)"""
+        return self.inference.preprocess_single_customer(customer_data)
+
+    def schema_hash(self):
+        """Hash do schema de entrada (features e categorias conhecidas)"""
+        return compute_schema_hash(self.feature_columns, self.categories())
+
+    def model_info(self):
+        """Resumo do modelo servido (nome, métricas e versão)"""
+        metrics = self.metrics.get(self.best_model_name, {})
+        return {
+            'model_type': self.best_model_name,
+            'accuracy': metrics.get('accuracy'),
+            'auc': metrics.get('auc'),
+            'features_used': len(self.feature_columns),
+            'model_version': self.model_version,
+            'engine': 'compiled_forest' if self.inference and self.inference.compiled_forest else 'sklearn'
+        }
 
-        # Normalizar
-        df_scaled = self.scaler.transform(df)
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Salva o melhor modelo e o pré-processamento em um artefato único"""
+        if self.inference is None:
+            raise ValueError("Modelo não foi treinado ainda; execute evaluate_models antes de salvar")
+
+        # Pré-processamento salvo como dados simples: carregar o artefato
+        # só importa o módulo do estimador, não o pipeline de treino
+        artifact = {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'model_name': self.best_model_name,
+            'model': self.best_model,
+            'feature_columns': list(self.feature_columns),
+            'categories': self.categories(),
+            'category_modes': self.category_modes,
+            'scaler': {
+                'mean': self.inference.scaler_mean,
+                'scale': self.inference.scaler_scale,
+                'var': getattr(self.scaler, 'var_', None),
+                'n_samples_seen': getattr(self.scaler, 'n_samples_seen_', None)
+            },
+            'target_column': self.target_column,
+            'metrics': self.metrics,
+            'schema_hash': self.schema_hash(),
+            'model_version': self.model_version,
+            'feature_importance': self.feature_importance,
+            'permutation_feature_importance': self.permutation_feature_importance,
+            'scaled_input': self.inference.scaled_input,
+            # Tabelas de nós da floresta compilada (None se o modelo não for uma floresta)
+            'compiled_forest': (self.inference.compiled_forest.to_arrays()
+                                if self.inference.compiled_forest is not None else None),
+            'tuned_params': self.tuned_params,
+            'tuning': self.tuning_summary,
+            # Amostra de teste para cálculos posteriores (ex.: importância por permutação)
+            'holdout': self.inference.holdout,
+            'created_at': datetime.now().isoformat()
+        }
 
-        return df_scaled
+        # Escrita atômica: workers que leem o artefato nunca veem um arquivo parcial
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write_artifact(artifact, f)
+        os.replace(tmp_path, path)
+
+        print(f"💾 Modelo salvo em: {path} (versão {self.model_version})")
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH, unknown_category='error'):
+        """Carrega um artefato salvo por save(), sem retreinar"""
+        artifact = read_artifact(path)
+
+        predictor = cls(unknown_category=unknown_category)
+        predictor.best_model = artifact['model']
+        predictor.best_model_name = artifact['model_name']
+        predictor.feature_columns = artifact['feature_columns']
+        predictor.target_column = artifact['target_column']
+        predictor.metrics = artifact['metrics']
+        predictor.model_version = artifact['model_version']
+        predictor.category_modes = artifact['category_modes']
+        predictor.feature_importance = artifact['feature_importance']
+        predictor.permutation_feature_importance = artifact['permutation_feature_importance']
+        predictor.tuned_params = artifact['tuned_params']
+        predictor.tuning_summary = artifact['tuning']
+        predictor.X_test, predictor.y_test = artifact['holdout']
+
+        # Reconstruir os LabelEncoders e o StandardScaler a partir dos dados salvos
+        for col, classes in artifact['categories'].items():
+            le = LabelEncoder()
+            le.classes_ = np.array(classes, dtype=object)
+            predictor.label_encoders[col] = le
+
+        scaler_params = artifact['scaler']
+        predictor.scaler.mean_ = scaler_params['mean']
+        predictor.scaler.scale_ = scaler_params['scale']
+        predictor.scaler.var_ = scaler_params['var']
+        predictor.scaler.n_samples_seen_ = scaler_params['n_samples_seen']
+        predictor.scaler.n_features_in_ = len(predictor.feature_columns)
+
+        predictor.inference = ChurnModel.from_artifact(artifact, unknown_category=unknown_category)
+        return predictor
 
     def create_sample_customer(self):
         """Cria um exemplo de cliente para teste"""
@@ -375,8 +938,12 @@ def main():
     print("🚀 INICIANDO MODELO DE PREDIÇÃO DE CHURN")
     print("=" * 60)
 
-    # Inicializar o predictor
-    predictor = ChurnPredictor()
+    # Inicializar o predictor (CHURN_CACHE_DIR reaproveita ajustes entre execuções;
+    # CHURN_BOOSTING_ENGINE escolhe exact, hist ou both;
+    # CHURN_FOLD_ENSEMBLE=1 usa a média dos modelos dos folds como modelo final)
+    predictor = ChurnPredictor(cache_dir=os.getenv('CHURN_CACHE_DIR'), render_plots=True,
+                               boosting_engine=os.getenv('CHURN_BOOSTING_ENGINE', 'exact'),
+                               fold_ensemble=os.getenv('CHURN_FOLD_ENSEMBLE', '0').lower() in ('1', 'true', 'yes'))
 
     # Carregar dados
     data = predictor.load_data('churn_dataset.csv')
@@ -387,12 +954,12 @@ def main():
     # Pré-processar dados
     X, y = predictor.preprocess_data()
 
-    # Análise de importância das features
-    feature_importance = predictor.feature_importance_analysis()
-
     # Treinar modelos
     results = predictor.train_models()
 
+    # Análise de importância das features (reaproveita o Random Forest treinado)
+    feature_importance = predictor.feature_importance_analysis()
+
     # Avaliar modelos
     best_model_name = predictor.evaluate_models()
 
@@ -417,8 +984,12 @@ def main():
 
     print(f"⚠️  Nível de risco: {risk_level}")
 
+    # Salvar artefato para a API carregar sem retreinar
+    predictor.save(DEFAULT_MODEL_PATH)
+
     print("\n✅ Pipeline completo executado com sucesso!")
     print("📁 Arquivos gerados:")
+    print(f"   - {DEFAULT_MODEL_PATH}")
     print("   - feature_importance.png")
     print("   - roc_curves.png")
     print("   - confusion_matrix.png")
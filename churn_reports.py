@@ -0,0 +1,89 @@
+"""
+Relatórios Gráficos do Modelo de Churn
+======================================
+
+Gráficos gerados no treino (importância das features, curvas ROC, matriz de
+confusão e análise de probabilidades). Este módulo importa matplotlib e
+seaborn e só é carregado por ChurnPredictor quando render_plots=True, de
+modo que a API e a pontuação em lote nunca o importam.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from sklearn.metrics import roc_curve
+
+# Configuração para exibir gráficos
+plt.style.use('seaborn-v0_8')
+sns.set_palette("husl")
+
+
+def plot_feature_importance(feature_importance, path='feature_importance.png'):
+    """Gráfico das 15 features mais importantes"""
+    plt.figure(figsize=(12, 8))
+    top_features = feature_importance.head(15)
+    plt.barh(range(len(top_features)), top_features['importance'])
+    plt.yticks(range(len(top_features)), top_features['feature'])
+    plt.xlabel('Importância')
+    plt.title('Top 15 Features Mais Importantes para Prever Churn')
+    plt.gca().invert_yaxis()
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.show()
+
+
+def plot_roc_curves(results, y_test, path='roc_curves.png'):
+    """Curvas ROC de todos os modelos treinados"""
+    plt.figure(figsize=(10, 8))
+    for name, result in results.items():
+        fpr, tpr, _ = roc_curve(y_test, result['y_pred_proba'])
+        plt.plot(fpr, tpr, label=f'{name} (AUC = {result["auc"]:.3f})')
+
+    plt.plot([0, 1], [0, 1], 'k--', label='Random')
+    plt.xlabel('Taxa de Falsos Positivos')
+    plt.ylabel('Taxa de Verdadeiros Positivos')
+    plt.title('Curvas ROC dos Modelos')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.show()
+
+
+def plot_confusion_matrix(cm, model_name, path='confusion_matrix.png'):
+    """Matriz de confusão do modelo"""
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Não Churn', 'Churn'],
+                yticklabels=['Não Churn', 'Churn'])
+    plt.title(f'Matriz de Confusão - {model_name}')
+    plt.ylabel('Valor Real')
+    plt.xlabel('Valor Predito')
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.show()
+
+
+def plot_probability_analysis(y_pred_proba, y_test, path='probability_analysis.png'):
+    """Histograma e box plot das probabilidades por classe real"""
+    y_test = np.asarray(y_test)
+
+    plt.figure(figsize=(12, 5))
+
+    # Histograma de probabilidades
+    plt.subplot(1, 2, 1)
+    plt.hist(y_pred_proba[y_test == 0], alpha=0.7, label='Não Churn', bins=20)
+    plt.hist(y_pred_proba[y_test == 1], alpha=0.7, label='Churn', bins=20)
+    plt.xlabel('Probabilidade de Churn')
+    plt.ylabel('Frequência')
+    plt.title('Distribuição das Probabilidades')
+    plt.legend()
+
+    # Box plot das probabilidades
+    plt.subplot(1, 2, 2)
+    data_to_plot = [y_pred_proba[y_test == 0], y_pred_proba[y_test == 1]]
+    plt.boxplot(data_to_plot, labels=['Não Churn', 'Churn'])
+    plt.ylabel('Probabilidade de Churn')
+    plt.title('Box Plot das Probabilidades')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.show()
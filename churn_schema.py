@@ -0,0 +1,105 @@
+"""
+Schema do Dataset de Churn
+==========================
+
+Tipos declarados das colunas do dataset (generate_dataset.py), aplicados na
+leitura: inteiros pequenos (int8/int16), float32 e pandas `category` para as
+colunas de texto. Reduz várias vezes a memória por linha em relação ao
+padrão do pandas (int64/float64 e strings como objetos Python).
+
+Os intervalos vêm do gerador. Os inteiros são lidos primeiro em int64 e só
+convertidos depois de conferido o intervalo (apply_schema): um arquivo com
+valores fora dele (ou nulos em colunas inteiras) gera ValueError, e
+ChurnPredictor.load_data volta aos tipos padrão.
+
+O treino vê as features float32 já arredondadas; ChurnModel (churn_inference)
+arredonda as entradas da API e da pontuação em lote para o mesmo float32
+antes de pontuar, para não haver diferença entre o avaliado e o servido.
+"""
+
+import numpy as np
+
+NUMERIC_DTYPES = {
+    'customer_id': np.int32,
+    'age': np.int8,
+    'subscription_length_months': np.int8,
+    'monthly_charge': np.float32,
+    'total_charges': np.float32,
+    'avg_monthly_gb_download': np.float32,
+    'avg_monthly_gb_download_6_months': np.float32,
+    'avg_monthly_gb_download_12_months': np.float32,
+    'monthly_usage_gb': np.float32,
+    'overage_fees': np.float32,
+    'roaming_charges': np.float32,
+    'number_vmail_messages': np.int8,
+    'number_customer_service_calls': np.int8,
+    'number_calls_placed': np.int8,
+    'number_calls_received': np.int8,
+    'total_minutes_used': np.int16,
+    'total_data_used_gb': np.float32,
+    'avg_call_duration_minutes': np.float32,
+    'avg_call_duration_6_months': np.float32,
+    'avg_call_duration_12_months': np.float32,
+    'payment_delay_days': np.int8,
+    'late_payment_count': np.int8,
+    'missed_payment_count': np.int8,
+    'contract_renewal_days': np.int16,
+    'days_since_last_upgrade': np.int16,
+    'days_since_last_downgrade': np.int16,
+    'days_since_last_complaint': np.int8,
+    'complaint_count': np.int8,
+    'positive_feedback_count': np.int8,
+    'negative_feedback_count': np.int8,
+    'social_media_mentions': np.int8,
+    'satisfaction_score': np.int8
+}
+
+CATEGORICAL_COLUMNS = (
+    'gender', 'contract_type', 'payment_method', 'paperless_billing', 'tech_support',
+    'online_security', 'online_backup', 'device_protection', 'premium_tech_support',
+    'streaming_tv', 'streaming_movies', 'streaming_music', 'unlimited_data',
+    'internet_service_type', 'phone_service', 'multiple_lines', 'internet_service',
+    'international_plan', 'voice_mail_plan', 'churn'
+)
+
+# dtype de cada coluna, no formato aceito por pd.read_csv(dtype=...) e DataFrame.astype
+DATASET_DTYPES = {**NUMERIC_DTYPES, **{col: 'category' for col in CATEGORICAL_COLUMNS}}
+
+# dtypes da leitura do CSV: inteiros em int64, reduzidos depois por apply_schema
+# (pd.read_csv(dtype=np.int8) trunca em silêncio um valor que não cabe: 300 vira 44)
+CSV_READ_DTYPES = {col: (np.int64 if dtype != 'category' and np.issubdtype(dtype, np.integer) else dtype)
+                   for col, dtype in DATASET_DTYPES.items()}
+
+
+def apply_schema(df):
+    """Converte as colunas de df para DATASET_DTYPES; ValueError se um inteiro não couber no tipo"""
+    dtypes = {col: DATASET_DTYPES[col] for col in df.columns if col in DATASET_DTYPES}
+    for col, dtype in dtypes.items():
+        if dtype == 'category' or not np.issubdtype(dtype, np.integer) or not len(df):
+            continue
+        info = np.iinfo(dtype)
+        low, high = df[col].min(), df[col].max()
+        if low < info.min or high > info.max:
+            raise ValueError(f"Coluna '{col}' fora do intervalo de {np.dtype(dtype).name} "
+                             f"[{info.min}, {info.max}]: mínimo {low}, máximo {high}")
+    return df.astype(dtypes)
+
+
+def memory_usage_mb(df):
+    """Memória total do DataFrame em MB, incluindo as strings dos objetos"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def memory_report(before, after):
+    """Compara a memória de dois DataFrames com as mesmas linhas (padrão vs tipado)"""
+    before_mb = memory_usage_mb(before)
+    after_mb = memory_usage_mb(after)
+    rows = max(len(after), 1)
+    return {
+        'rows': len(after),
+        'before_mb': before_mb,
+        'after_mb': after_mb,
+        'before_bytes_per_row': before_mb * 1024 ** 2 / rows,
+        'after_bytes_per_row': after_mb * 1024 ** 2 / rows,
+        'reduction': before_mb / after_mb if after_mb else float('inf')
+    }
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Busca de Hiperparâmetros do Modelo de Churn
+===========================================
+
+Successive halving sobre configurações sorteadas (random search) para os
+modelos candidatos de ChurnPredictor: todas as configurações começam com uma
+amostra pequena do treino e só o melhor terço (eta=3) de cada rodada avança
+para uma amostra maior. As avaliações rodam em paralelo e ficam em cache em
+disco, de modo que uma busca interrompida continua de onde parou.
+
+Uso:
+    python churn_tuning.py --n-candidates 27 --cache-dir .churn_cache
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, cross_val_score, train_test_split
+
+# Espaços de busca por modelo candidato (nomes de ChurnPredictor.candidate_models)
+SEARCH_SPACES = {
+    'Random Forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 'log2', 0.5]
+    },
+    'Gradient Boosting': {
+        'n_estimators': [50, 100, 200],
+        'learning_rate': [0.01, 0.05, 0.1, 0.2],
+        'max_depth': [2, 3, 4, 5],
+        'subsample': [0.6, 0.8, 1.0]
+    },
+    'Hist Gradient Boosting': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.03, 0.1, 0.2],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 50],
+        'l2_regularization': [0.0, 0.1, 1.0]
+    },
+    'Logistic Regression': {
+        'C': [0.001, 0.01, 0.1, 1.0, 10.0, 100.0],
+        'class_weight': [None, 'balanced']
+    }
+}
+
+
+def _evaluate_config(estimator, params, X, y, cv, random_state):
+    """AUC média de validação cruzada de uma configuração (executado em um worker)"""
+    model = clone(estimator).set_params(**params)
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    scores = cross_val_score(model, X, y, cv=folds, scoring='roc_auc')
+    return float(scores.mean())
+
+
+class HyperparameterSearch:
+    """Successive halving com random search e cache de avaliações em disco"""
+
+    def __init__(self, estimators, search_spaces=None, n_candidates=27, eta=3, min_resources=None,
+                 cv=3, n_jobs=-1, cache_dir=None, random_state=42):
+        self.estimators = estimators
+        self.search_spaces = search_spaces or SEARCH_SPACES
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_resources = min_resources
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+
+        self.history_ = []
+        self.best_params_ = {}
+        self.best_scores_ = {}
+        self.best_model_name_ = None
+        self.evaluated_ = 0
+        self.reused_ = 0
+
+    def _cache_path(self):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, 'tuning', 'evaluations.jsonl')
+
+    def _load_cache(self):
+        """Avaliações já feitas: chave -> AUC"""
+        path = self._cache_path()
+        if path is None or not os.path.exists(path):
+            return {}
+        cache = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # linha parcial de uma busca interrompida
+                cache[entry['key']] = entry['score']
+        return cache
+
+    def _append_cache(self, entries):
+        """Acrescenta avaliações ao cache (uma linha JSON por avaliação)"""
+        path = self._cache_path()
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+
+    def _rung_resources(self, n_samples):
+        """Tamanho da amostra de treino em cada rodada do successive halving"""
+        n_rungs = 1 + int(math.floor(math.log(max(self.n_candidates, 1)) / math.log(self.eta)))
+        min_resources = self.min_resources or self.cv * 20
+        resources = []
+        for rung in range(n_rungs):
+            resource = int(n_samples * self.eta ** (rung - (n_rungs - 1)))
+            resources.append(min(n_samples, max(resource, min_resources)))
+        return resources
+
+    def _subsample(self, X, y, resource):
+        """Amostra estratificada e determinística de tamanho resource"""
+        if resource >= len(y):
+            return X, y
+        idx, _ = train_test_split(np.arange(len(y)), train_size=resource,
+                                  stratify=y, random_state=self.random_state)
+        return X[idx], y[idx]
+
+    def fit(self, X, y, inputs=None):
+        """Executa a busca e guarda a melhor configuração de cada modelo
+
+        inputs: matriz alternativa por modelo (ex.: códigos sem normalização para o
+        Hist Gradient Boosting); as linhas devem estar alinhadas com y.
+        """
+        y = np.asarray(y)
+        inputs = {name: np.asarray((inputs or {}).get(name, X)) for name in self.estimators}
+        data_hashes = {name: joblib.hash((X_model, y)) for name, X_model in inputs.items()}
+        cache = self._load_cache()
+        batch_size = max(1, joblib.effective_n_jobs(self.n_jobs))
+
+        # Candidatos sorteados de cada espaço de busca
+        candidates = {
+            name: list(ParameterSampler(self.search_spaces[name], n_iter=self.n_candidates,
+                                        random_state=self.random_state))
+            for name in self.estimators if name in self.search_spaces
+        }
+
+        resources = self._rung_resources(len(y))
+        print(f"🔎 Busca de hiperparâmetros: {sum(len(c) for c in candidates.values())} configurações, "
+              f"rodadas com {resources} amostras")
+
+        start = time.time()
+        for rung, resource in enumerate(resources):
+            rung_data = {name: self._subsample(inputs[name], y, resource) for name in candidates}
+
+            specs = []
+            for name, configs in candidates.items():
+                for params in configs:
+                    key = joblib.hash((name, sorted(params.items(), key=lambda item: item[0]),
+                                       resource, data_hashes[name], self.cv, self.random_state))
+                    specs.append((name, params, key))
+
+            scores = {key: cache[key] for _, _, key in specs if key in cache}
+            missing = [spec for spec in specs if spec[2] not in scores]
+            self.reused_ += len(specs) - len(missing)
+
+            # Avaliar em lotes do tamanho do pool, gravando o cache a cada lote
+            for i in range(0, len(missing), batch_size):
+                batch = missing[i:i + batch_size]
+                batch_scores = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_evaluate_config)(self.estimators[name], params, *rung_data[name],
+                                              self.cv, self.random_state)
+                    for name, params, _ in batch
+                )
+                entries = []
+                for (name, params, key), score in zip(batch, batch_scores):
+                    scores[key] = score
+                    cache[key] = score
+                    entries.append({'key': key, 'model': name, 'params': params,
+                                    'resource': resource, 'score': score})
+                self._append_cache(entries)
+                self.evaluated_ += len(batch)
+
+            # Manter o melhor 1/eta de cada modelo para a próxima rodada
+            for name in candidates:
+                ranked = sorted(((scores[key], params) for n, params, key in specs if n == name),
+                                key=lambda item: item[0], reverse=True)
+                for score, params in ranked:
+                    self.history_.append({'model': name, 'rung': rung, 'resource': resource,
+                                          'params': params, 'score': score})
+                keep = max(1, math.ceil(len(ranked) / self.eta)) if rung < len(resources) - 1 else 1
+                candidates[name] = [params for _, params in ranked[:keep]]
+                self.best_scores_[name] = ranked[0][0]
+
+            print(f"   🔄 Rodada {rung + 1}/{len(resources)} ({resource} amostras): "
+                  + ", ".join(f"{name} AUC {self.best_scores_[name]:.4f}" for name in candidates))
+
+        self.best_params_ = {name: configs[0] for name, configs in candidates.items()}
+        self.best_model_name_ = max(self.best_scores_, key=self.best_scores_.get)
+
+        print(f"✅ Busca concluída em {time.time() - start:.1f}s: {self.evaluated_} avaliações, "
+              f"{self.reused_} reaproveitadas do cache")
+        for name, params in self.best_params_.items():
+            print(f"   🏆 {name}: AUC {self.best_scores_[name]:.4f} com {params}")
+
+        return self
+
+    def summary(self):
+        """Resumo serializável da busca (salvo junto com o artefato do modelo)"""
+        return {
+            'best_params': self.best_params_,
+            'best_scores': self.best_scores_,
+            'best_model': self.best_model_name_,
+            'n_candidates': self.n_candidates,
+            'eta': self.eta,
+            'cv': self.cv,
+            'evaluated': self.evaluated_,
+            'reused': self.reused_
+        }
+
+
+def main(argv=None):
+    """Busca os hiperparâmetros, treina com a melhor configuração e salva o artefato"""
+    from churn_model import ChurnPredictor, DEFAULT_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros do modelo de churn")
+    parser.add_argument('--data', default='churn_dataset.csv', help="Dataset de treino")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help="Artefato do modelo")
+    parser.add_argument('--n-candidates', type=int, default=27, help="Configurações sorteadas por modelo")
+    parser.add_argument('--eta', type=int, default=3, help="Fator de corte do successive halving")
+    parser.add_argument('--cv', type=int, default=3, help="Folds da validação cruzada na busca")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos em paralelo")
+    parser.add_argument('--boosting-engine', choices=['exact', 'hist', 'both'], default='exact',
+                        help="Engine de gradient boosting a incluir na busca")
+    parser.add_argument('--cache-dir', default='.churn_cache', help="Cache de avaliações (retomar buscas)")
+    args = parser.parse_args(argv)
+
+    predictor = ChurnPredictor(n_jobs=args.n_jobs, cache_dir=args.cache_dir,
+                               boosting_engine=args.boosting_engine)
+    predictor.load_data(args.data)
+    predictor.preprocess_data()
+    predictor.tune_hyperparameters(n_candidates=args.n_candidates, eta=args.eta, cv=args.cv)
+    predictor.train_models()
+    predictor.evaluate_models()
+    predictor.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -234,7 +234,7 @@ def main():
     print("=" * 60)
 
     # Inicializar o predictor
-    predictor = ChurnPredictor()
+    predictor = ChurnPredictor(render_plots=True)
 
     # Carregar e treinar o modelo
     print("🔄 Carregando e treinando o modelo...")
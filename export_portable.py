@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Exportação do Modelo Portátil
+=============================
+
+Build step que converte o artefato churn_model.pkl em um JSON lido por
+api/portable_model.py (Python puro, sem NumPy nem scikit-learn):
+
+- Logistic Regression: cada código do LabelEncoder vira um peso por categoria
+  (já normalizado); as features numéricas levam peso, média e escala, e são
+  normalizadas em float32 como no treino. O score vira um produto escalar
+  sobre o dict do cliente.
+- Random Forest / Gradient Boosting: as árvores viram listas planas de nós,
+  com os limiares convertidos de volta para a escala original das features:
+  o maior float32 v tal que (v - μ) / σ, em float32, não passa do limiar.
+
+O modelo portátil arredonda as entradas numéricas para float32, como a
+matriz de treino; assim as decisões nas árvores são exatamente as mesmas.
+
+Antes de gravar, as probabilidades do JSON são conferidas contra o modelo
+original no holdout salvo com o artefato.
+
+Uso:
+    python export_portable.py --model churn_model.pkl --output api/churn_model_portable.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from churn_inference import DEFAULT_MODEL_PATH, FEATURE_DTYPE, ChurnModel
+
+# api/ não é um pacote (api.py ocupa o nome): importar portable_model pelo diretório
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api')
+sys.path.insert(0, API_DIR)
+
+from portable_model import PORTABLE_FORMAT_VERSION, PORTABLE_MODELS  # noqa: E402
+
+DEFAULT_PORTABLE_PATH = os.path.join(API_DIR, 'churn_model_portable.json')
+
+# Tolerância da conferência de paridade (probabilidade absoluta). As árvores tomam as
+# mesmas decisões do treino; a regressão logística ajustada em float32 soma o produto
+# escalar em float32 (BLAS), que o Python puro acompanha só até ~1e-7
+PARITY_ATOL = 1e-6
+
+
+def scaled_float32(values, mean, scale):
+    """Normalização em float32 (mesma aritmética de churn_inference.scale_features)"""
+    return (values.astype(FEATURE_DTYPE) - mean.astype(FEATURE_DTYPE)) / scale.astype(FEATURE_DTYPE)
+
+
+def export_logistic(churn_model):
+    """Regressão logística: pesos por categoria já normalizados; numéricas com peso, média e escala"""
+    model = churn_model.model
+    coef = model.coef_.ravel()
+    if coef.shape[0] != len(churn_model.feature_columns):
+        raise ValueError("Regressão logística não é binária ou não bate com as features")
+
+    numeric_scaling = {}
+    categorical_weights = {}
+    for j, col in enumerate(churn_model.feature_columns):
+        mean = churn_model.scaler_mean[j:j + 1]
+        scale = churn_model.scaler_scale[j:j + 1]
+        if col in churn_model.categories:
+            codes = np.arange(len(churn_model.categories[col]), dtype=np.float64)
+            scaled = scaled_float32(codes, np.repeat(mean, len(codes)), np.repeat(scale, len(codes)))
+            categorical_weights[col] = {
+                str(category): float(coef[j] * np.float64(value))
+                for category, value in zip(churn_model.categories[col], scaled)
+            }
+        else:
+            # [peso, média, escala], com média e escala em float32 como no treino
+            numeric_scaling[col] = [float(coef[j]), float(mean.astype(FEATURE_DTYPE)[0]),
+                                    float(scale.astype(FEATURE_DTYPE)[0])]
+
+    return {
+        'kind': 'logistic',
+        'intercept': float(model.intercept_[0]),
+        'numeric_scaling': numeric_scaling,
+        'categorical_weights': categorical_weights
+    }
+
+
+def float32_cutoffs(threshold, mean, scale):
+    """Maior float32 v, por nó, com (v - μ) / σ <= limiar na aritmética float32 do treino
+
+    A normalização em float32 é monótona, então "x normalizado <= limiar" equivale a
+    "float32(x) <= v" na escala original. Parte de limiar * σ + μ e ajusta ulp a ulp.
+    """
+    mean = mean.astype(FEATURE_DTYPE)
+    scale = scale.astype(FEATURE_DTYPE)
+    down, up = FEATURE_DTYPE(-np.inf), FEATURE_DTYPE(np.inf)
+    with np.errstate(over='ignore', invalid='ignore'):
+        v = (threshold * scale + mean).astype(FEATURE_DTYPE)
+        for _ in range(64):
+            above = (v - mean) / scale > threshold
+            if not above.any():
+                break
+            v[above] = np.nextafter(v[above], down)
+        for _ in range(64):
+            candidate = np.nextafter(v, up)
+            fits = (candidate - mean) / scale <= threshold
+            if not fits.any():
+                break
+            v[fits] = candidate[fits]
+    return v
+
+
+def export_trees(churn_model, estimators, leaf_value):
+    """Árvores em listas planas, com limiares float32 na escala original (float32_cutoffs)"""
+    trees = []
+    for estimator in estimators:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        feature = np.where(is_leaf, 0, tree.feature)
+        cutoffs = float32_cutoffs(tree.threshold, churn_model.scaler_mean[feature],
+                                  churn_model.scaler_scale[feature])
+        threshold = np.where(is_leaf, 0.0, cutoffs.astype(np.float64))
+        trees.append({
+            'feature': feature.tolist(),
+            'threshold': threshold.tolist(),
+            'left': tree.children_left.tolist(),
+            'right': tree.children_right.tolist(),
+            'value': leaf_value(tree).tolist()
+        })
+    return trees
+
+
+def export_forest(churn_model):
+    """Random Forest / Extra Trees: probabilidade da classe positiva em cada folha"""
+    def positive_proba(tree):
+        counts = tree.value[:, 0, :]
+        return counts[:, 1] / counts.sum(axis=1)
+
+    return {
+        'kind': 'forest',
+        'categories': {col: [str(c) for c in classes] for col, classes in churn_model.categories.items()},
+        'trees': export_trees(churn_model, churn_model.model.estimators_, positive_proba)
+    }
+
+
+def export_boosting(churn_model):
+    """Gradient Boosting binário: folhas já multiplicadas pelo learning rate + logit inicial"""
+    model = churn_model.model
+    if model.estimators_.shape[1] != 1:
+        raise ValueError("Gradient Boosting não é binário")
+
+    learning_rate = model.learning_rate
+    estimators = model.estimators_[:, 0]
+
+    # Logit inicial (prior) = decision_function - soma das árvores, em uma linha do holdout
+    X_holdout, _ = churn_model.holdout
+    row = np.asarray(X_holdout[:1], dtype=np.float64)
+    init_raw = float(model.decision_function(row)[0]
+                     - learning_rate * sum(estimator.predict(row)[0] for estimator in estimators))
+
+    return {
+        'kind': 'boosting',
+        'init_raw': init_raw,
+        'categories': {col: [str(c) for c in classes] for col, classes in churn_model.categories.items()},
+        'trees': export_trees(churn_model, estimators, lambda tree: learning_rate * tree.value[:, 0, 0])
+    }
+
+
+# Exportadores por tipo de estimador (Hist Gradient Boosting não tem árvores públicas)
+EXPORTERS = {
+    'LogisticRegression': export_logistic,
+    'RandomForestClassifier': export_forest,
+    'ExtraTreesClassifier': export_forest,
+    'GradientBoostingClassifier': export_boosting
+}
+
+
+def build_spec(churn_model):
+    """JSON completo: pesos do modelo + metadados servidos pela API"""
+    estimator_type = type(churn_model.model).__name__
+    if estimator_type == 'FoldEnsemble':
+        raise ValueError(f"{churn_model.model_name} é um ensemble de folds (CHURN_FOLD_ENSEMBLE); "
+                         "exportação portátil não suportada")
+    if estimator_type not in EXPORTERS:
+        raise ValueError(f"Exportação portátil não suportada para {estimator_type}")
+    if not churn_model.scaled_input:
+        raise ValueError(f"{churn_model.model_name} usa entrada sem normalização; exportação não suportada")
+
+    spec = {
+        'format_version': PORTABLE_FORMAT_VERSION,
+        'model_name': churn_model.model_name,
+        'model_version': churn_model.model_version,
+        'schema_hash': churn_model.schema_hash(),
+        'feature_columns': churn_model.feature_columns,
+        'category_modes': {
+            col: str(churn_model.categories[col][code]) for col, code in churn_model.category_modes.items()
+        },
+        'metrics': churn_model.metrics.get(churn_model.model_name, {}),
+        'feature_importance': churn_model.feature_importance
+    }
+    spec.update(EXPORTERS[estimator_type](churn_model))
+    return spec
+
+
+def holdout_records(churn_model):
+    """Holdout salvo no artefato convertido de volta em dicts de clientes"""
+    X_holdout, _ = churn_model.holdout
+    X = np.asarray(X_holdout, dtype=np.float64)
+    if churn_model.scaled_input:
+        X = X * churn_model.scaler_scale + churn_model.scaler_mean
+
+    records = []
+    for row in X:
+        record = {}
+        for j, col in enumerate(churn_model.feature_columns):
+            if col in churn_model.categories:
+                record[col] = str(churn_model.categories[col][int(round(row[j]))])
+            else:
+                record[col] = float(row[j])
+        records.append(record)
+    return records
+
+
+def check_parity(spec, churn_model):
+    """Confere o modelo portátil contra o ChurnModel no holdout; devolve o erro máximo"""
+    portable = PORTABLE_MODELS[spec['kind']](spec)
+    records = holdout_records(churn_model)
+    expected = churn_model.predict_proba_batch(records)
+    actual = np.array([portable.predict_churn_probability(record) for record in records])
+    max_error = float(np.max(np.abs(expected - actual))) if len(records) else 0.0
+    if max_error > PARITY_ATOL:
+        raise ValueError(f"Modelo portátil diverge do original (erro máximo {max_error:.2e})")
+    return max_error
+
+
+def export_portable(model_path=DEFAULT_MODEL_PATH, output_path=DEFAULT_PORTABLE_PATH):
+    """Exporta o artefato para JSON portátil, conferindo a paridade antes de gravar"""
+    churn_model = ChurnModel.load(model_path)
+    spec = build_spec(churn_model)
+    max_error = check_parity(spec, churn_model)
+
+    # Escrita atômica: o handler nunca lê um JSON parcial
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output_path)
+
+    print(f"✅ {churn_model.model_name} exportado para {output_path} "
+          f"({os.path.getsize(output_path) / 1024:.1f} KB, erro máximo no holdout {max_error:.1e})")
+    return output_path
+
+
+def main(argv=None):
+    """Interface de linha de comando"""
+    parser = argparse.ArgumentParser(description="Exporta o modelo de churn para o handler serverless")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Artefato do modelo")
+    parser.add_argument('--output', default=DEFAULT_PORTABLE_PATH, help="JSON portátil de saída")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"❌ Artefato do modelo não encontrado: {args.model} (execute churn_model.py)")
+        return 1
+
+    try:
+        export_portable(args.model, args.output)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
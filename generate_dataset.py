@@ -1,98 +1,266 @@
-import pandas as pd
+#!/usr/bin/env python3
+"""
+Gerador do Dataset Sintético de Churn
+=====================================
+
+Gera clientes sintéticos em blocos de tamanho fixo, com memória limitada ao
+tamanho do bloco, e grava em CSV, Parquet ou Arrow IPC, em um arquivo único ou em
+vários shards gerados em paralelo. Sem argumentos, reproduz exatamente o
+dataset original (1000 registros, semente 42, churn_dataset.csv).
+
+Cada bloco tem o próprio gerador, derivado da semente e do índice do bloco,
+então o resultado depende só de (semente, tamanho do bloco), não do número
+de processos ou de shards.
+
+Uso:
+    python generate_dataset.py
+    python generate_dataset.py --rows 10000000 --output dados/churn.parquet --shards 16 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
+
+from churn_dataset import DatasetWriter, dataset_format
+from churn_schema import apply_schema
 
-# Criar dados sintéticos para o modelo de churn
-np.random.seed(42)
-
-# Número de registros
-n_records = 1000
-
-# Gerar dados
-data = {
-    'customer_id': range(1, n_records + 1),
-    'age': np.random.randint(18, 80, n_records),
-    'gender': np.random.choice(['M', 'F'], n_records),
-    'subscription_length_months': np.random.randint(1, 60, n_records),
-    'monthly_charge': np.random.uniform(20, 150, n_records).round(2),
-    'total_charges': np.random.uniform(50, 5000, n_records).round(2),
-    'contract_type': np.random.choice(['Month-to-month', 'One year', 'Two year'], n_records),
-    'payment_method': np.random.choice(['Credit card', 'Bank transfer', 'Electronic check'], n_records),
-    'paperless_billing': np.random.choice(['Yes', 'No'], n_records),
-    'tech_support': np.random.choice(['Yes', 'No'], n_records),
-    'online_security': np.random.choice(['Yes', 'No'], n_records),
-    'online_backup': np.random.choice(['Yes', 'No'], n_records),
-    'device_protection': np.random.choice(['Yes', 'No'], n_records),
-    'premium_tech_support': np.random.choice(['Yes', 'No'], n_records),
-    'streaming_tv': np.random.choice(['Yes', 'No'], n_records),
-    'streaming_movies': np.random.choice(['Yes', 'No'], n_records),
-    'streaming_music': np.random.choice(['Yes', 'No'], n_records),
-    'unlimited_data': np.random.choice(['Yes', 'No'], n_records),
-    'internet_service_type': np.random.choice(['Fiber optic', 'DSL'], n_records),
-    'phone_service': np.random.choice(['Yes', 'No'], n_records),
-    'multiple_lines': np.random.choice(['Yes', 'No'], n_records),
-    'internet_service': np.random.choice(['Yes', 'No'], n_records),
-    'avg_monthly_gb_download': np.random.uniform(0, 200, n_records).round(1),
-    'avg_monthly_gb_download_6_months': np.random.uniform(0, 200, n_records).round(1),
-    'avg_monthly_gb_download_12_months': np.random.uniform(0, 200, n_records).round(1),
-    'monthly_usage_gb': np.random.uniform(0, 3000, n_records).round(0),
-    'overage_fees': np.random.uniform(0, 50, n_records).round(2),
-    'roaming_charges': np.random.uniform(0, 20, n_records).round(2),
-    'international_plan': np.random.choice(['Yes', 'No'], n_records),
-    'voice_mail_plan': np.random.choice(['Yes', 'No'], n_records),
-    'number_vmail_messages': np.random.randint(0, 50, n_records),
-    'number_customer_service_calls': np.random.randint(0, 20, n_records),
-    'number_calls_placed': np.random.randint(0, 100, n_records),
-    'number_calls_received': np.random.randint(0, 100, n_records),
-    'total_minutes_used': np.random.randint(0, 3000, n_records),
-    'total_data_used_gb': np.random.uniform(0, 100, n_records).round(1),
-    'avg_call_duration_minutes': np.random.uniform(1, 20, n_records).round(1),
-    'avg_call_duration_6_months': np.random.uniform(1, 20, n_records).round(1),
-    'avg_call_duration_12_months': np.random.uniform(1, 20, n_records).round(1),
-    'payment_delay_days': np.random.randint(0, 30, n_records),
-    'late_payment_count': np.random.randint(0, 5, n_records),
-    'missed_payment_count': np.random.randint(0, 3, n_records),
-    'contract_renewal_days': np.random.randint(30, 1095, n_records),
-    'days_since_last_upgrade': np.random.randint(0, 500, n_records),
-    'days_since_last_downgrade': np.random.randint(0, 200, n_records),
-    'days_since_last_complaint': np.random.randint(0, 100, n_records),
-    'complaint_count': np.random.randint(0, 10, n_records),
-    'positive_feedback_count': np.random.randint(0, 5, n_records),
-    'negative_feedback_count': np.random.randint(0, 5, n_records),
-    'social_media_mentions': np.random.randint(0, 10, n_records),
-    'satisfaction_score': np.random.randint(1, 11, n_records)
+# Pesos das regras de negócio que formam a probabilidade de churn
+DEFAULT_CHURN_WEIGHTS = {
+    'month_to_month': 0.3,      # Contratos month-to-month têm maior risco
+    'service_calls': 0.2,       # Muitas chamadas para suporte indicam insatisfação
+    'late_payment': 0.15,       # Pagamentos atrasados
+    'low_satisfaction': 0.25,   # Baixa satisfação
+    'high_charge': 0.1,         # Assinaturas caras
+    'no_tech_support': 0.05,    # Sem serviços premium
+    'base': 0.1                 # Base probability
 }
 
-# Criar DataFrame
-df = pd.DataFrame(data)
-
-# Gerar churn baseado em algumas regras de negócio
-churn_probability = (
-    # Contratos month-to-month têm maior risco
-    (df['contract_type'] == 'Month-to-month') * 0.3 +
-    # Muitas chamadas para suporte indicam insatisfação
-    (df['number_customer_service_calls'] > 5) * 0.2 +
-    # Pagamentos atrasados
-    (df['late_payment_count'] > 0) * 0.15 +
-    # Baixa satisfação
-    (df['satisfaction_score'] < 5) * 0.25 +
-    # Assinaturas caras
-    (df['monthly_charge'] > 80) * 0.1 +
-    # Sem serviços premium
-    (df['tech_support'] == 'No') * 0.05 +
-    # Base probability
-    0.1
-)
-
-# Normalizar probabilidade
-churn_probability = np.clip(churn_probability, 0, 1)
-
-# Gerar churn baseado na probabilidade
-df['churn'] = np.random.binomial(1, churn_probability, n_records)
-df['churn'] = df['churn'].map({1: 'Yes', 0: 'No'})
-
-# Salvar CSV
-df.to_csv('churn_dataset.csv', index=False)
-
-print(f"✅ Dataset gerado com {n_records} registros")
-print(f"📊 Taxa de churn: {(df['churn'] == 'Yes').mean():.2%}")
-print(f"📁 Arquivo salvo como: churn_dataset.csv")
+
+def chunk_random_state(seed, chunk_index):
+    """Gerador de um bloco; o bloco 0 usa a própria semente (mantém o dataset padrão idêntico)"""
+    if chunk_index == 0:
+        return np.random.RandomState(seed)
+    return np.random.RandomState([seed, chunk_index])
+
+
+def generate_chunk(rng, first_id, n_records, churn_weights=None):
+    """Gera n_records clientes com customer_id a partir de first_id"""
+    weights = {**DEFAULT_CHURN_WEIGHTS, **(churn_weights or {})}
+
+    # Gerar dados
+    data = {
+        'customer_id': np.arange(first_id, first_id + n_records),
+        'age': rng.randint(18, 80, n_records),
+        'gender': rng.choice(['M', 'F'], n_records),
+        'subscription_length_months': rng.randint(1, 60, n_records),
+        'monthly_charge': rng.uniform(20, 150, n_records).round(2),
+        'total_charges': rng.uniform(50, 5000, n_records).round(2),
+        'contract_type': rng.choice(['Month-to-month', 'One year', 'Two year'], n_records),
+        'payment_method': rng.choice(['Credit card', 'Bank transfer', 'Electronic check'], n_records),
+        'paperless_billing': rng.choice(['Yes', 'No'], n_records),
+        'tech_support': rng.choice(['Yes', 'No'], n_records),
+        'online_security': rng.choice(['Yes', 'No'], n_records),
+        'online_backup': rng.choice(['Yes', 'No'], n_records),
+        'device_protection': rng.choice(['Yes', 'No'], n_records),
+        'premium_tech_support': rng.choice(['Yes', 'No'], n_records),
+        'streaming_tv': rng.choice(['Yes', 'No'], n_records),
+        'streaming_movies': rng.choice(['Yes', 'No'], n_records),
+        'streaming_music': rng.choice(['Yes', 'No'], n_records),
+        'unlimited_data': rng.choice(['Yes', 'No'], n_records),
+        'internet_service_type': rng.choice(['Fiber optic', 'DSL'], n_records),
+        'phone_service': rng.choice(['Yes', 'No'], n_records),
+        'multiple_lines': rng.choice(['Yes', 'No'], n_records),
+        'internet_service': rng.choice(['Yes', 'No'], n_records),
+        'avg_monthly_gb_download': rng.uniform(0, 200, n_records).round(1),
+        'avg_monthly_gb_download_6_months': rng.uniform(0, 200, n_records).round(1),
+        'avg_monthly_gb_download_12_months': rng.uniform(0, 200, n_records).round(1),
+        'monthly_usage_gb': rng.uniform(0, 3000, n_records).round(0),
+        'overage_fees': rng.uniform(0, 50, n_records).round(2),
+        'roaming_charges': rng.uniform(0, 20, n_records).round(2),
+        'international_plan': rng.choice(['Yes', 'No'], n_records),
+        'voice_mail_plan': rng.choice(['Yes', 'No'], n_records),
+        'number_vmail_messages': rng.randint(0, 50, n_records),
+        'number_customer_service_calls': rng.randint(0, 20, n_records),
+        'number_calls_placed': rng.randint(0, 100, n_records),
+        'number_calls_received': rng.randint(0, 100, n_records),
+        'total_minutes_used': rng.randint(0, 3000, n_records),
+        'total_data_used_gb': rng.uniform(0, 100, n_records).round(1),
+        'avg_call_duration_minutes': rng.uniform(1, 20, n_records).round(1),
+        'avg_call_duration_6_months': rng.uniform(1, 20, n_records).round(1),
+        'avg_call_duration_12_months': rng.uniform(1, 20, n_records).round(1),
+        'payment_delay_days': rng.randint(0, 30, n_records),
+        'late_payment_count': rng.randint(0, 5, n_records),
+        'missed_payment_count': rng.randint(0, 3, n_records),
+        'contract_renewal_days': rng.randint(30, 1095, n_records),
+        'days_since_last_upgrade': rng.randint(0, 500, n_records),
+        'days_since_last_downgrade': rng.randint(0, 200, n_records),
+        'days_since_last_complaint': rng.randint(0, 100, n_records),
+        'complaint_count': rng.randint(0, 10, n_records),
+        'positive_feedback_count': rng.randint(0, 5, n_records),
+        'negative_feedback_count': rng.randint(0, 5, n_records),
+        'social_media_mentions': rng.randint(0, 10, n_records),
+        'satisfaction_score': rng.randint(1, 11, n_records)
+    }
+
+    # Criar DataFrame
+    df = pd.DataFrame(data)
+
+    # Gerar churn baseado em algumas regras de negócio
+    churn_probability = (
+        (df['contract_type'] == 'Month-to-month') * weights['month_to_month'] +
+        (df['number_customer_service_calls'] > 5) * weights['service_calls'] +
+        (df['late_payment_count'] > 0) * weights['late_payment'] +
+        (df['satisfaction_score'] < 5) * weights['low_satisfaction'] +
+        (df['monthly_charge'] > 80) * weights['high_charge'] +
+        (df['tech_support'] == 'No') * weights['no_tech_support'] +
+        weights['base']
+    )
+
+    # Normalizar probabilidade
+    churn_probability = np.clip(churn_probability, 0, 1)
+
+    # Gerar churn baseado na probabilidade
+    df['churn'] = rng.binomial(1, churn_probability, n_records)
+    df['churn'] = df['churn'].map({1: 'Yes', 0: 'No'})
+
+    return df
+
+
+def typed_chunk(df, fmt):
+    """Em Parquet/Arrow grava já com os tipos de churn_schema (o CSV mantém a formatação original)"""
+    if fmt == 'csv':
+        return df
+    return apply_schema(df)
+
+
+def chunk_ranges(n_records, chunk_size):
+    """(índice do bloco, primeiro customer_id, tamanho) de cada bloco"""
+    return [(i, start + 1, min(chunk_size, n_records - start))
+            for i, start in enumerate(range(0, n_records, chunk_size))]
+
+
+def shard_paths(output, n_shards):
+    """Arquivo de cada shard: churn.parquet -> churn-00000.parquet, churn-00001.parquet, ..."""
+    if n_shards == 1:
+        return [output]
+    stem, ext = os.path.splitext(output)
+    return [f"{stem}-{i:05d}{ext}" for i in range(n_shards)]
+
+
+def _generate_task(seed, chunk_index, first_id, n_records, churn_weights):
+    """Gera um bloco (executado em um processo do pool)"""
+    return generate_chunk(chunk_random_state(seed, chunk_index), first_id, n_records, churn_weights)
+
+
+def _write_shard(path, chunks, seed, churn_weights):
+    """Gera e grava os blocos de um shard; devolve (linhas, churns)"""
+    writer = DatasetWriter(path)
+    rows = churned = 0
+    for chunk_index, first_id, n_records in chunks:
+        df = _generate_task(seed, chunk_index, first_id, n_records, churn_weights)
+        writer.write(typed_chunk(df, writer.format))
+        rows += len(df)
+        churned += int((df['churn'] == 'Yes').sum())
+    writer.close()
+    return rows, churned
+
+
+def generate_dataset(output='churn_dataset.csv', n_records=1000, seed=42, chunk_size=100_000,
+                     workers=1, shards=1, churn_weights=None):
+    """Gera o dataset em blocos; com shards > 1, um arquivo por shard, em paralelo"""
+    chunks = chunk_ranges(n_records, chunk_size)
+    shards = max(1, min(shards, len(chunks)))
+    paths = shard_paths(output, shards)
+    start = time.perf_counter()
+    rows = churned = 0
+
+    if shards > 1:
+        # Shards com blocos contíguos, cada um gerado e gravado por um processo
+        bounds = [len(chunks) * i // shards for i in range(shards + 1)]
+        assignments = [chunks[bounds[i]:bounds[i + 1]] for i in range(shards)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_write_shard, path, assigned, seed, churn_weights)
+                       for path, assigned in zip(paths, assignments)]
+            for future in futures:
+                shard_rows, shard_churned = future.result()
+                rows += shard_rows
+                churned += shard_churned
+    elif workers > 1:
+        # Arquivo único: blocos gerados em paralelo e gravados em ordem, com poucos em voo
+        writer = DatasetWriter(output)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for chunk_index, first_id, size in chunks:
+                pending.append(pool.submit(_generate_task, seed, chunk_index, first_id, size, churn_weights))
+                while len(pending) > 2 * workers:
+                    df = pending.pop(0).result()
+                    writer.write(typed_chunk(df, writer.format))
+                    rows += len(df)
+                    churned += int((df['churn'] == 'Yes').sum())
+            for future in pending:
+                df = future.result()
+                writer.write(typed_chunk(df, writer.format))
+                rows += len(df)
+                churned += int((df['churn'] == 'Yes').sum())
+        writer.close()
+    else:
+        rows, churned = _write_shard(output, chunks, seed, churn_weights)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Dataset gerado com {rows} registros")
+    print(f"📊 Taxa de churn: {churned / rows if rows else 0:.2%}")
+    if shards > 1:
+        print(f"📁 {shards} shards salvos como: {paths[0]} ... {paths[-1]}")
+    else:
+        print(f"📁 Arquivo salvo como: {output}")
+    print(f"⏱️  {elapsed:.2f}s ({rows / elapsed if elapsed > 0 else float('inf'):,.0f} linhas/s)")
+
+    return paths
+
+
+def parse_weights(items):
+    """Converte ['month_to_month=0.4', ...] em dict, validando os nomes das regras"""
+    weights = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        if name not in DEFAULT_CHURN_WEIGHTS or not value:
+            raise ValueError(f"Peso inválido: {item} (regras: {', '.join(DEFAULT_CHURN_WEIGHTS)})")
+        weights[name] = float(value)
+    return weights
+
+
+def main(argv=None):
+    """Interface de linha de comando"""
+    parser = argparse.ArgumentParser(description="Gera o dataset sintético de churn")
+    parser.add_argument('--rows', type=int, default=1000, help="Número de registros")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador")
+    parser.add_argument('--output', default='churn_dataset.csv', help="Arquivo de saída (.csv, .parquet ou .arrow)")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Registros por bloco")
+    parser.add_argument('--workers', type=int, default=1, help="Processos em paralelo")
+    parser.add_argument('--shards', type=int, default=1, help="Arquivos de saída (um por shard)")
+    parser.add_argument('--weight', action='append', metavar='REGRA=PESO',
+                        help=f"Peso de uma regra de churn ({', '.join(DEFAULT_CHURN_WEIGHTS)})")
+    args = parser.parse_args(argv)
+
+    if args.rows < 1 or args.chunk_size < 1 or args.workers < 1 or args.shards < 1:
+        print("❌ --rows, --chunk-size, --workers e --shards devem ser >= 1")
+        return 1
+    try:
+        dataset_format(args.output)
+        churn_weights = parse_weights(args.weight)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    generate_dataset(args.output, n_records=args.rows, seed=args.seed, chunk_size=args.chunk_size,
+                     workers=args.workers, shards=args.shards, churn_weights=churn_weights)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Pontuação Offline de Churn em Lote
+==================================
+
+Lê um arquivo CSV, Parquet ou Arrow IPC em blocos de tamanho fixo (com os
+tipos de churn_schema, via churn_dataset.iter_dataset), pontua cada bloco
+com o modelo persistido (churn_model.pkl) em um pool de processos e grava
+customer_id, probabilidade e nível de risco em CSV ou Parquet.
+
+Uso:
+    python score.py clientes.csv scores.parquet --workers 8 --chunk-size 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from churn_dataset import iter_dataset
+from churn_inference import ChurnModel, DEFAULT_MODEL_PATH, read_artifact_header
+
+# Mesmos limiares de api.get_risk_level
+RISK_LABELS = ["🔴 ALTO RISCO", "🟡 RISCO MÉDIO", "🟢 BAIXO RISCO"]
+
+# Modelo carregado em cada processo do pool
+_worker_predictor = None
+
+
+def _init_worker(model_path, unknown_category):
+    """Carrega o artefato do modelo uma vez por processo"""
+    global _worker_predictor
+    _worker_predictor = ChurnModel.load(model_path, unknown_category=unknown_category)
+
+
+def risk_levels(probabilities):
+    """Nível de risco vetorizado para um array de probabilidades"""
+    return np.select([probabilities > 0.7, probabilities > 0.4], RISK_LABELS[:2], default=RISK_LABELS[2])
+
+
+def score_chunk(chunk, start_row):
+    """Pontua um bloco de clientes e devolve o DataFrame de resultados"""
+    probabilities = _worker_predictor.predict_proba_columns(chunk)
+
+    if 'customer_id' in chunk.columns:
+        customer_ids = chunk['customer_id'].to_numpy()
+    else:
+        customer_ids = np.arange(start_row, start_row + len(chunk))
+
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'churn_probability': probabilities,
+        'risk_level': risk_levels(probabilities)
+    })
+
+
+def iter_input(input_path, columns, chunk_size):
+    """Blocos do arquivo com os tipos de churn_schema
+
+    Se um bloco sair do schema declarado, continua com os tipos padrão a partir da
+    primeira linha ainda não entregue, como ChurnPredictor.load_data.
+    """
+    rows = 0
+    try:
+        for chunk in iter_dataset(input_path, columns=columns, typed=True, batch_size=chunk_size):
+            rows += len(chunk)
+            yield chunk
+        return
+    except (ValueError, OverflowError) as e:
+        print(f"⚠️  Dados fora do schema declarado ({e}); usando os tipos padrão a partir da linha {rows}")
+
+    for chunk in iter_dataset(input_path, columns=columns, typed=False, batch_size=chunk_size):
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+        yield chunk.iloc[rows:]
+        rows = 0
+
+
+class ResultWriter:
+    """Grava os resultados incrementalmente em CSV ou Parquet"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._first = True
+
+    def write(self, results):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            results.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._first:
+            # Entrada vazia: gravar ao menos o cabeçalho
+            pd.DataFrame(columns=['customer_id', 'churn_probability', 'risk_level']).to_csv(self.path, index=False)
+
+
+def score_file(input_path, output_path, model_path=DEFAULT_MODEL_PATH, chunk_size=100_000,
+               workers=None, unknown_category='error'):
+    """Pontua input_path em blocos e grava os resultados em output_path"""
+    workers = workers or os.cpu_count() or 1
+
+    # Colunas necessárias: features do modelo + identificador do cliente (só o cabeçalho
+    # do artefato: o estimador é carregado apenas nos processos do pool)
+    feature_columns = read_artifact_header(model_path)['feature_columns']
+    columns = ['customer_id'] + list(feature_columns)
+
+    print(f"📊 Pontuando {input_path} com {workers} processo(s), blocos de {chunk_size} linhas...")
+    start = time.perf_counter()
+    total_rows = 0
+    writer = ResultWriter(output_path)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, unknown_category)) as pool:
+        pending = []
+        for chunk in iter_input(input_path, columns, chunk_size):
+            pending.append(pool.submit(score_chunk, chunk, total_rows))
+            total_rows += len(chunk)
+
+            # Limitar blocos em voo para manter a memória constante, preservando a ordem
+            while len(pending) > 2 * workers:
+                writer.write(pending.pop(0).result())
+
+        for future in pending:
+            writer.write(future.result())
+
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    rows_per_second = total_rows / elapsed if elapsed > 0 else float('inf')
+    print(f"✅ {total_rows} clientes pontuados em {elapsed:.2f}s ({rows_per_second:,.0f} linhas/s)")
+    print(f"📁 Resultados salvos em: {output_path}")
+
+    return total_rows
+
+
+def main(argv=None):
+    """Interface de linha de comando"""
+    parser = argparse.ArgumentParser(description="Pontuação offline de churn em lote")
+    parser.add_argument('input', help="Arquivo de entrada (.csv, .parquet ou .arrow)")
+    parser.add_argument('output', help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Artefato do modelo")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Linhas por bloco")
+    parser.add_argument('--workers', type=int, default=None, help="Processos (padrão: número de CPUs)")
+    parser.add_argument('--unknown-category', choices=['error', 'most_frequent'], default='error',
+                        help="Política para categorias não vistas no treino")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"❌ Artefato do modelo não encontrado: {args.model} (execute churn_model.py)")
+        return 1
+
+    score_file(args.input, args.output, model_path=args.model, chunk_size=args.chunk_size,
+               workers=args.workers, unknown_category=args.unknown_category)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
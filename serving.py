@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Infraestrutura de Serving da API de Churn
+=========================================
+
+Executa a inferência fora do event loop do asyncio, em um pool de threads
+ou de processos, com limite de requisições pendentes (backpressure),
+agrupa requisições concorrentes de /predict em micro-lotes (opcional) e
+guarda probabilidades já calculadas em um cache LRU/TTL (opcional).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+
+@dataclass
+class ServingConfig:
+    """Configuração de serving (lida das variáveis de ambiente CHURN_*)"""
+    executor: str = "thread"
+    workers: int = 4
+    max_pending: int = 64
+    retry_after_seconds: int = 1
+    batching: bool = False
+    batch_max_size: int = 64
+    batch_max_wait_ms: float = 2.0
+    prediction_cache: bool = False
+    cache_max_entries: int = 10000
+    cache_ttl_seconds: float = 300.0
+
+    @classmethod
+    def from_env(cls):
+        """Cria a configuração a partir das variáveis de ambiente"""
+        config = cls(
+            executor=os.getenv("CHURN_INFERENCE_EXECUTOR", cls.executor),
+            workers=int(os.getenv("CHURN_INFERENCE_WORKERS", cls.workers)),
+            max_pending=int(os.getenv("CHURN_INFERENCE_MAX_PENDING", cls.max_pending)),
+            retry_after_seconds=int(os.getenv("CHURN_RETRY_AFTER_SECONDS", cls.retry_after_seconds)),
+            batching=os.getenv("CHURN_BATCHING", "0").lower() in ("1", "true", "yes"),
+            batch_max_size=int(os.getenv("CHURN_BATCH_MAX_SIZE", cls.batch_max_size)),
+            batch_max_wait_ms=float(os.getenv("CHURN_BATCH_MAX_WAIT_MS", cls.batch_max_wait_ms)),
+            prediction_cache=os.getenv("CHURN_PREDICTION_CACHE", "0").lower() in ("1", "true", "yes"),
+            cache_max_entries=int(os.getenv("CHURN_PREDICTION_CACHE_MAX_ENTRIES", cls.cache_max_entries)),
+            cache_ttl_seconds=float(os.getenv("CHURN_PREDICTION_CACHE_TTL_SECONDS", cls.cache_ttl_seconds))
+        )
+        if config.executor not in ("thread", "process"):
+            raise ValueError(f"CHURN_INFERENCE_EXECUTOR inválido: {config.executor}")
+        if config.workers < 1 or config.max_pending < 1:
+            raise ValueError("CHURN_INFERENCE_WORKERS e CHURN_INFERENCE_MAX_PENDING devem ser >= 1")
+        if config.batch_max_size < 1 or config.batch_max_wait_ms < 0:
+            raise ValueError("CHURN_BATCH_MAX_SIZE deve ser >= 1 e CHURN_BATCH_MAX_WAIT_MS >= 0")
+        if config.cache_max_entries < 1 or config.cache_ttl_seconds <= 0:
+            raise ValueError("CHURN_PREDICTION_CACHE_MAX_ENTRIES deve ser >= 1 e "
+                             "CHURN_PREDICTION_CACHE_TTL_SECONDS > 0")
+        return config
+
+
+class ExecutorSaturatedError(Exception):
+    """Fila de inferência cheia: a requisição deve ser recusada com 503"""
+
+
+# Modelo carregado em cada processo do pool (modo "process")
+_worker_predictor = None
+
+
+def _init_worker(model_path, unknown_category):
+    """Inicializa um processo do pool carregando o artefato do modelo"""
+    global _worker_predictor
+    from churn_inference import ChurnModel
+    _worker_predictor = ChurnModel.load(model_path, unknown_category=unknown_category)
+
+
+def _call_worker(method, args):
+    """Chama um método do modelo carregado no processo do pool"""
+    return getattr(_worker_predictor, method)(*args)
+
+
+class InferenceExecutor:
+    """Despacha chamadas ao ChurnModel para um pool, com limite de pendências"""
+
+    def __init__(self, predictor, config, model_path=None, unknown_category='error'):
+        self.predictor = predictor
+        self.config = config
+        self.pending = 0
+
+        if config.executor == "process":
+            if model_path is None:
+                raise ValueError("O executor de processos precisa do caminho do artefato do modelo")
+            self.pool = ProcessPoolExecutor(
+                max_workers=config.workers,
+                initializer=_init_worker,
+                initargs=(model_path, unknown_category)
+            )
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=config.workers,
+                                           thread_name_prefix="churn-inference")
+
+    async def run(self, method, *args):
+        """Executa predictor.<method>(*args) no pool sem bloquear o event loop"""
+        # O contador só é alterado no event loop, então não precisa de lock
+        if self.pending >= self.config.max_pending:
+            raise ExecutorSaturatedError(
+                f"{self.pending} requisições de inferência pendentes (limite {self.config.max_pending})"
+            )
+
+        self.pending += 1
+        try:
+            if self.config.executor == "process":
+                call = partial(_call_worker, method, args)
+            else:
+                call = partial(getattr(self.predictor, method), *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, call)
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        """Estado atual do executor"""
+        return {
+            "executor": self.config.executor,
+            "workers": self.config.workers,
+            "pending": self.pending,
+            "max_pending": self.config.max_pending
+        }
+
+    def reload(self, predictor, model_path=None, unknown_category='error'):
+        """Passa a usar um novo modelo; chamadas já em execução terminam com o anterior"""
+        self.predictor = predictor
+        if self.config.executor == "process":
+            # Os processos carregam o artefato na inicialização: trocar o pool
+            old_pool = self.pool
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.config.workers,
+                initializer=_init_worker,
+                initargs=(model_path, unknown_category)
+            )
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self):
+        """Encerra o pool, cancelando o que ainda não começou"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PredictionCache:
+    """Cache LRU com expiração (TTL) de probabilidades por cliente e versão do modelo"""
+
+    def __init__(self, max_entries, ttl_seconds, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.clock = clock
+        # chave -> (expira_em, probabilidade), do menos para o mais recentemente usado
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(record, model_version):
+        """Hash canônico do cliente (chaves ordenadas) + versão do modelo"""
+        payload = json.dumps([model_version, record], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Probabilidade em cache, ou None (ausente ou expirada)"""
+        # Só é usado no event loop, então não precisa de lock
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, probability = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return probability
+
+    def put(self, key, probability):
+        """Guarda uma probabilidade, removendo a entrada menos usada se estiver cheio"""
+        self._entries[key] = (self.clock() + self.ttl, probability)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Descarta todas as entradas (ex.: um novo modelo foi carregado)"""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        """Contadores do cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes de um cliente em uma única chamada vetorizada"""
+
+    def __init__(self, executor, max_batch, max_wait_ms):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        # Limite de itens aguardando lote: mesmo orçamento do executor, em clientes
+        self.max_queued = executor.config.max_pending * max_batch
+        self.queue = None
+        self._task = None
+        self._scoring = set()
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        """Inicia o coletor de lotes no event loop atual"""
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Para o coletor e falha as requisições que ainda aguardam lote"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self.queue is not None and not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(ExecutorSaturatedError("Micro-batcher encerrado"))
+
+    async def submit(self, record):
+        """Enfileira um cliente e aguarda sua probabilidade de churn"""
+        if self.queue.qsize() >= self.max_queued:
+            raise ExecutorSaturatedError(
+                f"{self.queue.qsize()} clientes aguardando lote (limite {self.max_queued})"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((record, future))
+        return await future
+
+    async def _collect(self):
+        """Fecha um lote ao atingir max_batch itens ou max_wait desde o primeiro item"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Pontuar em paralelo enquanto o próximo lote é coletado
+            task = loop.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+    async def _score(self, batch):
+        """Pontua um lote e devolve cada resultado ao handler que o aguarda"""
+        # Ignorar requisições cujo cliente já desconectou
+        batch = [(record, future) for record, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+
+        try:
+            probabilities = await self.executor.run("predict_proba_batch", [record for record, _ in batch])
+        except ValueError:
+            # Um cliente inválido não deve derrubar o lote inteiro: pontuar um a um
+            await self._score_individually(batch)
+            return
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), probability in zip(batch, probabilities.tolist()):
+            if not future.done():
+                future.set_result(probability)
+
+    async def _score_individually(self, batch):
+        """Fallback de _score: pontua cada cliente separadamente"""
+        for record, future in batch:
+            try:
+                probability = await self.executor.run("predict_churn_probability", record)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(probability)
+
+    def stats(self):
+        """Contadores do micro-batcher"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
@@ -0,0 +1,53 @@
+"""Fixtures compartilhadas: modelo treinado uma vez no churn_dataset.csv do repositório"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+DATA_PATH = PROJECT_ROOT / "churn_dataset.csv"
+
+
+@pytest.fixture(scope="session")
+def trained_predictor():
+    """ChurnPredictor treinado (sem gráficos) no dataset padrão"""
+    from churn_model import ChurnPredictor
+
+    predictor = ChurnPredictor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.load_data(str(DATA_PATH))
+        predictor.preprocess_data()
+        predictor.train_models()
+        predictor.evaluate_models()
+    return predictor
+
+
+@pytest.fixture(scope="session")
+def model_path(trained_predictor, tmp_path_factory):
+    """Artefato salvo do modelo treinado"""
+    path = tmp_path_factory.mktemp("artifact") / "churn_model.pkl"
+    with contextlib.redirect_stdout(io.StringIO()):
+        trained_predictor.save(str(path))
+    return path
+
+
+@pytest.fixture(scope="session")
+def api_client(model_path):
+    """TestClient da API servindo o artefato salvo (CHURN_API_MODE=serve, cache de predições ligado)"""
+    import importlib
+    import os
+
+    from fastapi.testclient import TestClient
+
+    os.environ["CHURN_MODEL_PATH"] = str(model_path)
+    os.environ["CHURN_API_MODE"] = "serve"
+    os.environ["CHURN_PREDICTION_CACHE"] = "1"
+    import api
+    api = importlib.reload(api)
+    with TestClient(api.app) as client:
+        yield client
@@ -0,0 +1,14 @@
+def test_cache_invalidated_only_on_model_reload(api_client):
+    stats = api_client.get("/cache/stats").json()
+    assert stats["enabled"]
+    # A startup cria o cache vazio: não conta como invalidação
+    assert stats["invalidations"] == 0
+
+    customer = api_client.post("/sample/customer").json()
+    assert api_client.post("/predict", json=customer).status_code == 200
+    assert api_client.get("/cache/stats").json()["entries"] >= 1
+
+    reloaded = api_client.post("/model/reload").json()
+
+    assert reloaded["prediction_cache"]["invalidations"] == 1
+    assert reloaded["prediction_cache"]["entries"] == 0
@@ -0,0 +1,26 @@
+import sys
+
+
+def test_permutation_job_from_replaced_model_is_dropped(api_client):
+    api = sys.modules["api"]
+    old_predictor = api.predictor
+
+    api_client.post("/model/reload")
+    assert api.predictor is not old_predictor
+
+    # Job iniciado antes do reload termina depois dele: nada muda no modelo novo
+    api.run_permutation_importance_job(old_predictor)
+
+    assert api.permutation_job["status"] == "idle"
+    assert "permutation" not in api.feature_importance_cache
+
+
+def test_permutation_job_stores_result_for_current_model(api_client):
+    api = sys.modules["api"]
+
+    api.run_permutation_importance_job(api.predictor)
+
+    assert api.permutation_job["status"] == "done"
+    response = api_client.get("/features/importance", params={"method": "permutation"})
+    assert response.status_code == 200
+    assert response.json()["model_version"] == api.predictor.model_version
@@ -0,0 +1,80 @@
+import json
+
+SAMPLE = None
+
+
+def sample_customer(api_client):
+    global SAMPLE
+    if SAMPLE is None:
+        SAMPLE = api_client.post("/sample/customer").json()
+    return dict(SAMPLE)
+
+
+def stream_lines(api_client, body):
+    response = api_client.post("/predict/stream", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_reports_non_object_records_and_keeps_scoring(api_client):
+    customer = sample_customer(api_client)
+    body = "\n".join([json.dumps(customer), "[1, 2]", "5", json.dumps({**customer, "customer_id": 7})])
+
+    lines = stream_lines(api_client, body)
+
+    assert [line["row"] for line in lines if "error" in line] == [1, 2]
+    scored = [line for line in lines if "churn_probability" in line]
+    assert [line["row"] for line in scored] == [0, 3]
+    assert scored[1]["customer_id"] == 7
+
+
+def test_stream_scores_valid_records(api_client):
+    customer = sample_customer(api_client)
+    lines = stream_lines(api_client, "\n".join(json.dumps(customer) for _ in range(3)))
+
+    assert len(lines) == 3
+    assert all(0.0 <= line["churn_probability"] <= 1.0 for line in lines)
+
+
+def test_stream_reports_malformed_lines_and_keeps_scoring(api_client):
+    customer = sample_customer(api_client)
+    body = "\n".join([json.dumps(customer), '{"age": 35,', json.dumps({**customer, "customer_id": 9}),
+                      "\xff not json", json.dumps(customer)])
+
+    lines = stream_lines(api_client, body.encode("utf-8"))
+
+    assert [line["row"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [line["row"] for line in lines if "error" in line] == [1, 3]
+    assert all(line["error"].startswith("Entrada inválida") for line in lines if "error" in line)
+    assert lines[2]["customer_id"] == 9
+    assert all(0.0 <= line["churn_probability"] <= 1.0 for line in lines if "error" not in line)
+
+
+def test_stream_reports_only_the_invalid_record_of_a_chunk(api_client):
+    customer = sample_customer(api_client)
+    bad = {**customer, "contract_type": "Lifetime"}
+    body = "\n".join(json.dumps(record) for record in [customer, bad, customer, {**customer, "age": "old"}])
+
+    lines = stream_lines(api_client, body)
+
+    assert [line["row"] for line in lines] == [0, 1, 2, 3]
+    errors = [line for line in lines if "error" in line]
+    assert [line["row"] for line in errors] == [1, 3]
+    assert "Lifetime" in errors[0]["error"]
+    assert all("churn_probability" in lines[i] for i in (0, 2))
+
+
+def test_stream_spools_large_uploads_in_pieces(api_client, monkeypatch):
+    import api
+
+    # Força várias escritas do spool e a passagem para o disco
+    monkeypatch.setattr(api, "STREAM_SPOOL_WRITE_BYTES", 16 * 1024)
+    monkeypatch.setattr(api, "STREAM_SPOOL_MAX_BYTES", 64 * 1024)
+    customer = sample_customer(api_client)
+    body = "\n".join(json.dumps({**customer, "customer_id": i}) for i in range(2500))
+
+    lines = stream_lines(api_client, body)
+
+    assert len(body) > 1024 * 1024
+    assert [line["customer_id"] for line in lines] == list(range(2500))
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from churn_inference import read_artifact, read_artifact_header
+from churn_model import HOLDOUT_SAMPLE_SIZE, ChurnPredictor
+from conftest import PROJECT_ROOT
+
+
+def test_holdout_sample_is_bounded_and_stratified():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(20_000, 3))
+    y = (rng.uniform(size=20_000) < 0.3).astype(np.int8)
+
+    X_sample, y_sample = ChurnPredictor.holdout_sample(X, y, max_rows=1000)
+
+    assert X_sample.shape == (1000, 3)
+    assert abs(y_sample.mean() - y.mean()) < 0.01
+    # Semente fixa: a mesma amostra a cada treino
+    X_again, _ = ChurnPredictor.holdout_sample(X, y, max_rows=1000)
+    np.testing.assert_array_equal(X_sample, X_again)
+
+
+def test_holdout_sample_keeps_small_test_sets():
+    X = np.arange(20, dtype=np.float64).reshape(10, 2)
+    y = np.array([0, 1] * 5)
+
+    X_sample, y_sample = ChurnPredictor.holdout_sample(X, y)
+
+    np.testing.assert_array_equal(X_sample, X)
+    np.testing.assert_array_equal(y_sample, y)
+
+
+def test_artifact_holdout_is_bounded(model_path):
+    X_holdout, y_holdout = read_artifact(str(model_path))['holdout']
+
+    assert len(X_holdout) == len(y_holdout) <= HOLDOUT_SAMPLE_SIZE
+
+
+def test_artifact_header_is_read_without_the_estimator(model_path):
+    # Processo novo: ler o cabeçalho não pode importar o scikit-learn
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); "
+        "from churn_inference import read_artifact_header; "
+        "header = read_artifact_header(sys.argv[2]); "
+        "assert 'model' not in header and header['feature_columns']; "
+        "print('sklearn' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code, str(PROJECT_ROOT), str(model_path)],
+                            capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+    assert read_artifact(str(model_path))['feature_columns'] == read_artifact_header(str(model_path))['feature_columns']
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from churn_inference import ChurnModel, CompiledForest
+
+BATCH_SIZES = [1, 7, 64, CompiledForest.MAX_BATCH_ROWS, CompiledForest.MAX_BATCH_ROWS + 1, 1024,
+               CompiledForest.CHUNK_ROWS + 5]
+
+
+@pytest.fixture(scope="module")
+def forest_and_rows(trained_predictor):
+    model = trained_predictor.results['Random Forest']['model']
+    X_test = np.asarray(trained_predictor.X_test, dtype=np.float64)
+    rows = X_test[np.arange(max(BATCH_SIZES)) % len(X_test)]
+    return model, CompiledForest.from_sklearn(model), rows
+
+
+@pytest.mark.parametrize("batch_size", BATCH_SIZES)
+def test_compiled_forest_matches_sklearn(forest_and_rows, batch_size):
+    model, forest, rows = forest_and_rows
+    batch = rows[:batch_size]
+
+    np.testing.assert_allclose(forest.predict_proba(batch), model.predict_proba(batch), rtol=0, atol=1e-9)
+
+
+class _RecordingForest(CompiledForest):
+    """CompiledForest que registra os tamanhos de lote recebidos"""
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return super().predict_proba(X)
+
+
+def test_churn_model_uses_compiled_forest_only_for_small_batches(model_path, forest_and_rows):
+    model, forest, rows = forest_and_rows
+    churn_model = ChurnModel.load(str(model_path))
+    churn_model.model = model
+    churn_model.compiled_forest = _RecordingForest.from_arrays(forest.to_arrays())
+    churn_model.compiled_forest.calls = []
+
+    small = rows[:CompiledForest.MAX_BATCH_ROWS]
+    large = rows[:CompiledForest.MAX_BATCH_ROWS + 1]
+    np.testing.assert_allclose(churn_model._predict_proba(small), model.predict_proba(small), atol=1e-9)
+    np.testing.assert_allclose(churn_model._predict_proba(large), model.predict_proba(large), atol=1e-9)
+
+    assert churn_model.compiled_forest.calls == [CompiledForest.MAX_BATCH_ROWS]
@@ -0,0 +1,84 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn_dataset import DatasetWriter, iter_dataset, read_dataset
+from churn_inference import ChurnModel
+from conftest import DATA_PATH
+from generate_dataset import generate_dataset
+from score import score_file
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_multi_chunk_round_trip(tmp_path, extension):
+    # Blocos de 2 linhas: cada um com um conjunto diferente de categorias
+    original = pd.read_csv(DATA_PATH, nrows=40)
+    path = str(tmp_path / f"churn{extension}")
+    writer = DatasetWriter(path)
+    for chunk in iter_dataset(str(DATA_PATH), batch_size=2):
+        writer.write(chunk)
+        if chunk.index[-1] >= len(original) - 1:
+            break
+    writer.close()
+
+    data = read_dataset(path)
+
+    assert len(data) == len(original)
+    assert isinstance(data['contract_type'].dtype, pd.CategoricalDtype)
+    assert data['age'].dtype == np.int8
+    for col in ('contract_type', 'payment_method', 'churn'):
+        assert data[col].astype(str).tolist() == original[col].tolist()
+    np.testing.assert_allclose(data['monthly_charge'], original['monthly_charge'], rtol=1e-6)
+
+
+def test_generator_writes_small_chunks_to_arrow(tmp_path):
+    path = str(tmp_path / "churn.arrow")
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_dataset(path, n_records=20, chunk_size=2)
+
+    data = read_dataset(path)
+
+    assert len(data) == 20
+    assert data['customer_id'].tolist() == list(range(1, 21))
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".arrow"])
+def test_score_file_reads_every_dataset_format(tmp_path, model_path, extension):
+    source = pd.read_csv(DATA_PATH, nrows=30)
+    path = str(tmp_path / f"clientes{extension}")
+    writer = DatasetWriter(path)
+    writer.write(source)
+    writer.close()
+    output = str(tmp_path / "scores.csv")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = score_file(path, output, model_path=str(model_path), chunk_size=7, workers=1)
+
+    scores = pd.read_csv(output)
+    expected = ChurnModel.load(str(model_path)).predict_proba_columns(source)
+    assert rows == 30
+    assert scores['customer_id'].tolist() == source['customer_id'].tolist()
+    np.testing.assert_allclose(scores['churn_probability'], expected, atol=1e-9)
+
+
+def test_score_file_falls_back_to_default_types_mid_file(tmp_path, model_path):
+    source = pd.read_csv(DATA_PATH, nrows=30)
+    # Fora do int8 de churn_schema, no terceiro bloco de 7 linhas
+    source.loc[17, 'age'] = 300
+    path = str(tmp_path / "clientes.csv")
+    source.to_csv(path, index=False)
+    output = str(tmp_path / "scores.csv")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = score_file(path, output, model_path=str(model_path), chunk_size=7, workers=1)
+
+    scores = pd.read_csv(output)
+    expected = ChurnModel.load(str(model_path)).predict_proba_columns(source)
+    assert rows == 30
+    assert scores['customer_id'].tolist() == source['customer_id'].tolist()
+    np.testing.assert_allclose(scores['churn_probability'], expected, atol=1e-9)
@@ -0,0 +1,70 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from churn_ensemble import FoldEnsemble
+from churn_inference import ChurnModel
+from churn_model import N_CV_FOLDS, ChurnPredictor
+from conftest import DATA_PATH
+from export_portable import build_spec
+
+
+class CountingForest(RandomForestClassifier):
+    """Random Forest que conta as chamadas a fit (n_jobs=1: tudo no mesmo processo)"""
+
+    fits = 0
+
+    def fit(self, X, y, sample_weight=None):
+        type(self).fits += 1
+        return super().fit(X, y, sample_weight=sample_weight)
+
+
+def train(fold_ensemble, monkeypatch):
+    predictor = ChurnPredictor(n_jobs=1, fold_ensemble=fold_ensemble)
+    monkeypatch.setattr(predictor, 'candidate_models', lambda: {
+        'Random Forest': CountingForest(n_estimators=10, max_depth=4, random_state=42)
+    })
+    CountingForest.fits = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.load_data(str(DATA_PATH))
+        predictor.preprocess_data()
+        predictor.train_models()
+        predictor.evaluate_models()
+    return predictor
+
+
+def test_default_training_refits_on_full_train(monkeypatch):
+    predictor = train(False, monkeypatch)
+
+    assert CountingForest.fits == 1 + N_CV_FOLDS
+    assert not isinstance(predictor.best_model, FoldEnsemble)
+
+
+def test_fold_ensemble_reuses_fold_fits(monkeypatch):
+    predictor = train(True, monkeypatch)
+
+    assert CountingForest.fits == N_CV_FOLDS
+    ensemble = predictor.best_model
+    assert isinstance(ensemble, FoldEnsemble)
+    assert len(ensemble.estimators) == N_CV_FOLDS
+
+    # Métricas e probabilidades avaliadas são as do próprio ensemble
+    expected = np.mean([m.predict_proba(predictor.X_test)[:, 1] for m in ensemble.estimators], axis=0)
+    np.testing.assert_allclose(predictor.results['Random Forest']['y_pred_proba'], expected)
+    assert len(predictor.feature_importance) == len(predictor.feature_columns)
+
+
+def test_fold_ensemble_refuses_compiled_and_portable_export(monkeypatch, tmp_path):
+    predictor = train(True, monkeypatch)
+    path = tmp_path / "churn_model.pkl"
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.save(str(path))
+
+    served = ChurnModel.load(str(path))
+    assert served.compiled_forest is None
+    assert predictor.model_info()['engine'] == 'sklearn'
+    with pytest.raises(ValueError, match="ensemble de folds"):
+        build_spec(served)
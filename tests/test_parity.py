@@ -0,0 +1,88 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+from churn_inference import ChurnModel
+from churn_model import UNSCALED_MODELS
+from conftest import DATA_PATH, PROJECT_ROOT
+
+sys.path.insert(0, str(PROJECT_ROOT / "api"))
+
+from export_portable import build_spec  # noqa: E402
+from portable_model import PORTABLE_MODELS  # noqa: E402
+
+
+def raw_test_records(n_rows):
+    """Clientes do conjunto de teste como chegam à API: CSV sem schema (float64), na ordem do teste"""
+    raw = pd.read_csv(DATA_PATH)
+    assert len(raw) == n_rows
+    y = raw['churn'].map({'Yes': 1, 'No': 0}).to_numpy()
+    _, test_idx = train_test_split(np.arange(len(raw)), test_size=0.2, random_state=42, stratify=y)
+    return raw.iloc[test_idx].to_dict('records')
+
+
+def serving_model(predictor, name):
+    """ChurnModel de um dos modelos treinados, montado como em build_inference_state"""
+    _, X_test = predictor.model_inputs(name)
+    return ChurnModel(
+        model=predictor.results[name]['model'], model_name=name,
+        feature_columns=predictor.feature_columns, categories=predictor.categories(),
+        scaler_mean=predictor.scaler.mean_, scaler_scale=predictor.scaler.scale_,
+        category_modes=predictor.category_modes, holdout=(np.asarray(X_test), predictor.y_test),
+        scaled_input=name not in UNSCALED_MODELS
+    )
+
+
+@pytest.mark.parametrize("name", ['Random Forest', 'Gradient Boosting', 'Logistic Regression'])
+def test_served_probabilities_match_evaluated(trained_predictor, name):
+    records = raw_test_records(len(trained_predictor.data))
+    model = serving_model(trained_predictor, name)
+
+    served = model.predict_proba_batch(records)
+    single = np.array([model.predict_churn_probability(record) for record in records[:20]])
+
+    np.testing.assert_array_equal(served, trained_predictor.results[name]['y_pred_proba'])
+    # Uma linha por vez: a regressão logística em float32 soma em outra ordem no BLAS (~1e-8)
+    np.testing.assert_allclose(single, served[:20], rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("name, atol", [('Random Forest', 1e-12), ('Gradient Boosting', 1e-12),
+                                        ('Logistic Regression', 1e-6)])
+def test_portable_probabilities_match_evaluated(trained_predictor, name, atol):
+    records = raw_test_records(len(trained_predictor.data))
+    spec = build_spec(serving_model(trained_predictor, name))
+    portable = PORTABLE_MODELS[spec['kind']](spec)
+
+    served = np.array([portable.predict_churn_probability(record) for record in records])
+
+    np.testing.assert_allclose(served, trained_predictor.results[name]['y_pred_proba'], rtol=0, atol=atol)
+
+
+@pytest.fixture(scope="module")
+def hist_predictor():
+    """Hist Gradient Boosting treinado na carga tipada (float32), sem normalização"""
+    import contextlib
+    import io
+
+    from churn_model import ChurnPredictor
+
+    predictor = ChurnPredictor(boosting_engine='hist')
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.load_data(str(DATA_PATH))
+        predictor.preprocess_data()
+        predictor.train_models()
+    return predictor
+
+
+def test_unscaled_model_scores_float64_inputs_like_typed_training(hist_predictor):
+    # A API recebe float64 (ex.: 45.2); o treino viu float32(45.2) da carga tipada
+    assert hist_predictor.data['monthly_charge'].dtype == np.float32
+    records = raw_test_records(len(hist_predictor.data))
+    model = serving_model(hist_predictor, 'Hist Gradient Boosting')
+
+    served = model.predict_proba_batch(records)
+
+    np.testing.assert_array_equal(served, hist_predictor.results['Hist Gradient Boosting']['y_pred_proba'])
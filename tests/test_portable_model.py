@@ -0,0 +1,113 @@
+import io
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+sys.path.insert(0, str(API_DIR))
+
+import index  # noqa: E402
+from portable_model import PortableLogisticModel, load_portable_model  # noqa: E402
+
+COMMITTED_MODEL_PATH = API_DIR / "churn_model_portable.json"
+
+LOGISTIC_SPEC = {
+    'model_name': 'Logistic Regression',
+    'model_version': 'test',
+    'feature_columns': ['age', 'gender'],
+    'metrics': {},
+    'feature_importance': [],
+    'intercept': 0.5,
+    'numeric_scaling': {'age': [-0.01, 0.0, 1.0]},
+    'categorical_weights': {'gender': {'F': 0.0, 'M': 0.2}},
+    'category_modes': {'gender': 'M'}
+}
+
+
+class FakeSocket:
+    """Socket em memória para atender uma requisição crua com o handler"""
+
+    def __init__(self, raw_request):
+        self.raw_request = raw_request
+        self.response = io.BytesIO()
+
+    def makefile(self, mode, *args, **kwargs):
+        return io.BytesIO(self.raw_request)
+
+    def sendall(self, data):
+        self.response.write(data)
+
+
+def post_predict(payload):
+    """POST /api/predict no handler serverless; devolve (status, corpo)"""
+    body = json.dumps(payload).encode('utf-8')
+    raw = (f"POST /api/predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+           f"Content-Length: {len(body)}\r\n\r\n").encode('ascii') + body
+    return handle(raw)
+
+
+def get(path):
+    """GET no handler serverless; devolve (status, corpo)"""
+    return handle(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('ascii'))
+
+
+def handle(raw):
+    """Atende uma requisição crua com o handler; devolve (status, corpo JSON)"""
+    sock = FakeSocket(raw)
+    index.handler.log_message = lambda *args: None
+    index.handler(sock, ('127.0.0.1', 0), None)
+    head, _, response_body = sock.response.getvalue().partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(response_body)
+
+
+def test_committed_portable_model_is_served():
+    model = load_portable_model(str(COMMITTED_MODEL_PATH))
+
+    assert index.portable_model is not None
+    assert 0.0 <= model.predict_churn_probability(index.SAMPLE_CUSTOMER) <= 1.0
+    assert post_predict(index.SAMPLE_CUSTOMER)[0] == 200
+
+
+@pytest.mark.parametrize("field, value", [('age', None), ('age', [35]), ('gender', ['M']), ('gender', {'v': 'M'})])
+def test_invalid_values_return_422(field, value):
+    status, body = post_predict({**index.SAMPLE_CUSTOMER, field: value})
+
+    assert status == 422
+    assert field in body['error']
+
+
+@pytest.mark.parametrize("field, value", [('age', None), ('age', [35]), ('gender', ['M'])])
+def test_logistic_model_rejects_invalid_values(field, value):
+    model = PortableLogisticModel(LOGISTIC_SPEC)
+
+    with pytest.raises(ValueError, match=field):
+        model.predict_churn_probability({'age': 35, 'gender': 'M', field: value})
+
+
+@pytest.mark.parametrize("probability, level, recommendation", [
+    (0.39, "🟢 BAIXO RISCO", "✅ Manter estratégia atual"),
+    (0.4, "🟡 RISCO MÉDIO", "✅ Manter estratégia atual"),
+    (0.69, "🟡 RISCO MÉDIO", "📧 Envio de material educativo sobre serviços"),
+    (0.7, "🔴 ALTO RISCO", "📧 Envio de material educativo sobre serviços"),
+    (0.71, "🔴 ALTO RISCO", "🚨 Contato imediato com o cliente")
+])
+def test_risk_boundaries_match_the_original_handler(probability, level, recommendation):
+    assert index.get_risk_level(probability)[0] == level
+    assert index.get_base_recommendations(probability)[0] == recommendation
+
+
+@pytest.mark.parametrize("path", ["/api/", "/api/health"])
+def test_root_and_health_report_the_current_time(path, monkeypatch):
+    class Clock:
+        @staticmethod
+        def now():
+            return datetime(2030, 1, 2, 3, 4, 5)
+
+    monkeypatch.setattr(index, "datetime", Clock)
+    status, body = get(path)
+
+    assert status == 200
+    assert body["timestamp"] == "2030-01-02T03:04:05"
@@ -0,0 +1,137 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn_dataset import iter_dataset, read_dataset
+from churn_model import ChurnPredictor
+from conftest import DATA_PATH
+from generate_dataset import generate_dataset
+
+
+def write_sample(tmp_path, **changes):
+    """Primeiras 200 linhas do dataset, com {coluna: (linha, valor)} alterados, em CSV"""
+    df = pd.read_csv(DATA_PATH, nrows=200)
+    for col, (row, value) in changes.items():
+        df[col] = df[col].astype(object)
+        df.loc[row, col] = value
+    path = tmp_path / "churn.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def load(path, typed=True):
+    predictor = ChurnPredictor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.load_data(path, typed=typed)
+    return predictor
+
+
+def test_typed_csv_uses_small_integers(tmp_path):
+    data = read_dataset(write_sample(tmp_path))
+
+    assert data['age'].dtype == np.int8
+    assert data['total_minutes_used'].dtype == np.int16
+    assert isinstance(data['gender'].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize("col, value", [('age', 300), ('number_calls_placed', 200), ('age', -129)])
+def test_out_of_range_integer_is_not_truncated(tmp_path, col, value):
+    path = write_sample(tmp_path, **{col: (3, value)})
+
+    with pytest.raises(ValueError, match=col):
+        read_dataset(path)
+    with pytest.raises(ValueError, match=col):
+        list(iter_dataset(path, batch_size=50))
+
+    # load_data volta aos tipos padrão e preserva o valor original
+    data = load(path).data
+    assert data.loc[3, col] == value
+    assert data[col].dtype == np.int64
+
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_missing_categorical_value_is_rejected(tmp_path, typed):
+    predictor = load(write_sample(tmp_path, contract_type=(5, None)), typed=typed)
+
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(ValueError, match="contract_type"):
+        predictor.preprocess_data(track_memory=False)
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_all_features_used_with_and_without_schema(typed):
+    predictor = load(str(DATA_PATH), typed=typed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.preprocess_data(track_memory=False)
+
+    # 31 numéricas + 19 categóricas (customer_id e o target ficam de fora)
+    assert len(predictor.feature_columns) == 50
+    assert int(predictor.categorical_mask.sum()) == 19
+
+
+def test_scaler_statistics_computed_per_column_match_standard_scaler(trained_predictor):
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = trained_predictor.scaler
+    X = np.vstack([trained_predictor.X_train, trained_predictor.X_test]).astype(np.float64)
+    X_unscaled = (X * scaler.scale_.astype(np.float32) + scaler.mean_.astype(np.float32)).astype(np.float32)
+    reference = StandardScaler().fit(X_unscaled)
+
+    np.testing.assert_allclose(scaler.mean_, reference.mean_, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(scaler.scale_, reference.scale_, rtol=1e-5)
+    assert scaler.n_samples_seen_ == len(X)
+
+
+def test_preprocess_peak_memory_close_to_final_matrix(tmp_path, capsys):
+    path = str(tmp_path / "churn.parquet")
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_dataset(path, n_records=50_000, chunk_size=25_000)
+    predictor = load(path)
+
+    predictor.preprocess_data(track_memory=True)
+
+    line = next(line for line in capsys.readouterr().out.splitlines() if 'Pico de memória' in line)
+    peak_mb = float(line.split(':')[1].split('MB')[0])
+    matrix_mb = predictor.X_train.base.nbytes / 1024 ** 2
+    # A matriz final + temporários de uma coluna por vez (StandardScaler.fit alocaria ~2x a matriz)
+    assert peak_mb < 1.5 * matrix_mb
+
+
+def test_feature_cache_hit_skips_reading_the_file(tmp_path, monkeypatch):
+    path = write_sample(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    first = ChurnPredictor(cache_dir=cache_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        first.load_data(path)
+        X_first, y_first = first.preprocess_data()
+
+    # Segunda execução: nem o arquivo é lido, nem o pré-processamento roda
+    def fail(*args, **kwargs):
+        raise AssertionError("dados lidos apesar do acerto no cache")
+
+    monkeypatch.setattr("churn_model.read_dataset", fail)
+    second = ChurnPredictor(cache_dir=cache_dir)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert second.load_data(path) is None
+        X_second, y_second = second.preprocess_data()
+
+    assert second.data is None
+    assert "reaproveitada do cache" in output.getvalue()
+    np.testing.assert_array_equal(X_second, X_first)
+    np.testing.assert_array_equal(y_second, y_first)
+    assert second.feature_columns == first.feature_columns
+    np.testing.assert_array_equal(second.scaler.mean_, first.scaler.mean_)
+
+    # Arquivo modificado (mtime diferente): o cache não vale mais
+    monkeypatch.undo()
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    third = ChurnPredictor(cache_dir=cache_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert third.load_data(path) is not None
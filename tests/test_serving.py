@@ -0,0 +1,239 @@
+import asyncio
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from churn_inference import ChurnModel
+from serving import ExecutorSaturatedError, InferenceExecutor, MicroBatcher, PredictionCache, ServingConfig
+
+
+class BlockingModel:
+    """Modelo falso cujas chamadas esperam um Event (executor de threads)"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict_churn_probability(self, record):
+        self.release.wait(5)
+        return record["age"] / 100
+
+
+class RecordingExecutor:
+    """Executor falso que registra cada chamada; clientes sem 'age' inteiro são inválidos"""
+
+    def __init__(self):
+        self.config = ServingConfig()
+        self.calls = []
+
+    async def run(self, method, *args):
+        self.calls.append((method, args[0]))
+        records = args[0] if method == "predict_proba_batch" else [args[0]]
+        if any(not isinstance(record["age"], int) for record in records):
+            raise ValueError("Entrada inválida: age")
+        probabilities = np.array([record["age"] / 100 for record in records])
+        return probabilities if method == "predict_proba_batch" else float(probabilities[0])
+
+
+def run_batcher(records, max_batch, max_wait_ms):
+    """Submete os clientes ao mesmo tempo; devolve (resultado ou exceção de cada um, chamadas)"""
+    executor = RecordingExecutor()
+
+    async def scenario():
+        batcher = MicroBatcher(executor, max_batch, max_wait_ms)
+        batcher.start()
+        try:
+            return await asyncio.wait_for(asyncio.gather(
+                *(batcher.submit(record) for record in records), return_exceptions=True
+            ), timeout=5)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(scenario()), executor.calls
+
+
+class FakeClock:
+    """Relógio controlado pelo teste (substitui time.monotonic no PredictionCache)"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def sample_records(model_path, n_rows):
+    """Clientes do holdout do artefato, como dicts com os valores originais"""
+    model = ChurnModel.load(str(model_path))
+    X_holdout, _ = model.holdout
+    X = X_holdout[:n_rows] * model.scaler_scale + model.scaler_mean
+    records = []
+    for row in X:
+        record = {}
+        for col, value in zip(model.feature_columns, row):
+            if col in model.categories:
+                record[col] = model.categories[col][int(round(value))]
+            else:
+                record[col] = float(value)
+        records.append(record)
+    return model, records
+
+
+def test_thread_executor_saturation_raises():
+    model = BlockingModel()
+    executor = InferenceExecutor(model, ServingConfig(executor="thread", workers=1, max_pending=1))
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run("predict_churn_probability", {"age": 40}))
+        await asyncio.sleep(0)
+        assert executor.stats()["pending"] == 1
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run("predict_churn_probability", {"age": 50})
+        model.release.set()
+        return await first
+
+    try:
+        assert asyncio.run(scenario()) == 0.4
+        # Pendências liberadas: o executor volta a aceitar chamadas
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_process_executor_saturation_raises(model_path):
+    model, records = sample_records(model_path, 3)
+    config = ServingConfig(executor="process", workers=1, max_pending=1)
+    executor = InferenceExecutor(model, config, model_path=str(model_path))
+
+    async def scenario():
+        # O processo do pool ainda está carregando o artefato: a chamada fica pendente
+        first = asyncio.ensure_future(executor.run("predict_proba_batch", records))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run("predict_proba_batch", records)
+        return await first
+
+    try:
+        assert asyncio.run(scenario()).tolist() == model.predict_proba_batch(records).tolist()
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_saturated_endpoints_return_503_with_retry_after(api_client, model_path, monkeypatch, mode):
+    api = sys.modules["api"]
+    config = ServingConfig(executor=mode, workers=1, max_pending=2, retry_after_seconds=7)
+    executor = InferenceExecutor(api.predictor, config, model_path=str(model_path))
+    monkeypatch.setattr(api, "inference_executor", executor)
+    monkeypatch.setattr(api, "serving_config", config)
+    monkeypatch.setattr(api, "prediction_cache", None)
+    customer = api_client.post("/sample/customer").json()
+
+    try:
+        assert api_client.post("/predict", json=customer).status_code == 200
+
+        executor.pending = config.max_pending
+        single = api_client.post("/predict", json=customer)
+        batch = api_client.post("/predict/batch", json={"customers": [customer, customer]})
+    finally:
+        executor.shutdown()
+
+    for response in (single, batch):
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+
+
+def test_micro_batcher_flushes_on_max_size():
+    records = [{"age": age} for age in (20, 30, 40, 50)]
+
+    # Espera máxima longa: só o tamanho do lote pode fechá-lo a tempo
+    results, calls = run_batcher(records, max_batch=2, max_wait_ms=60_000)
+
+    assert results == [0.2, 0.3, 0.4, 0.5]
+    assert [(method, len(batch)) for method, batch in calls] == [("predict_proba_batch", 2)] * 2
+
+
+def test_micro_batcher_flushes_on_timeout():
+    records = [{"age": 20}, {"age": 30}]
+
+    # Lote nunca enche: fecha quando max_wait expira
+    results, calls = run_batcher(records, max_batch=64, max_wait_ms=20)
+
+    assert results == [0.2, 0.3]
+    assert calls == [("predict_proba_batch", records)]
+
+
+def test_micro_batcher_fans_results_out_to_each_caller():
+    records = [{"age": age} for age in range(18, 30)]
+
+    results, calls = run_batcher(records, max_batch=64, max_wait_ms=20)
+
+    assert len(calls) == 1
+    assert results == [record["age"] / 100 for record in records]
+
+
+def test_micro_batcher_scores_one_by_one_when_a_record_is_invalid():
+    records = [{"age": 20}, {"age": "old"}, {"age": 40}]
+
+    results, calls = run_batcher(records, max_batch=64, max_wait_ms=20)
+
+    assert results[0] == 0.2 and results[2] == 0.4
+    assert isinstance(results[1], ValueError)
+    assert [method for method, _ in calls] == ["predict_proba_batch"] + ["predict_churn_probability"] * 3
+
+
+def test_prediction_cache_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60, clock=FakeClock())
+    cache.put("a", 0.1)
+    cache.put("b", 0.2)
+    # Ler "a" o torna o mais recente: "b" é o próximo a sair
+    assert cache.get("a") == 0.1
+
+    cache.put("c", 0.3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 0.1
+    assert cache.get("c") == 0.3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_prediction_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.put("a", 0.1)
+
+    clock.now = 29.9
+    assert cache.get("a") == 0.1
+    clock.now = 30.0
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["expirations"] == 1
+
+
+def test_prediction_cache_counters():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=1, ttl_seconds=10, clock=clock)
+
+    assert cache.get("a") is None        # miss
+    cache.put("a", 0.1)
+    assert cache.get("a") == 0.1         # hit
+    cache.put("b", 0.2)                  # remove "a"
+    clock.now = 10.0
+    assert cache.get("b") is None        # expirado: miss
+    cache.put("c", 0.3)
+    cache.invalidate()
+
+    assert cache.stats() == {
+        "entries": 0,
+        "max_entries": 1,
+        "ttl_seconds": 10,
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+        "evictions": 1,
+        "expirations": 1,
+        "invalidations": 1
+    }
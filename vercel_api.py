@@ -4,7 +4,8 @@ API REST para Modelo de Predição de Churn - Vercel
 ===================================================
 
 Esta API permite consumir o modelo de predição de churn via HTTP requests.
-Versão otimizada para Vercel com algoritmo mock.
+Versão otimizada para Vercel: pontua com o modelo portátil em Python puro
+(churn_model_portable.json, gerado por export_portable.py), sem scikit-learn.
 """
 
 from fastapi import FastAPI, HTTPException
@@ -12,8 +13,28 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import json
+import os
+import sys
 from datetime import datetime
 
+# Funciona tanto em api/vercel_api.py quanto na cópia na raiz do projeto
+_HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = _HERE if os.path.exists(os.path.join(_HERE, 'portable_model.py')) else os.path.join(_HERE, 'api')
+sys.path.insert(0, API_DIR)
+
+from portable_model import load_portable_model
+
+PORTABLE_MODEL_PATH = os.getenv('CHURN_PORTABLE_MODEL_PATH', os.path.join(API_DIR, 'churn_model_portable.json'))
+UNKNOWN_CATEGORY = os.getenv('CHURN_UNKNOWN_CATEGORY', 'error')
+
+# Modelo carregado uma vez por instância (no import) e reaproveitado entre invocações
+try:
+    portable_model = load_portable_model(PORTABLE_MODEL_PATH, unknown_category=UNKNOWN_CATEGORY)
+    model_load_error = None
+except (OSError, ValueError, KeyError) as e:
+    portable_model = None
+    model_load_error = f"Modelo portátil indisponível ({PORTABLE_MODEL_PATH}): {e}"
+
 # Inicializar FastAPI
 app = FastAPI(
     title="Churn Prediction API",
@@ -164,44 +185,11 @@ def get_recommendations(probability: float, customer_data: dict) -> List[str]:
 
     return recommendations
 
-def predict_churn_mock(customer_data: dict) -> float:
-    """Prediz churn usando algoritmo mock baseado nos dados do cliente"""
-    probability = 0.3  # Base probability
-
-    # Fatores que aumentam a probabilidade de churn
-    if customer_data['contract_type'] == 'Month-to-month':
-        probability += 0.2
-
-    if customer_data['satisfaction_score'] < 5:
-        probability += 0.25
-
-    if customer_data['number_customer_service_calls'] > 5:
-        probability += 0.15
-
-    if customer_data['late_payment_count'] > 0:
-        probability += 0.1
-
-    if customer_data['monthly_charge'] > 80:
-        probability += 0.1
-
-    if customer_data['age'] < 30:
-        probability += 0.05
-
-    # Fatores que diminuem a probabilidade de churn
-    if customer_data['contract_type'] == 'Two year':
-        probability -= 0.15
-
-    if customer_data['satisfaction_score'] >= 8:
-        probability -= 0.2
-
-    if customer_data['tech_support'] == 'Yes':
-        probability -= 0.1
-
-    if customer_data['paperless_billing'] == 'Yes':
-        probability -= 0.05
-
-    # Garantir que a probabilidade esteja entre 0 e 1
-    return max(0.1, min(0.9, probability))
+def require_model():
+    """Modelo portátil carregado, ou 503 se o JSON não foi exportado"""
+    if portable_model is None:
+        raise HTTPException(status_code=503, detail=model_load_error)
+    return portable_model
 
 @app.get("/", response_model=Dict[str, str])
 async def root():
@@ -210,7 +198,7 @@ async def root():
         "message": "Churn Prediction API",
         "version": "1.0.0",
         "docs": "/docs",
-        "note": "Usando modelo mock para compatibilidade com Vercel"
+        "note": "Modelo portátil em Python puro (export_portable.py)"
     }
 
 @app.get("/health", response_model=HealthResponse)
@@ -218,7 +206,7 @@ async def health_check():
     """Health check da API"""
     return HealthResponse(
         status="healthy",
-        model_loaded=False,  # Sempre False pois usamos mock
+        model_loaded=portable_model is not None,
         timestamp=datetime.now().isoformat(),
         version="1.0.0"
     )
@@ -226,12 +214,13 @@ async def health_check():
 @app.post("/predict", response_model=PredictionResponse)
 async def predict_churn(customer: CustomerData):
     """Prediz churn para um cliente individual"""
+    model = require_model()
     try:
         # Converter para dict
         customer_data = customer.dict()
 
-        # Fazer predição usando algoritmo mock
-        probability = predict_churn_mock(customer_data)
+        # Fazer predição com o modelo portátil
+        probability = model.predict_churn_probability(customer_data)
 
         # Determinar nível de risco
         risk_level, risk_description = get_risk_level(probability)
@@ -239,30 +228,24 @@ async def predict_churn(customer: CustomerData):
         # Gerar recomendações
         recommendations = get_recommendations(probability, customer_data)
 
-        # Informações do modelo
-        model_info = {
-            "model_type": "Mock Algorithm",
-            "accuracy": 0.705,
-            "auc": 0.7467,
-            "features_used": 50,
-            "note": "Algoritmo mock para demonstração"
-        }
-
         return PredictionResponse(
             churn_probability=probability,
             risk_level=risk_level,
             risk_description=risk_description,
             recommendations=recommendations,
             timestamp=datetime.now().isoformat(),
-            model_info=model_info
+            model_info=model.model_info()
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
 
 @app.post("/predict/batch", response_model=BatchPredictionResponse)
 async def predict_churn_batch(request: BatchPredictionRequest):
     """Prediz churn para múltiplos clientes"""
+    model = require_model()
     try:
         predictions = []
         total_probability = 0
@@ -270,7 +253,7 @@ async def predict_churn_batch(request: BatchPredictionRequest):
 
         for i, customer in enumerate(request.customers):
             customer_data = customer.dict()
-            probability = predict_churn_mock(customer_data)
+            probability = model.predict_churn_probability(customer_data)
             risk_level, risk_description = get_risk_level(probability)
             recommendations = get_recommendations(probability, customer_data)
 
@@ -281,13 +264,7 @@ async def predict_churn_batch(request: BatchPredictionRequest):
                 risk_description=risk_description,
                 recommendations=recommendations,
                 timestamp=datetime.now().isoformat(),
-                model_info={
-                    "model_type": "Mock Algorithm",
-                    "accuracy": 0.705,
-                    "auc": 0.7467,
-                    "features_used": 50,
-                    "note": "Algoritmo mock para demonstração"
-                }
+                model_info=model.model_info()
             )
 
             predictions.append(prediction)
@@ -303,36 +280,36 @@ async def predict_churn_batch(request: BatchPredictionRequest):
             risk_distribution=risk_distribution
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na predição em lote: {str(e)}")
 
 @app.get("/model/info")
 async def get_model_info():
     """Retorna informações sobre o modelo"""
+    model = require_model()
+    model_info = model.model_info()
     return {
-        "model_type": "Mock Algorithm",
-        "accuracy": 0.705,
-        "auc": 0.7467,
-        "features_count": 50,
-        "features": ["age", "subscription_length_months", "monthly_charge", "satisfaction_score"],
+        "model_type": model_info["model_type"],
+        "accuracy": model_info["accuracy"],
+        "auc": model_info["auc"],
+        "model_version": model_info["model_version"],
+        "engine": model_info["engine"],
+        "features_count": len(model.feature_columns),
+        "features": model.feature_columns[:10],
         "dataset_size": 1000,
-        "churn_rate": 0.645,
-        "note": "Algoritmo mock para demonstração - compatível com Vercel"
+        "churn_rate": 0.645
     }
 
 @app.get("/features/importance")
 async def get_feature_importance():
     """Retorna a importância das features"""
+    model = require_model()
     return {
-        "top_features": [
-            {"feature": "contract_type", "importance": 0.058787},
-            {"feature": "satisfaction_score", "importance": 0.050098},
-            {"feature": "monthly_charge", "importance": 0.047574},
-            {"feature": "number_customer_service_calls", "importance": 0.045123},
-            {"feature": "late_payment_count", "importance": 0.042891}
-        ],
-        "total_features": 50,
-        "note": "Importância baseada em algoritmo mock"
+        "top_features": model.feature_importance[:5],
+        "total_features": len(model.feature_columns),
+        "method": "impurity"
     }
 
 @app.post("/sample/customer")